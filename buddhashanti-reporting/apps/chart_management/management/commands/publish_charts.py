@@ -0,0 +1,24 @@
+"""
+Simple Chart Publish Command
+
+Publish rendered chart files under content-hashed static names.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.chart_management.services import get_chart_service
+
+
+class Command(BaseCommand):
+    """Publish chart files into STATIC_ROOT and the staticfiles manifest"""
+
+    help = "Publish chart files under content-hashed names (after collectstatic)"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Publishing chart files...")
+
+        chart_service = get_chart_service()
+        published_count = chart_service.publish_all_charts()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Published {published_count} chart files")
+        )
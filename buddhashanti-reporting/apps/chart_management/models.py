@@ -7,6 +7,7 @@ Minimal system to track chart files based on file existence only.
 from pathlib import Path
 from django.db import models
 from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
 from apps.core.models import BaseModel
 
 
@@ -49,7 +50,8 @@ class ChartFile(BaseModel):
     def url(self):
         """Get URL for the file"""
         if self.exists():
-            return f"{settings.STATIC_URL}images/charts/{self.file_path}"
+            # Content-hashed name when the chart has been published
+            return staticfiles_storage.url(f"images/charts/{self.file_path}")
         return None
 
     def exists(self):
@@ -7,6 +7,7 @@ Basic service for tracking chart files based on file existence only.
 from pathlib import Path
 from typing import Optional
 from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
 from .models import ChartFile
 
 
@@ -44,6 +45,7 @@ class SimpleChartService:
             # If file exists, return URL
             if chart_file.exists():
                 print(f"✓ Chart already exists: {chart_file.file_path}")
+                self.publish_chart(chart_file.file_path)
                 return chart_file.url
             else:
                 # File doesn't exist, update with new path
@@ -55,6 +57,7 @@ class SimpleChartService:
                 # Return URL only if file actually exists
                 if chart_file.exists():
                     print(f"✓ Updated chart file: {chart_file.file_path}")
+                    self.publish_chart(chart_file.file_path)
                     return chart_file.url
                 else:
                     print(f"⚠ Chart file not found: {chart_file.file_path}")
@@ -72,6 +75,7 @@ class SimpleChartService:
             # Return URL only if file actually exists
             if chart_file.exists():
                 print(f"✓ Tracked new chart: {chart_file.file_path}")
+                self.publish_chart(chart_file.file_path)
                 return chart_file.url
             else:
                 print(f"⚠ Chart file not found: {chart_file.file_path}")
@@ -97,6 +101,30 @@ class SimpleChartService:
         """Check if chart needs to be generated (doesn't exist)"""
         return not self.chart_exists(chart_key)
 
+    def publish_chart(self, file_path: str) -> Optional[str]:
+        """
+        Publish a rendered chart under its content-hashed static name
+
+        Returns the hashed name, or None when the static files storage keeps
+        plain names (development) or the file is missing.
+        """
+        publish = getattr(staticfiles_storage, "publish", None)
+        source_path = self.charts_dir / file_path
+        if publish is None or not source_path.is_file():
+            return None
+        return publish(f"images/charts/{file_path}", source_path)
+
+    def publish_all_charts(self) -> int:
+        """Publish every chart file; returns the number of files"""
+        if not hasattr(staticfiles_storage, "publish"):
+            return 0
+        count = 0
+        for source_path in sorted(self.charts_dir.rglob("*")):
+            if source_path.is_file():
+                self.publish_chart(source_path.relative_to(self.charts_dir).as_posix())
+                count += 1
+        return count
+
     def cleanup_missing_files(self) -> int:
         """Remove records for files that don't exist"""
         count = 0
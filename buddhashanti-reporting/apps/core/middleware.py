@@ -0,0 +1,37 @@
+"""
+Long-lived caching for content-hashed static files
+
+Static files stored by HashedStaticFilesStorage carry a 12-digit MD5 in
+their name, so a given URL always serves the same bytes. When Django
+serves them (DEBUG, or a deployment without a front-end server) they are
+marked immutable; nginx should send the same header for STATIC_ROOT.
+"""
+
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+
+# One year, the longest lifetime caches honour
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class ImmutableStaticFilesMiddleware:
+    """Mark responses for hashed static file names as cacheable forever"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.status_code == 200
+            and request.path.startswith(settings.STATIC_URL)
+            and HASHED_NAME_RE.search(request.path)
+        ):
+            patch_cache_control(
+                response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+            )
+        return response
@@ -0,0 +1,111 @@
+"""
+Content-hashed static files storage
+
+collectstatic stores every static file under a name containing the MD5 of
+its content (css/pdf.55e7cbb9ba48.css) and lists them in staticfiles.json;
+{% static %} and staticfiles_storage.url() resolve names through that
+manifest. Charts are rendered after deploys, so publish() adds a single
+file to STATIC_ROOT and the manifest at runtime. Other workers reload the
+manifest when its modification time changes.
+
+Hashed names change whenever the content does, so they can be served with
+Cache-Control: immutable (see apps.core.middleware).
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; publishes are not serialized
+    fcntl = None
+
+
+class HashedStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that tolerates files collected after the last deploy"""
+
+    # Unknown names fall back to their plain URL instead of raising
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest_mtime = self.get_manifest_mtime()
+
+    @property
+    def manifest_path(self):
+        return Path(self.manifest_storage.path(self.manifest_name))
+
+    def get_manifest_mtime(self):
+        try:
+            return self.manifest_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_manifest(self):
+        """Pick up files another process published since the last lookup"""
+        mtime = self.get_manifest_mtime()
+        if mtime != self.manifest_mtime:
+            self.hashed_files, self.manifest_hash = self.load_manifest()
+            self.manifest_mtime = mtime
+
+    def stored_name(self, name):
+        self.reload_manifest()
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Neither in the manifest nor in STATIC_ROOT yet
+            return name
+
+    def save_manifest(self):
+        """Write the manifest atomically so readers never see it missing"""
+        self.manifest_hash = self.file_hash(
+            None, ContentFile(json.dumps(sorted(self.hashed_files.items())).encode())
+        )
+        payload = {
+            "paths": self.hashed_files,
+            "version": self.manifest_version,
+            "hash": self.manifest_hash,
+        }
+        path = self.manifest_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_manifest_")
+        try:
+            with os.fdopen(fd, "w") as output:
+                json.dump(payload, output)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self.manifest_mtime = self.get_manifest_mtime()
+
+    def publish(self, name, source_path):
+        """
+        Store one source file under its hashed name and add it to the manifest
+
+        Returns the hashed name; publishing unchanged content is a no-op.
+        """
+        name = self.clean_name(name)
+        with open(source_path, "rb") as source:
+            content = File(source)
+            hashed_name = self.clean_name(self.hashed_name(name, content))
+            if not self.exists(hashed_name):
+                content.seek(0)
+                self._save(hashed_name, content)
+
+        lock_path = self.manifest_path.with_suffix(".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Re-read under the lock so concurrent publishes are not lost
+            self.hashed_files, self.manifest_hash = self.load_manifest()
+            if self.hashed_files.get(self.hash_key(name)) != hashed_name:
+                self.hashed_files[self.hash_key(name)] = hashed_name
+                self.save_manifest()
+        return hashed_name
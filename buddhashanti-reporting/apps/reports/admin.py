@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
@@ -9,6 +9,8 @@ from .models import (
     ReportTable,
     PublicationSettings,
     ReportDownload,
+    ReportDownloadDaily,
+    ReportBuild,
 )
 
 
@@ -310,6 +312,101 @@ class ReportDownloadAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(ReportDownloadDaily)
+class ReportDownloadDailyAdmin(admin.ModelAdmin):
+    list_display = ["date", "download_type", "section", "count"]
+    list_filter = ["download_type", "date"]
+    ordering = ["-date"]
+    readonly_fields = ["date", "download_type", "section", "count", "updated_at"]
+
+    def has_add_permission(self, request):
+        # Rolled up from tracked downloads
+        return False
+
+
+
+@admin.register(ReportBuild)
+class ReportBuildAdmin(admin.ModelAdmin):
+    list_display = [
+        "build_type",
+        "target",
+        "status",
+        "duration_display",
+        "query_count",
+        "peak_memory_display",
+        "app_version",
+        "started_at",
+    ]
+    list_filter = ["build_type", "status", "app_version", "started_at"]
+    search_fields = ["target", "app_version"]
+    ordering = ["-started_at"]
+    readonly_fields = [
+        "id",
+        "build_type",
+        "target",
+        "status",
+        "app_version",
+        "started_at",
+        "finished_at",
+        "duration",
+        "query_count",
+        "query_time",
+        "peak_memory",
+        "stages_table",
+        "error",
+    ]
+    exclude = ["stages"]
+
+    def has_add_permission(self, request):
+        # Builds are recorded automatically
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Traces are read-only
+        return False
+
+    def duration_display(self, obj):
+        return f"{obj.duration:.2f}s"
+
+    duration_display.short_description = "Duration"
+    duration_display.admin_order_field = "duration"
+
+    def peak_memory_display(self, obj):
+        return f"{obj.peak_memory / (1024 * 1024):.1f} MB"
+
+    peak_memory_display.short_description = "Peak Memory"
+    peak_memory_display.admin_order_field = "peak_memory"
+
+    def stages_table(self, obj):
+        if not obj.stages:
+            return "No stages recorded"
+
+        rows = format_html_join(
+            "",
+            '<tr><td style="padding-left: {}px">{}</td><td>{}</td><td>{}</td>'
+            "<td>{}</td><td>{}</td></tr>",
+            (
+                (
+                    8 + 16 * stage.get("depth", 0),
+                    stage.get("name", ""),
+                    f"{stage.get('elapsed', 0):.3f}s",
+                    stage.get("queries", 0),
+                    f"{stage.get('query_time', 0):.3f}s",
+                    f"{stage.get('peak_memory', 0) / (1024 * 1024):.1f} MB",
+                )
+                for stage in obj.stages
+            ),
+        )
+        return format_html(
+            "<table><thead><tr><th>Stage</th><th>Wall time</th><th>Queries</th>"
+            "<th>Query time</th><th>Peak memory</th></tr></thead>"
+            "<tbody>{}</tbody></table>",
+            rows,
+        )
+
+    stages_table.short_description = "Stages"
+
+
 # Customize admin site
 admin.site.site_header = "pokhara Digital Profile Admin"
 admin.site.site_title = "pokharaAdmin"
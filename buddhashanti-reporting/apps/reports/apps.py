@@ -5,3 +5,7 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
     verbose_name = 'Reports'
+
+    def ready(self):
+        """Connect cache invalidation signals"""
+        import apps.reports.signals  # noqa F401
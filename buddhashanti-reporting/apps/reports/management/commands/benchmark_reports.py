@@ -0,0 +1,326 @@
+"""
+Management command to benchmark report PDF generation
+
+Runs the PDF views in-process and reports wall time, response size and peak
+RSS growth per request so memory regressions in the PDF pipeline are visible.
+With --first-page the full report is also compared with its linearized
+(fast web view) build: how many bytes a viewer needs before page 1 can be
+shown, and how long that takes at a given bandwidth.
+
+With --api-load URL the command instead load-tests the sync and async read
+API endpoints of a running server with concurrent clients. Run it once
+against the WSGI and once against the ASGI deployment, with the same
+worker count, to compare throughput. Both sides answer conditional
+requests and cache bodies per content version and URL alike, so the ratio
+measures request handling rather than caching:
+
+    gunicorn gadhawa_report.wsgi --workers 4
+    uvicorn gadhawa_report.asgi:application --workers 4
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from apps.reports.models import ReportCategory, ReportSection
+from apps.reports.utils.artifacts import pdf_artifacts
+from apps.reports.utils.linearize import (
+    LINEARIZATION_HEADER_BYTES,
+    parse_linearization_dict,
+)
+from apps.reports.utils.profiling import PeakRSSSampler
+
+
+class Command(BaseCommand):
+    help = "Benchmark PDF generation time and peak memory per request"
+
+    TARGETS = ["full", "category", "section"]
+
+    # (endpoint, sync URL name, async URL name) of the API load test
+    API_ENDPOINTS = [
+        ("categories", "api_categories", "api_async_categories"),
+        ("sections", "api_sections", "api_async_sections"),
+        ("search", "api_search", "api_async_search"),
+        ("download-stats", "api_download_stats", "api_async_download_stats"),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            choices=self.TARGETS,
+            help="PDF endpoint to benchmark (repeatable, default: all)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of requests per endpoint",
+        )
+        parser.add_argument(
+            "--draft",
+            action="store_true",
+            help="Benchmark the ReportLab draft renderer (?draft=1)",
+        )
+        parser.add_argument(
+            "--first-page",
+            action="store_true",
+            help="Compare first-page time of regular and linearized full reports",
+        )
+        parser.add_argument(
+            "--bandwidth",
+            type=float,
+            default=10.0,
+            help="Client bandwidth in Mbit/s used for first-page estimates",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header used for the simulated requests",
+        )
+        parser.add_argument(
+            "--api-load",
+            metavar="URL",
+            help="Load-test the sync and async API of the server at URL instead",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Concurrent clients of the API load test",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per endpoint and mode of the API load test",
+        )
+        parser.add_argument(
+            "--query",
+            default="वडा",
+            help="Search query of the API load test",
+        )
+
+    def handle(self, *args, **options):
+        if options["api_load"]:
+            self.compare_api_load(
+                options["api_load"],
+                max(1, options["concurrency"]),
+                max(1, options["requests"]),
+                options["query"],
+            )
+            return
+
+        targets = options["target"] or self.TARGETS
+        repeat = max(1, options["repeat"])
+        self.factory = RequestFactory(HTTP_HOST=options["host"])
+
+        self.stdout.write("📏 Benchmarking report PDF generation...")
+        self.stdout.write(
+            f"\n{'target':<10} {'run':>4} {'seconds':>9} {'size (KB)':>11} {'peak RSS (MB)':>15}"
+        )
+
+        for target in targets:
+            path = self.get_target_path(target)
+            if path is None:
+                self.stdout.write(
+                    self.style.WARNING(f"{target:<10} skipped: no published content")
+                )
+                continue
+
+            params = {"draft": "1"} if options["draft"] else None
+            results = [self.run_request(path, params) for _ in range(repeat)]
+            for run, result in enumerate(results, start=1):
+                self.stdout.write(
+                    f"{target:<10} {run:>4} {result['elapsed']:>9.2f} "
+                    f"{result['size'] / 1024:>11.1f} {result['peak'] / (1024 * 1024):>15.1f}"
+                )
+
+            mean_elapsed = sum(r["elapsed"] for r in results) / len(results)
+            max_peak = max(r["peak"] for r in results)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{target:<10} mean {mean_elapsed:.2f}s, max peak RSS {max_peak / (1024 * 1024):.1f} MB"
+                )
+            )
+
+        if options["first_page"]:
+            self.compare_first_page(options["bandwidth"])
+
+        self.stdout.write(self.style.SUCCESS("\n✅ Benchmark completed!"))
+
+    def compare_first_page(self, bandwidth_mbps):
+        """Compare bytes and time to first page for regular vs linearized PDFs"""
+        path = reverse("reports:pdf_full")
+        bytes_per_second = bandwidth_mbps * 1000 * 1000 / 8
+
+        self.stdout.write(
+            f"\n⏱  First-page time for the full report at {bandwidth_mbps:g} Mbit/s"
+        )
+
+        # A regular PDF must be downloaded completely before page 1 renders
+        regular = self.run_request(path, {"linearize": "0"})
+        regular_total = regular["elapsed"] + regular["size"] / bytes_per_second
+        self.stdout.write(
+            f"  regular     {regular['size'] / 1024:>10.1f} KB needed, "
+            f"server {regular['elapsed']:.2f}s, first page after {regular_total:.2f}s"
+        )
+
+        # Build the linearized artifact, then fetch only page 1 from it
+        linearized = self.run_request(path, {"linearize": "1"})
+        params = parse_linearization_dict(linearized["head"])
+        if not params or "E" not in params:
+            self.stdout.write(
+                self.style.WARNING(
+                    "  linearized  output is not linearized (install pikepdf or qpdf)"
+                )
+            )
+            return
+
+        first_page_bytes = params["E"]
+        first_page = self.run_request(
+            path,
+            {"linearize": "1"},
+            cached=True,
+            HTTP_RANGE=f"bytes=0-{first_page_bytes - 1}",
+        )
+        linearized_total = first_page["elapsed"] + first_page_bytes / bytes_per_second
+        self.stdout.write(
+            f"  linearized  {first_page_bytes / 1024:>10.1f} KB needed, "
+            f"server {first_page['elapsed']:.2f}s (cached; first build "
+            f"{linearized['elapsed']:.2f}s), first page after {linearized_total:.2f}s"
+        )
+
+    def compare_api_load(self, base_url, concurrency, total, query):
+        """Throughput and latency of the sync and async API endpoints"""
+        self.stdout.write(
+            f"🚦 Load-testing {base_url} with {concurrency} concurrent clients, "
+            f"{total} requests per endpoint"
+        )
+        self.stdout.write(
+            f"\n{'endpoint':<16} {'mode':<6} {'req/s':>9} {'p50 (ms)':>10} "
+            f"{'p95 (ms)':>10} {'errors':>7}"
+        )
+        params = {"search": {"q": query}}
+        for endpoint, sync_name, async_name in self.API_ENDPOINTS:
+            rates = {}
+            for mode, url_name in (("sync", sync_name), ("async", async_name)):
+                url = base_url.rstrip("/") + reverse(f"reports:{url_name}")
+                if endpoint in params:
+                    url += "?" + urlencode(params[endpoint])
+                result = self.run_load(url, concurrency, total)
+                rates[mode] = result["rate"]
+                self.stdout.write(
+                    f"{endpoint:<16} {mode:<6} {result['rate']:>9.1f} "
+                    f"{result['p50'] * 1000:>10.1f} {result['p95'] * 1000:>10.1f} "
+                    f"{result['errors']:>7}"
+                )
+            if rates["sync"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{endpoint:<16} async/sync throughput "
+                        f"{rates['async'] / rates['sync']:.2f}x"
+                    )
+                )
+
+        self.stdout.write(self.style.SUCCESS("\n✅ Load test completed!"))
+
+    def run_load(self, url, concurrency, total):
+        """Fetch url total times from concurrency threads"""
+
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                with urlopen(url, timeout=60) as response:
+                    response.read()
+                ok = True
+            except (URLError, OSError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, ok in results if ok)
+        succeeded = len(latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(succeeded - 1, int(succeeded * fraction))]
+
+        return {
+            "rate": succeeded / elapsed,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "errors": total - succeeded,
+        }
+
+    def get_target_path(self, target):
+        """Resolve the URL for a benchmark target using existing content"""
+        if target == "full":
+            return reverse("reports:pdf_full")
+
+        if target == "category":
+            category = ReportCategory.objects.filter(is_active=True).first()
+            if not category:
+                return None
+            return reverse("reports:pdf_category", kwargs={"slug": category.slug})
+
+        section = (
+            ReportSection.objects.filter(is_published=True)
+            .select_related("category")
+            .first()
+        )
+        if not section:
+            return None
+        return reverse(
+            "reports:pdf_section",
+            kwargs={
+                "category_slug": section.category.slug,
+                "section_slug": section.slug,
+            },
+        )
+
+    def run_request(self, path, params=None, cached=False, **extra):
+        """
+        Run one request and return its timing, size, peak RSS and head bytes
+
+        Cached full report PDFs (and incremental chapters) are removed first
+        so every run measures a build, unless cached is set.
+        """
+        if not cached:
+            pdf_artifacts.clear("full_report")
+        match = resolve(path)
+        request = self.factory.get(path, params or {}, **extra)
+
+        with PeakRSSSampler() as sampler:
+            response = match.func(request, *match.args, **match.kwargs)
+            if response.status_code not in (200, 206):
+                raise CommandError(f"{path} returned HTTP {response.status_code}")
+
+            size = 0
+            head = b""
+            chunks = response.streaming_content if response.streaming else [
+                response.content
+            ]
+            for chunk in chunks:
+                size += len(chunk)
+                if len(head) < LINEARIZATION_HEADER_BYTES:
+                    head += chunk[: LINEARIZATION_HEADER_BYTES - len(head)]
+            response.close()
+
+        return {
+            "elapsed": sampler.elapsed,
+            "size": size,
+            "peak": sampler.peak_delta_bytes,
+            "head": head,
+        }
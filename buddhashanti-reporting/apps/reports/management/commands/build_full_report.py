@@ -0,0 +1,90 @@
+"""
+Management command to rebuild the full report PDF incrementally
+
+Re-renders only the chapters whose data changed since the last build and
+publishes the spliced PDF to the artifact cache the full report view serves.
+Use --full after template or stylesheet changes.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.utils.artifacts import pdf_artifacts
+from apps.reports.utils.incremental import (
+    IncrementalReportBuilder,
+    incremental_builds_available,
+)
+from apps.reports.utils.linearize import linearize_pdf
+from apps.reports.utils.pdf_images import PDF_IMAGE_PROFILES, resolve_image_profile
+from apps.reports.utils.report_data import get_report_base_context
+from apps.reports.utils.tracing import BuildTracer
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full report PDF, re-rendering only changed chapters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            choices=sorted(PDF_IMAGE_PROFILES),
+            help="Image output profile (default: REPORT_PDF_DEFAULT_IMAGE_PROFILE)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Re-render every chapter",
+        )
+        parser.add_argument(
+            "--linearize",
+            action="store_true",
+            help="Also publish the linearized (fast web view) artifact",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost/",
+            help="Base URL that static and media URLs are resolved against",
+        )
+
+    def handle(self, *args, **options):
+        if not incremental_builds_available():
+            raise CommandError("Incremental builds need pikepdf to be installed")
+
+        profile = resolve_image_profile(options["profile"])
+        artifact_key = f"full_report_{profile}"
+        source_path = pdf_artifacts.temp_path(artifact_key)
+        started = time.perf_counter()
+
+        try:
+            with BuildTracer("full_report", artifact_key) as tracer:
+                builder = IncrementalReportBuilder(
+                    get_report_base_context(),
+                    profile,
+                    options["base_url"],
+                    tracer=tracer,
+                    force=options["full"],
+                )
+                rebuilt = builder.build(str(source_path))
+
+                if options["linearize"]:
+                    linearized_path = pdf_artifacts.temp_path(artifact_key)
+                    with tracer.stage("linearize"):
+                        if linearize_pdf(source_path, linearized_path):
+                            pdf_artifacts.store_path(
+                                f"{artifact_key}_web", linearized_path
+                            )
+                    linearized_path.unlink(missing_ok=True)
+
+                path = pdf_artifacts.store_path(artifact_key, source_path)
+        finally:
+            source_path.unlink(missing_ok=True)
+
+        self.stdout.write(
+            f"🔁 Re-rendered: {', '.join(rebuilt) if rebuilt else 'front matter only'}"
+        )
+        self.stdout.write(f"🧭 {tracer.summary()}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {path} ({time.perf_counter() - started:.1f}s)"
+            )
+        )
@@ -0,0 +1,139 @@
+"""
+Management command to export every report dataset for offline analysis
+
+Writes each census table and processor output (see
+apps.reports.utils.export) to its own file in an output directory, with a
+manifest.json listing datasets, columns and row counts. Parquet needs
+pandas and pyarrow; CSV and JSON Lines have no extra dependencies.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.reports.utils.export import EXPORT_WRITERS, get_datasets
+from apps.reports.utils.page_cache import get_content_version
+
+try:
+    import pandas as pd
+    import pyarrow  # noqa: F401  (parquet engine used by pandas)
+except ImportError:
+    pd = None
+
+
+class Command(BaseCommand):
+    help = "Export census tables and processor outputs as Parquet, CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Output directory (default: exports/report_data_<timestamp>)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["parquet", *EXPORT_WRITERS],
+            default="parquet",
+            help="File format of the datasets",
+        )
+        parser.add_argument(
+            "--dataset",
+            action="append",
+            dest="datasets",
+            help="Dataset name or prefix to export (repeatable, default: all)",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"]
+        if file_format == "parquet" and pd is None:
+            raise CommandError(
+                "Parquet export needs pandas and pyarrow: pip install pyarrow"
+            )
+
+        datasets = [
+            dataset
+            for name, dataset in get_datasets().items()
+            if not options["datasets"]
+            or any(name.startswith(prefix) for prefix in options["datasets"])
+        ]
+        if not datasets:
+            raise CommandError("No dataset matches the given names")
+
+        output = Path(
+            options["output"]
+            or f"exports/report_data_{timezone.now():%Y%m%d_%H%M%S}"
+        )
+        output.mkdir(parents=True, exist_ok=True)
+
+        self.stdout.write(f"📦 Exporting {len(datasets)} datasets to {output}...")
+        started = time.perf_counter()
+        manifest = []
+        for dataset in datasets:
+            path = output / f"{dataset.name}.{file_format}"
+            try:
+                if file_format == "parquet":
+                    rows = self.write_parquet(dataset, path)
+                else:
+                    rows = self.write_text(dataset, path, file_format)
+            except Exception as e:
+                self.stderr.write(f"Could not export {dataset.name}: {e}")
+                continue
+            manifest.append(
+                {
+                    "name": dataset.name,
+                    "description": dataset.description,
+                    "file": path.name,
+                    "columns": dataset.columns,
+                    "rows": rows,
+                }
+            )
+            self.stdout.write(f"{rows:>8} rows  {path.name}")
+
+        with open(output / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "generated_at": timezone.now().isoformat(),
+                    "content_version": get_content_version(),
+                    "format": file_format,
+                    "datasets": manifest,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        elapsed = time.perf_counter() - started
+        summary = f"{len(manifest)}/{len(datasets)} datasets exported in {elapsed:.1f}s"
+        if len(manifest) < len(datasets):
+            self.stdout.write(self.style.WARNING(f"⚠️  {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
+
+    def write_text(self, dataset, path, file_format):
+        """Stream a dataset to a CSV or JSON Lines file; returns the row count"""
+        rows = 0
+
+        def counted():
+            nonlocal rows
+            for row in dataset.rows():
+                rows += 1
+                yield row
+
+        counting = type(dataset)(dataset.name, dataset.columns, counted)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in EXPORT_WRITERS[file_format](counting):
+                f.write(chunk)
+        return rows
+
+    def write_parquet(self, dataset, path):
+        """Write a dataset as one Parquet file; returns the row count"""
+        frame = pd.DataFrame.from_records(list(dataset.rows()), columns=dataset.columns)
+        if dataset.name.startswith("processors."):
+            # Processor values mix numbers and text in one column
+            frame["value"] = frame["value"].map(
+                lambda value: None if value is None else str(value)
+            )
+        frame.to_parquet(path, index=False)
+        return len(frame)
@@ -0,0 +1,37 @@
+"""
+Management command to insert spooled download events
+
+Web processes flush their own spools in the background; this picks up
+whatever is left, e.g. after all workers were stopped, and can run from
+cron as a safety net. Batches that could not be inserted are kept as
+.failed files; --retry-failed queues them again.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.utils.download_tracker import (
+    flush_spool,
+    get_spool_dir,
+    retry_failed,
+)
+
+
+class Command(BaseCommand):
+    help = "Insert download events waiting in the tracking spool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Try the batches that failed to insert before again",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            self.stdout.write(f"🔁 {retry_failed()} failed batches queued again")
+        inserted = flush_spool()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {inserted} download events flushed from {get_spool_dir()}"
+            )
+        )
@@ -0,0 +1,189 @@
+"""
+Management command to bulk import census data from spreadsheets
+
+Imports CSV or XLSX files into one ward-wise or municipality-wide census
+model (see apps.reports.utils.census_import), e.g. one spreadsheet per
+ward:
+
+    python manage.py import_census_data social.wardwisetoilettype ward_3.xlsx --ward 3
+
+Every row is validated before anything is written; an invalid row aborts
+the file unless --skip-invalid. --list shows the importable models with
+their columns and keys.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.utils.census_import import (
+    CensusImportError,
+    get_census_model,
+    get_census_models,
+    get_import_fields,
+    get_key_fields,
+    import_census_file,
+)
+
+# Invalid rows listed per file
+MAX_ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = "Bulk import ward-wise or municipality-wide census data from CSV/XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "model",
+            nargs="?",
+            help="Census model, e.g. social.wardwisetoilettype or WardWiseToiletType",
+        )
+        parser.add_argument("files", nargs="*", help="CSV or XLSX files to import")
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="List the importable models with their columns and keys",
+        )
+        parser.add_argument(
+            "--ward",
+            type=int,
+            help="Ward number of rows without a ward_number column",
+        )
+        parser.add_argument(
+            "--map",
+            action="append",
+            default=[],
+            metavar="HEADER=FIELD",
+            help="Map a column header onto a field (repeatable)",
+        )
+        parser.add_argument(
+            "--key",
+            help="Comma-separated fields identifying a row (default: unique_together)",
+        )
+        parser.add_argument("--sheet", help="Worksheet of XLSX files (default: first)")
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Import the valid rows of files with invalid rows",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the files without writing anything",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create instead of COPY on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            self.list_models()
+            return
+        if not options["model"] or not options["files"]:
+            raise CommandError("Give a census model and at least one file, or --list")
+
+        try:
+            model = get_census_model(options["model"])
+        except CensusImportError as e:
+            raise CommandError(str(e))
+
+        mapping = {}
+        for item in options["map"]:
+            header, sep, field = item.partition("=")
+            if not sep:
+                raise CommandError(f"--map expects HEADER=FIELD, got {item}")
+            mapping[header] = field.strip()
+        key = options["key"].split(",") if options["key"] else None
+        defaults = {"ward_number": options["ward"]} if options["ward"] else None
+
+        self.stdout.write(
+            f"📥 Importing {len(options['files'])} files into "
+            f"{model._meta.app_label}.{model.__name__} "
+            f"(key: {', '.join(key or get_key_fields(model))})"
+        )
+        failed = 0
+        total_rows = 0
+        total_seconds = 0.0
+        for path in options["files"]:
+            try:
+                result = import_census_file(
+                    model,
+                    path,
+                    mapping=mapping,
+                    defaults=defaults,
+                    key=key,
+                    sheet=options["sheet"],
+                    skip_invalid=options["skip_invalid"],
+                    dry_run=options["dry_run"],
+                    use_copy=False if options["no_copy"] else None,
+                )
+            except (CensusImportError, OSError) as e:
+                self.stderr.write(f"Could not import {path}: {e}")
+                failed += 1
+                continue
+
+            if not self.report(path, result, options):
+                failed += 1
+            total_rows += result["written"]
+            total_seconds += result["validate_seconds"] + result["write_seconds"]
+
+        summary = f"{total_rows} rows imported"
+        if options["dry_run"]:
+            summary = "Dry run, nothing written"
+        elif total_seconds:
+            summary += f" in {total_seconds:.2f}s ({total_rows / total_seconds:,.0f} rows/s)"
+        if failed:
+            raise CommandError(f"{failed} of {len(options['files'])} files failed; {summary}")
+        self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
+
+    def report(self, path, result, options):
+        """Print the outcome of one file; returns False if it was not imported"""
+        if result["unknown_columns"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"   {path}: ignoring unknown columns "
+                    + ", ".join(result["unknown_columns"])
+                )
+            )
+        for number, message in result["errors"][:MAX_ERRORS_SHOWN]:
+            self.stdout.write(f"   {path}:{number}: {message}")
+        if len(result["errors"]) > MAX_ERRORS_SHOWN:
+            self.stdout.write(
+                f"   ... {len(result['errors']) - MAX_ERRORS_SHOWN} more invalid rows"
+            )
+
+        valid = result["objects"]
+        details = f"{valid} valid rows"
+        if result["errors"]:
+            details += f", {len(result['errors'])} invalid"
+        if result["duplicates"]:
+            details += f", {result['duplicates']} duplicate keys (last row kept)"
+
+        if result["errors"] and not options["skip_invalid"] and not options["dry_run"]:
+            self.stdout.write(
+                self.style.ERROR(f"❌ {path}: {details}; nothing written")
+            )
+            return False
+        if options["dry_run"] or not result["written"]:
+            self.stdout.write(
+                f"🔍 {path}: {details} validated in {result['validate_seconds']:.2f}s"
+            )
+            return True
+
+        rate = result["written"] / (result["write_seconds"] or 1e-9)
+        self.stdout.write(
+            f"{result['written']:>8} rows  {path}: {details}; validated in "
+            f"{result['validate_seconds']:.2f}s, written in "
+            f"{result['write_seconds']:.2f}s ({rate:,.0f} rows/s, {result['method']})"
+        )
+        return True
+
+    def list_models(self):
+        for name, model in get_census_models().items():
+            key = get_key_fields(model)
+            columns = ", ".join(
+                f"{field.name}*" if field.name in key else field.name
+                for field in get_import_fields(model)
+            )
+            self.stdout.write(f"{name:<60} {columns}")
+        self.stdout.write("* key fields")
@@ -0,0 +1,23 @@
+"""
+Management command to rebuild the report section search index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.utils.search_index import get_search_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Re-index every report section for full-text search"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🔎 Rebuilding search index ({get_search_backend()})...")
+        started = time.perf_counter()
+        count = rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Indexed {count} sections in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,59 @@
+"""
+Management command to maintain download statistics
+
+Flushes spooled download events (which updates the daily rollups) and
+prunes raw ReportDownload rows past REPORT_DOWNLOAD_RETENTION_DAYS. Run it
+daily from cron. --rebuild recounts the rollups of the days whose raw rows
+are still kept, e.g. after importing download history.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.reports.utils.download_stats import (
+    get_retention_days,
+    prune_downloads,
+    rebuild_rollup,
+)
+from apps.reports.utils.download_tracker import flush_spool
+
+
+class Command(BaseCommand):
+    help = "Flush tracked downloads, prune old raw rows and optionally rebuild rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=get_retention_days(),
+            help="Days of raw download rows to keep",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recount the daily rollups of the retained days from raw rows",
+        )
+        parser.add_argument(
+            "--no-prune",
+            action="store_true",
+            help="Keep raw rows past the retention period",
+        )
+
+    def handle(self, *args, **options):
+        days = options["retention_days"]
+
+        flushed = flush_spool()
+        self.stdout.write(f"📥 {flushed} spooled download events flushed")
+
+        if options["rebuild"]:
+            start_date = timezone.localdate() - datetime.timedelta(days=days - 1)
+            rows = rebuild_rollup(start_date)
+            self.stdout.write(f"🔄 {rows} daily rollup rows rebuilt from {start_date}")
+
+        if not options["no_prune"]:
+            deleted = prune_downloads(days)
+            self.stdout.write(f"🧹 {deleted} raw downloads past {days} days pruned")
+
+        self.stdout.write(self.style.SUCCESS("✅ Download statistics are up to date"))
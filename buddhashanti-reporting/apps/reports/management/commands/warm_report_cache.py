@@ -0,0 +1,123 @@
+"""
+Management command to warm the public report page cache
+
+Requests every public page (home, table of contents, figure and table
+lists, full report, each active category and published section) in
+parallel so the versioned page cache and the full report artifact are
+filled before visitors arrive. Run it after deploys and data imports.
+"""
+
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from apps.reports.utils.navigation import get_navigation
+
+PUBLIC_PAGES = ["home", "toc", "figures", "tables", "full_report"]
+
+
+class Command(BaseCommand):
+    help = "Pre-render every public report page into the page cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Pages rendered in parallel",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header of the public site (cache keys include it)",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Fetch pages over HTTP from a running server instead of in-process",
+        )
+        parser.add_argument(
+            "--accept-encoding",
+            default="gzip, deflate, br, zstd",
+            help="Accept-Encoding of the warmed variant (pages vary on it)",
+        )
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        self.host = options["host"]
+        self.base_url = (options["base_url"] or "").rstrip("/")
+        self.accept_encoding = options["accept_encoding"]
+
+        self.stdout.write(
+            f"🔥 Warming {len(paths)} pages with {options['workers']} workers..."
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            results = list(executor.map(self.fetch, paths))
+
+        failed = 0
+        for path, status, size, elapsed in results:
+            line = f"{status:>4} {elapsed:>7.2f}s {size / 1024:>9.1f} KB  {path}"
+            if status == 200:
+                self.stdout.write(line)
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(line))
+
+        elapsed = time.perf_counter() - started
+        summary = f"{len(paths) - failed}/{len(paths)} pages warmed in {elapsed:.1f}s"
+        if failed:
+            self.stdout.write(self.style.WARNING(f"⚠️  {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
+
+    def get_paths(self):
+        """URL paths of every public page"""
+        paths = [reverse(f"reports:{name}") for name in PUBLIC_PAGES]
+        for category in get_navigation().categories:
+            paths.append(category.get_absolute_url())
+            paths.extend(
+                section.get_absolute_url() for section in category.sections.all()
+            )
+        return paths
+
+    def fetch(self, path):
+        """(path, status, bytes, seconds) of one page request"""
+        started = time.perf_counter()
+        try:
+            if self.base_url:
+                request = urllib.request.Request(
+                    self.base_url + path,
+                    headers={
+                        "Host": self.host,
+                        "Accept-Encoding": self.accept_encoding,
+                    },
+                )
+                with urllib.request.urlopen(request) as response:
+                    status, size = response.status, len(response.read())
+            else:
+                status, size = self.fetch_in_process(path)
+        except Exception as e:
+            self.stderr.write(f"Could not warm {path}: {e}")
+            status, size = 0, 0
+        finally:
+            if not self.base_url:
+                connection.close()
+        return path, status, size, time.perf_counter() - started
+
+    def fetch_in_process(self, path):
+        client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+        response = client.get(path, HTTP_ACCEPT_ENCODING=self.accept_encoding)
+        try:
+            if response.streaming:
+                # Read to the end: streamed pages are cached once complete
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+        finally:
+            response.close()
+        return response.status_code, size
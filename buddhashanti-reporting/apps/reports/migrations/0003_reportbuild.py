@@ -0,0 +1,88 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:00
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportBuild",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "build_type",
+                    models.CharField(
+                        choices=[
+                            ("full_report", "Full Report PDF"),
+                            ("full_report_html", "Full Report (Web)"),
+                            ("category", "Category PDF"),
+                            ("section", "Section PDF"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("target", models.CharField(blank=True, max_length=300)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("success", "Success"), ("failed", "Failed")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "app_version",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Deployed Version"
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "duration",
+                    models.FloatField(default=0, verbose_name="Duration (s)"),
+                ),
+                ("query_count", models.PositiveIntegerField(default=0)),
+                (
+                    "query_time",
+                    models.FloatField(default=0, verbose_name="Query Time (s)"),
+                ),
+                (
+                    "peak_memory",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Peak Memory Growth (bytes)"
+                    ),
+                ),
+                ("stages", models.JSONField(blank=True, default=list)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Report Build",
+                "verbose_name_plural": "Report Builds",
+                "ordering": ["-started_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["build_type", "-started_at"],
+                        name="reports_build_type_idx",
+                    )
+                ],
+            },
+        ),
+    ]
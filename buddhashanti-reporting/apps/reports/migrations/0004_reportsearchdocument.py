@@ -0,0 +1,73 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:00
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_structures(apps, schema_editor):
+    """GIN index on PostgreSQL, FTS5 mirror table on SQLite"""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX reports_search_vector_gin"
+            " ON reports_reportsearchdocument USING GIN (search_vector)"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE reports_search_fts USING fts5("
+                "section_id UNINDEXED, title_text, summary_text, body_text, "
+                "tokenize=\"unicode61 categories 'L* N* Co M*'\")"
+            )
+        except Exception as e:
+            # SQLite built without FTS5: search falls back to token matching
+            print(f"FTS5 not available, search index disabled: {e}")
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS reports_search_vector_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS reports_search_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0003_reportbuild"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportSearchDocument",
+            fields=[
+                (
+                    "section",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="reports.reportsection",
+                    ),
+                ),
+                ("title_text", models.TextField(blank=True)),
+                ("summary_text", models.TextField(blank=True)),
+                ("body_text", models.TextField(blank=True)),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Report Search Document",
+                "verbose_name_plural": "Report Search Documents",
+            },
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
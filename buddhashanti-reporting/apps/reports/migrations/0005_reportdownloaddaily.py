@@ -0,0 +1,95 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    """Roll up the downloads tracked so far"""
+    ReportDownload = apps.get_model("reports", "ReportDownload")
+    ReportDownloadDaily = apps.get_model("reports", "ReportDownloadDaily")
+    rows = (
+        ReportDownload.objects.annotate(date=TruncDate("downloaded_at"))
+        .values("date", "download_type", "section_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    ReportDownloadDaily.objects.bulk_create(
+        [ReportDownloadDaily(**row) for row in rows], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0004_reportsearchdocument"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reportdownload",
+            name="downloaded_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.CreateModel(
+            name="ReportDownloadDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "download_type",
+                    models.CharField(
+                        choices=[
+                            ("pdf", "PDF"),
+                            ("full_report", "Full Report"),
+                            ("section", "Section"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "section",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_downloads",
+                        to="reports.reportsection",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Report Downloads",
+                "verbose_name_plural": "Daily Report Downloads",
+                "ordering": ["-date", "download_type"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("section__isnull", False)),
+                        fields=("date", "download_type", "section"),
+                        name="reports_download_daily_section_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("section__isnull", True)),
+                        fields=("date", "download_type"),
+                        name="reports_download_daily_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:00
+
+from django.db import migrations
+
+
+def recreate_fts_table(apps, schema_editor):
+    """
+    Rebuild the FTS5 table with a tokenizer that keeps Devanagari vowel
+    signs and viramas inside words, and refill it from the documents
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    if "reports_search_fts" not in connection.introspection.table_names():
+        return  # SQLite built without FTS5
+    schema_editor.execute("DROP TABLE reports_search_fts")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE reports_search_fts USING fts5("
+        "section_id UNINDEXED, title_text, summary_text, body_text, "
+        "tokenize=\"unicode61 categories 'L* N* Co M*'\")"
+    )
+    schema_editor.execute(
+        "INSERT INTO reports_search_fts"
+        " (section_id, title_text, summary_text, body_text)"
+        " SELECT section_id, title_text, summary_text, body_text"
+        " FROM reports_reportsearchdocument"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0005_reportdownloaddaily"),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_fts_table, migrations.RunPython.noop),
+    ]
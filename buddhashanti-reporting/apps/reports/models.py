@@ -2,6 +2,7 @@ from django.db import models
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 from ckeditor.fields import RichTextField
 from PIL import Image
@@ -256,21 +257,20 @@ class ReportDownload(models.Model):
     Track report downloads for analytics
     """
 
+    DOWNLOAD_TYPES = [
+        ("pdf", "PDF"),
+        ("full_report", "Full Report"),
+        ("section", "Section"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     section = models.ForeignKey(
         ReportSection, on_delete=models.CASCADE, null=True, blank=True
     )
-    download_type = models.CharField(
-        max_length=20,
-        choices=[
-            ("pdf", "PDF"),
-            ("full_report", "Full Report"),
-            ("section", "Section"),
-        ],
-    )
+    download_type = models.CharField(max_length=20, choices=DOWNLOAD_TYPES)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
-    downloaded_at = models.DateTimeField(default=timezone.now)
+    downloaded_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         verbose_name = "Report Download"
@@ -278,3 +278,124 @@ class ReportDownload(models.Model):
 
     def __str__(self):
         return f"{self.download_type} - {self.downloaded_at}"
+
+
+class ReportDownloadDaily(models.Model):
+    """
+    Downloads per day, download type and section
+
+    Updated as tracked downloads are flushed (see utils/download_stats.py),
+    so statistics stay cheap after raw ReportDownload rows are pruned.
+    """
+
+    date = models.DateField()
+    download_type = models.CharField(
+        max_length=20, choices=ReportDownload.DOWNLOAD_TYPES
+    )
+    section = models.ForeignKey(
+        ReportSection,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="daily_downloads",
+    )
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date", "download_type"]
+        verbose_name = "Daily Report Downloads"
+        verbose_name_plural = "Daily Report Downloads"
+        constraints = [
+            # NULL sections are distinct in plain unique constraints
+            models.UniqueConstraint(
+                fields=["date", "download_type", "section"],
+                condition=models.Q(section__isnull=False),
+                name="reports_download_daily_section_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "download_type"],
+                condition=models.Q(section__isnull=True),
+                name="reports_download_daily_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.download_type}: {self.count}"
+
+
+class ReportBuild(models.Model):
+    """
+    Timing, query and memory trace of one report build
+    """
+
+    BUILD_TYPES = [
+        ("full_report", "Full Report PDF"),
+        ("full_report_html", "Full Report (Web)"),
+        ("category", "Category PDF"),
+        ("section", "Section PDF"),
+    ]
+
+    STATUS_CHOICES = [
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    build_type = models.CharField(max_length=30, choices=BUILD_TYPES)
+    target = models.CharField(max_length=300, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    app_version = models.CharField(
+        max_length=100, blank=True, verbose_name="Deployed Version"
+    )
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(default=0, verbose_name="Duration (s)")
+    query_count = models.PositiveIntegerField(default=0)
+    query_time = models.FloatField(default=0, verbose_name="Query Time (s)")
+    peak_memory = models.BigIntegerField(
+        default=0, verbose_name="Peak Memory Growth (bytes)"
+    )
+    stages = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        verbose_name = "Report Build"
+        verbose_name_plural = "Report Builds"
+        indexes = [
+            models.Index(
+                fields=["build_type", "-started_at"], name="reports_build_type_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.build_type} - {self.started_at} ({self.duration:.1f}s)"
+
+
+class ReportSearchDocument(models.Model):
+    """
+    Normalized plain text of a ReportSection for full-text search
+
+    search_vector is maintained on PostgreSQL only (GIN indexed); SQLite
+    mirrors these rows into an FTS5 table. See utils/search_index.py.
+    """
+
+    section = models.OneToOneField(
+        ReportSection,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    title_text = models.TextField(blank=True)
+    summary_text = models.TextField(blank=True)
+    body_text = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Report Search Document"
+        verbose_name_plural = "Report Search Documents"
+
+    def __str__(self):
+        return f"Search document: {self.section}"
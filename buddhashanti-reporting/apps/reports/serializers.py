@@ -4,9 +4,46 @@ from .models import (
     ReportTable, PublicationSettings
 )
 from .utils.nepali_numbers import to_nepali_digits
+from .utils.sparse import get_fieldset, subtree
 
 
-class ReportFigureSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    ?fields= and ?expand= support for a (possibly nested) serializer
+
+    Meta.expandable_fields maps to-many relations that are only included
+    when expanded to their serializers; expanded relations count as
+    requested fields.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        path = self.get_field_path()
+        requested, expand = get_fieldset(self.context.get('request'))
+        expand = subtree(expand, path) or {}
+        for name, serializer_class in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand:
+                fields[name] = serializer_class(many=True, read_only=True)
+        requested = subtree(requested, path)
+        if requested is not None:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in requested or name in expand
+            }
+        return fields
+    
+    def get_field_path(self):
+        """Names of the fields leading to this serializer from the root"""
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return path[::-1]
+
+
+class ReportFigureSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     figure_number_nepali = serializers.SerializerMethodField()
     
     class Meta:
@@ -16,12 +53,13 @@ class ReportFigureSerializer(serializers.ModelSerializer):
             'description', 'description_nepali', 'image', 'data_source',
             'chart_data', 'order'
         ]
+        field_dependencies = {'figure_number_nepali': ['figure_number']}
     
     def get_figure_number_nepali(self, obj):
         return to_nepali_digits(str(obj.figure_number)) if obj.figure_number else None
 
 
-class ReportTableSerializer(serializers.ModelSerializer):
+class ReportTableSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     table_number_nepali = serializers.SerializerMethodField()
     
     class Meta:
@@ -30,12 +68,13 @@ class ReportTableSerializer(serializers.ModelSerializer):
             'id', 'title', 'title_nepali', 'table_number', 'table_number_nepali',
             'description', 'description_nepali', 'data', 'data_source', 'order'
         ]
+        field_dependencies = {'table_number_nepali': ['table_number']}
     
     def get_table_number_nepali(self, obj):
         return to_nepali_digits(str(obj.table_number)) if obj.table_number else None
 
 
-class ReportSectionListSerializer(serializers.ModelSerializer):
+class ReportSectionListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_name_nepali = serializers.CharField(source='category.name_nepali', read_only=True)
     absolute_url = serializers.CharField(source='get_absolute_url', read_only=True)
@@ -48,12 +87,20 @@ class ReportSectionListSerializer(serializers.ModelSerializer):
             'summary', 'summary_nepali', 'category_name', 'category_name_nepali',
             'absolute_url', 'is_published', 'is_featured', 'published_at'
         ]
+        expandable_fields = {
+            'figures': ReportFigureSerializer,
+            'tables': ReportTableSerializer,
+        }
+        field_dependencies = {
+            'section_number_nepali': ['section_number'],
+            'absolute_url': ['slug', 'category.slug'],
+        }
     
     def get_section_number_nepali(self, obj):
         return to_nepali_digits(str(obj.section_number)) if obj.section_number else None
 
 
-class ReportSectionDetailSerializer(serializers.ModelSerializer):
+class ReportSectionDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = serializers.StringRelatedField(read_only=True)
     figures = ReportFigureSerializer(many=True, read_only=True)
     tables = ReportTableSerializer(many=True, read_only=True)
@@ -68,6 +115,10 @@ class ReportSectionDetailSerializer(serializers.ModelSerializer):
             'category', 'figures', 'tables', 'absolute_url',
             'is_published', 'is_featured', 'published_at', 'created_at', 'updated_at'
         ]
+        field_dependencies = {
+            'section_number_nepali': ['section_number'],
+            'absolute_url': ['slug', 'category.slug'],
+        }
     
     def get_section_number_nepali(self, obj):
         return to_nepali_digits(str(obj.section_number)) if obj.section_number else None
@@ -86,14 +137,17 @@ class ReportCategoryListSerializer(serializers.ModelSerializer):
         ]
     
     def get_sections_count(self, obj):
-        return obj.sections.filter(is_published=True).count()
+        # Annotated by the category list views; counted per category otherwise
+        count = getattr(obj, 'published_sections_count', None)
+        if count is None:
+            count = obj.sections.filter(is_published=True).count()
+        return count
     
     def get_sections_count_nepali(self, obj):
-        count = obj.sections.filter(is_published=True).count()
-        return to_nepali_digits(str(count))
+        return to_nepali_digits(str(self.get_sections_count(obj)))
 
 
-class ReportCategoryDetailSerializer(serializers.ModelSerializer):
+class ReportCategoryDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sections = ReportSectionListSerializer(many=True, read_only=True)
     absolute_url = serializers.CharField(source='get_absolute_url', read_only=True)
     
@@ -103,6 +157,7 @@ class ReportCategoryDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'name_nepali', 'slug', 'description', 'description_nepali',
             'icon', 'order', 'sections', 'absolute_url', 'is_active', 'created_at', 'updated_at'
         ]
+        field_dependencies = {'absolute_url': ['slug']}
 
 
 class PublicationSettingsSerializer(serializers.ModelSerializer):
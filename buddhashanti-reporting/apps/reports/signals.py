@@ -0,0 +1,106 @@
+"""
+Cache invalidation for the public report pages
+"""
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.demographics.models import DemographicSummary, WardSettlement
+from apps.social.models import WardWiseLiteracyStatus
+
+from .models import (
+    PublicationSettings,
+    ReportCategory,
+    ReportFigure,
+    ReportSection,
+    ReportTable,
+)
+from .utils.navigation import invalidate_navigation
+from .utils.page_cache import CENSUS_APPS, bump_content_version
+from .utils.search_index import index_section, remove_section
+from .utils.statistics import invalidate_report_statistics
+from .utils.suggestions import invalidate_suggestions
+
+
+@receiver(post_save, sender=ReportCategory)
+@receiver(post_delete, sender=ReportCategory)
+@receiver(post_save, sender=ReportSection)
+@receiver(post_delete, sender=ReportSection)
+@receiver(post_save, sender=PublicationSettings)
+@receiver(post_delete, sender=PublicationSettings)
+def navigation_changed(sender, **kwargs):
+    """Rebuild the navigation tree once the change is committed"""
+    transaction.on_commit(invalidate_navigation)
+
+
+@receiver(post_save, sender=ReportCategory)
+@receiver(post_delete, sender=ReportCategory)
+@receiver(post_save, sender=ReportSection)
+@receiver(post_delete, sender=ReportSection)
+@receiver(post_save, sender=ReportFigure)
+@receiver(post_delete, sender=ReportFigure)
+@receiver(post_save, sender=ReportTable)
+@receiver(post_delete, sender=ReportTable)
+@receiver(post_save, sender=DemographicSummary)
+@receiver(post_delete, sender=DemographicSummary)
+@receiver(post_save, sender=WardSettlement)
+@receiver(post_delete, sender=WardSettlement)
+@receiver(post_save, sender=WardWiseLiteracyStatus)
+@receiver(post_delete, sender=WardWiseLiteracyStatus)
+def statistics_changed(sender, **kwargs):
+    """Drop the statistics snapshot once the change is committed"""
+    transaction.on_commit(invalidate_report_statistics)
+
+
+@receiver(post_save, sender=ReportCategory)
+@receiver(post_delete, sender=ReportCategory)
+@receiver(post_save, sender=ReportSection)
+@receiver(post_delete, sender=ReportSection)
+@receiver(post_save, sender=ReportFigure)
+@receiver(post_delete, sender=ReportFigure)
+@receiver(post_save, sender=ReportTable)
+@receiver(post_delete, sender=ReportTable)
+def suggestions_changed(sender, **kwargs):
+    """Rebuild the suggestion index once the change is committed"""
+    transaction.on_commit(invalidate_suggestions)
+
+
+@receiver(post_save, sender=ReportCategory)
+@receiver(post_delete, sender=ReportCategory)
+@receiver(post_save, sender=ReportSection)
+@receiver(post_delete, sender=ReportSection)
+@receiver(post_save, sender=ReportFigure)
+@receiver(post_delete, sender=ReportFigure)
+@receiver(post_save, sender=ReportTable)
+@receiver(post_delete, sender=ReportTable)
+@receiver(post_save, sender=PublicationSettings)
+@receiver(post_delete, sender=PublicationSettings)
+def content_changed(sender, **kwargs):
+    """Retire cached pages once the change is committed"""
+    transaction.on_commit(bump_content_version)
+
+
+# Census data rendered by the processors (full report, home page figures)
+for app_label in CENSUS_APPS:
+    try:
+        census_models = django_apps.get_app_config(app_label).get_models()
+    except LookupError:
+        continue
+    for model in census_models:
+        post_save.connect(content_changed, sender=model)
+        post_delete.connect(content_changed, sender=model)
+
+
+@receiver(post_save, sender=ReportSection)
+def section_saved(sender, instance, raw=False, **kwargs):
+    """Refresh the section's search document"""
+    if not raw:
+        transaction.on_commit(lambda: index_section(instance))
+
+
+@receiver(post_delete, sender=ReportSection)
+def section_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_section(pk))
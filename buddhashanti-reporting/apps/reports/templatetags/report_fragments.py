@@ -0,0 +1,69 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..utils.fragments import content_hash, get_or_render, section_content_hash
+
+register = template.Library()
+
+SECTION_FRAGMENT_TEMPLATES = {
+    "category": "reports/partials/pdf_section_fragment.html",
+    "standalone": "reports/partials/pdf_section_standalone_fragment.html",
+}
+
+
+@register.simple_tag
+def section_fragment(section, variant="category", counter=1, first=True):
+    """
+    Render a ReportSection for the PDF templates, cached by content hash
+
+    Usage: {% section_fragment section counter=forloop.counter first=forloop.first %}
+    """
+    template_name = SECTION_FRAGMENT_TEMPLATES[variant]
+    digest = content_hash(section_content_hash(section), counter, first)
+
+    def render():
+        return render_to_string(
+            template_name, {"section": section, "counter": counter, "first": first}
+        )
+
+    return mark_safe(get_or_render(f"section.{variant}", digest, render))
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        values = [var.resolve(context) for var in self.vary_on]
+        return get_or_render(
+            name, content_hash(*values), lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Cache the enclosed block by a hash of the given values
+
+    Usage:
+        {% fragment "demographics.religion" all_demographics_data.religion %}
+            {% include ... %}
+        {% endfragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a fragment name and the values it varies on"
+        )
+
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+    return FragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
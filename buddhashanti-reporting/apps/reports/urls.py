@@ -47,12 +47,70 @@ urlpatterns = [  # Public documentation site
                     views.SectionDetailAPIView.as_view(),
                     name="api_section_detail",
                 ),
+                path(
+                    "figures/", views.FigureListAPIView.as_view(), name="api_figures"
+                ),
+                path("tables/", views.TableListAPIView.as_view(), name="api_tables"),
                 path("search/", views.ReportSearchAPIView.as_view(), name="api_search"),
+                path(
+                    "suggest/", views.SuggestionAPIView.as_view(), name="api_suggest"
+                ),
+                path(
+                    "data/",
+                    views.ProcessorDataIndexAPIView.as_view(),
+                    name="api_data_index",
+                ),
+                path(
+                    "data/<slug:domain>/",
+                    views.ProcessorDataIndexAPIView.as_view(),
+                    name="api_data_domain",
+                ),
+                path(
+                    "data/<slug:domain>/<slug:category>/",
+                    views.ProcessorDataAPIView.as_view(),
+                    name="api_data",
+                ),
+                path(
+                    "export/",
+                    views.DatasetIndexAPIView.as_view(),
+                    name="api_export_index",
+                ),
+                path(
+                    "export/<str:dataset>.<slug:file_format>",
+                    views.DatasetExportView.as_view(),
+                    name="api_export",
+                ),
                 path(
                     "download-stats/",
                     views.DownloadStatsAPIView.as_view(),
                     name="api_download_stats",
                 ),
+                path(
+                    "pdf-admission/",
+                    views.PDFAdmissionStatsAPIView.as_view(),
+                    name="api_pdf_admission",
+                ),
+                # Async read endpoints for ASGI deployments
+                path(
+                    "async/categories/",
+                    views.AsyncCategoryListAPIView.as_view(),
+                    name="api_async_categories",
+                ),
+                path(
+                    "async/sections/",
+                    views.AsyncSectionListAPIView.as_view(),
+                    name="api_async_sections",
+                ),
+                path(
+                    "async/search/",
+                    views.AsyncReportSearchAPIView.as_view(),
+                    name="api_async_search",
+                ),
+                path(
+                    "async/download-stats/",
+                    views.AsyncDownloadStatsAPIView.as_view(),
+                    name="api_async_download_stats",
+                ),
             ]
         ),
     ),
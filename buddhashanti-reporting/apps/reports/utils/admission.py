@@ -0,0 +1,180 @@
+"""
+Admission control for PDF generation
+
+A PDF build holds hundreds of MB and several CPU-seconds, so only
+REPORT_PDF_MAX_CONCURRENT_BUILDS may run at once across all workers. Slots
+are leases in the shared cache. Requests that find every slot taken join a
+short queue (REPORT_PDF_MAX_QUEUED) and wait up to REPORT_PDF_QUEUE_TIMEOUT
+seconds; when the queue is full, or the wait runs out, they get a 503 with
+Retry-After. Queued, rejected and in-flight counts are kept for monitoring.
+
+Only the render itself holds a slot (see build_slot), so requests served
+from the artifact cache, or waiting on another worker's build, never take
+one.
+"""
+
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .http import service_unavailable_response
+
+SLOT_POLL_INTERVAL = 0.25
+METRIC_NAMES = ("admitted", "queued", "rejected", "timed_out")
+
+
+def get_admission_settings():
+    return {
+        "slots": getattr(settings, "REPORT_PDF_MAX_CONCURRENT_BUILDS", 2),
+        "max_queued": getattr(settings, "REPORT_PDF_MAX_QUEUED", 4),
+        "queue_timeout": getattr(settings, "REPORT_PDF_QUEUE_TIMEOUT", 15),
+        "retry_after": getattr(settings, "REPORT_PDF_RETRY_AFTER", 30),
+        # Slots of a worker that died mid-build free themselves after this
+        "slot_timeout": getattr(settings, "REPORT_PDF_SLOT_TIMEOUT", 10 * 60),
+    }
+
+
+class AdmissionController:
+    """Cross-worker semaphore with a bounded wait queue"""
+
+    def __init__(self, name="pdf"):
+        self.prefix = f"report_admission:{name}"
+        self.config = get_admission_settings()
+
+    def slot_key(self, index):
+        return f"{self.prefix}:slot:{index}"
+
+    @property
+    def queue_key(self):
+        return f"{self.prefix}:queued_now"
+
+    def metric_key(self, name):
+        return f"{self.prefix}:metric:{name}"
+
+    # Slots -----------------------------------------------------------------
+
+    def try_acquire(self):
+        """Take a free slot; returns (key, token) or None"""
+        token = uuid.uuid4().hex
+        for index in range(self.config["slots"]):
+            key = self.slot_key(index)
+            if cache.add(key, token, self.config["slot_timeout"]):
+                return key, token
+        return None
+
+    def release(self, slot):
+        key, token = slot
+        if cache.get(key) == token:
+            cache.delete(key)
+
+    # Queue -----------------------------------------------------------------
+
+    def join_queue(self):
+        """Reserve a place in the queue; False when it is full"""
+        cache.add(self.queue_key, 0, self.config["slot_timeout"])
+        try:
+            position = cache.incr(self.queue_key)
+        except ValueError:
+            cache.set(self.queue_key, 1, self.config["slot_timeout"])
+            position = 1
+
+        if position > self.config["max_queued"]:
+            self.leave_queue()
+            return False
+        return True
+
+    def leave_queue(self):
+        try:
+            cache.decr(self.queue_key)
+        except ValueError:
+            pass
+
+    def acquire(self):
+        """
+        Take a slot, queueing for a bounded time if all are busy
+
+        Returns the slot, or None when the request should be rejected.
+        """
+        slot = self.try_acquire()
+        if slot:
+            self.count("admitted")
+            return slot
+
+        if not self.join_queue():
+            self.count("rejected")
+            return None
+
+        self.count("queued")
+        deadline = time.monotonic() + self.config["queue_timeout"]
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(SLOT_POLL_INTERVAL)
+                slot = self.try_acquire()
+                if slot:
+                    self.count("admitted")
+                    return slot
+        finally:
+            self.leave_queue()
+
+        self.count("timed_out")
+        return None
+
+    # Metrics ---------------------------------------------------------------
+
+    def count(self, name):
+        key = self.metric_key(name)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def get_metrics(self):
+        """Current in-flight/queued builds and cumulative counters"""
+        slot_keys = [self.slot_key(i) for i in range(self.config["slots"])]
+        metric_keys = {self.metric_key(name): name for name in METRIC_NAMES}
+        values = cache.get_many(slot_keys + list(metric_keys) + [self.queue_key])
+
+        metrics = {name: values.get(key, 0) for key, name in metric_keys.items()}
+        metrics.update(
+            {
+                "slots": self.config["slots"],
+                "in_flight": sum(1 for key in slot_keys if key in values),
+                "queued_now": max(0, values.get(self.queue_key, 0)),
+                "max_queued": self.config["max_queued"],
+            }
+        )
+        return metrics
+
+
+class AdmissionRejected(Exception):
+    """No PDF build slot became available in time"""
+
+    def __init__(self, retry_after):
+        super().__init__("No PDF build slot available")
+        self.retry_after = retry_after
+
+
+@contextmanager
+def build_slot():
+    """Hold a PDF build slot for the block; raises AdmissionRejected"""
+    controller = AdmissionController()
+    slot = controller.acquire()
+    if slot is None:
+        raise AdmissionRejected(controller.config["retry_after"])
+    try:
+        yield
+    finally:
+        controller.release(slot)
+
+
+def rejected_response(exc):
+    """503 for a request that found no build slot"""
+    return service_unavailable_response(
+        exc.retry_after,
+        "Too many reports are being generated. Please try again shortly.",
+    )
+
@@ -0,0 +1,122 @@
+"""
+On-disk cache for generated report artifacts (PDFs, rendered HTML)
+
+Artifacts are stored under REPORT_PDF_ARTIFACT_DIR by key. An artifact is
+fresh while it is younger than REPORT_PDF_ARTIFACT_TTL seconds or, for
+caches given changed_at, until the content changes; expired artifacts are
+kept on disk so callers can still fall back to them.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from .page_cache import get_content_changed_at
+
+
+def get_artifact_dir():
+    """Directory holding cached artifacts, created on first use"""
+    artifact_dir = Path(
+        getattr(
+            settings,
+            "REPORT_PDF_ARTIFACT_DIR",
+            Path(settings.MEDIA_ROOT) / "report_artifacts",
+        )
+    )
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    return artifact_dir
+
+
+def get_artifact_ttl():
+    """Seconds an artifact is considered fresh"""
+    return getattr(settings, "REPORT_PDF_ARTIFACT_TTL", 60 * 60)
+
+
+class ArtifactCache:
+    """Key-addressed store of generated files"""
+
+    def __init__(self, suffix=".pdf", changed_at=None):
+        self.suffix = suffix
+        # Callable returning the Unix time older artifacts are stale from
+        self.changed_at = changed_at
+
+    def path_for(self, key):
+        """Filesystem path for an artifact key"""
+        safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        return get_artifact_dir() / f"{safe_key}{self.suffix}"
+
+    def get(self, key, max_age=None):
+        """
+        Return the artifact path if it exists and is younger than max_age
+        seconds (defaults to REPORT_PDF_ARTIFACT_TTL, or to no limit when the
+        cache follows content changes; pass 0 for any age)
+        """
+        path = self.path_for(key)
+        try:
+            modified = path.stat().st_mtime
+        except OSError:
+            return None
+
+        if max_age is None and self.changed_at is None:
+            max_age = get_artifact_ttl()
+        if max_age and time.time() - modified > max_age:
+            return None
+        if max_age != 0 and self.changed_at and modified < self.changed_at():
+            return None
+        return path
+
+    def get_stale(self, key):
+        """Return the artifact path regardless of age"""
+        return self.get(key, max_age=0)
+
+    def store_file(self, key, file_obj):
+        """Copy an open file into the cache atomically and return its path"""
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=path.parent, suffix=self.suffix, prefix=".tmp_"
+        )
+        try:
+            with os.fdopen(fd, "wb") as output:
+                file_obj.seek(0)
+                shutil.copyfileobj(file_obj, output)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def store_path(self, key, source_path):
+        """Move a finished file into the cache atomically and return its path"""
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        return path
+
+    def temp_path(self, key):
+        """A temporary path next to the artifact, for tools writing files"""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=get_artifact_dir(), suffix=self.suffix, prefix=".tmp_"
+        )
+        os.close(fd)
+        return Path(tmp_path)
+
+    def delete(self, key):
+        """Remove an artifact if present"""
+        try:
+            self.path_for(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self, prefix=""):
+        """Remove every artifact whose key starts with prefix"""
+        for path in get_artifact_dir().glob(f"{prefix}*{self.suffix}"):
+            path.unlink(missing_ok=True)
+
+
+# Generated files go stale with the content version of the page cache
+pdf_artifacts = ArtifactCache(".pdf", changed_at=get_content_changed_at)
+html_artifacts = ArtifactCache(".html", changed_at=get_content_changed_at)
@@ -0,0 +1,442 @@
+"""
+Bulk import of census tables from spreadsheets
+
+Maps the columns of a CSV or XLSX file onto any ward-wise or
+municipality-wide census model (the tables of the data export, whose CSV
+files import back unchanged). Headers match a field by name or by its
+verbose name; choice columns accept the stored value or its label, and
+every cell is validated by its model field. Rows are then written in one
+transaction:
+
+- models with unique_together are upserted on those keys, with
+  bulk_create(update_conflicts=True), or on PostgreSQL by COPY into a
+  temporary table and one INSERT ... ON CONFLICT DO UPDATE;
+- models without a unique constraint have the rows with the same natural
+  key (see get_key_fields) replaced, with COPY on PostgreSQL.
+
+Bulk writes skip the model signals, so the import retires cached pages and
+report statistics itself. `manage.py import_census_data` is the entry point.
+"""
+
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models import Q
+
+from .export import is_exported_model
+from .nepali_numbers import to_english_digits
+from .page_cache import CENSUS_APPS, bump_content_version
+from .statistics import invalidate_report_statistics
+
+try:
+    import openpyxl
+except ImportError:  # XLSX files need openpyxl; CSV works without it
+    openpyxl = None
+
+IMPORT_FORMATS = (".csv", ".xlsx")
+
+# Objects per INSERT statement outside PostgreSQL
+BATCH_SIZE = 1000
+
+# Marker of NULL values in COPY data
+COPY_NULL = "\\N"
+
+NUMERIC_FIELDS = (models.IntegerField, models.FloatField, models.DecimalField)
+
+
+class CensusImportError(Exception):
+    """File or model that cannot be imported at all"""
+
+
+def get_census_models():
+    """Importable census models by export dataset name (app.modelname)"""
+    census_models = {}
+    for app_label in CENSUS_APPS:
+        try:
+            app_config = django_apps.get_app_config(app_label)
+        except LookupError:
+            continue
+        for model in app_config.get_models():
+            if is_exported_model(model):
+                census_models[f"{app_label}.{model._meta.model_name}"] = model
+    return census_models
+
+
+def get_census_model(name):
+    """Census model by dataset name, app.ModelName or a unique model name"""
+    census_models = get_census_models()
+    name = name.lower()
+    if name in census_models:
+        return census_models[name]
+    matches = [
+        model
+        for dataset, model in census_models.items()
+        if dataset.split(".")[1] == name
+    ]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise CensusImportError(
+            f"{name} is ambiguous, use one of: "
+            + ", ".join(f"{m._meta.app_label}.{m._meta.model_name}" for m in matches)
+        )
+    raise CensusImportError(f"Unknown census model: {name}")
+
+
+def get_import_fields(model):
+    """Fields read from a file: all but the primary key and timestamps"""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+        and not getattr(field, "auto_now", False)
+        and not getattr(field, "auto_now_add", False)
+    ]
+
+
+def get_key_fields(model):
+    """
+    Names of the fields identifying a row
+
+    unique_together where declared; otherwise the ward number and every
+    non-numeric field (e.g. the language of a municipality-wide row).
+    """
+    if model._meta.unique_together:
+        return list(model._meta.unique_together[0])
+    return [
+        field.name
+        for field in get_import_fields(model)
+        if field.name == "ward_number" or not isinstance(field, NUMERIC_FIELDS)
+    ]
+
+
+def has_unique_key(model, key):
+    return tuple(key) in {tuple(fields) for fields in model._meta.unique_together}
+
+
+def normalize(value):
+    return str(value).strip().casefold()
+
+
+def map_columns(model, headers, mapping=None):
+    """
+    (field by column index, unknown headers) of a header row
+
+    mapping overrides the match for some headers ({header: field name});
+    export-only columns (id, timestamps, *_label) are ignored silently.
+    """
+    mapping = {normalize(header): name for header, name in (mapping or {}).items()}
+    fields = get_import_fields(model)
+    lookup = {}
+    for field in fields:
+        for alias in (field.name, field.attname, field.verbose_name):
+            lookup.setdefault(normalize(alias), field)
+    by_name = {field.name: field for field in fields}
+    ignored = {normalize(field.attname) for field in model._meta.concrete_fields}
+
+    columns = {}
+    unknown = []
+    for index, header in enumerate(headers):
+        if header is None or not str(header).strip():
+            continue
+        key = normalize(header)
+        if key in mapping:
+            if mapping[key] not in by_name:
+                raise CensusImportError(
+                    f"{model.__name__} has no field {mapping[key]}"
+                )
+            columns[index] = by_name[mapping[key]]
+        elif key in lookup:
+            columns[index] = lookup[key]
+        elif key not in ignored and not key.endswith("_label"):
+            unknown.append(str(header))
+    return columns, unknown
+
+
+def read_rows(path, sheet=None):
+    """(headers, iterator of (row number, values)) of a CSV or XLSX file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        f = open(path, encoding="utf-8-sig", newline="")
+        reader = csv.reader(f)
+        headers = next(reader, [])
+
+        def csv_rows():
+            with f:
+                for number, row in enumerate(reader, start=2):
+                    yield number, row
+
+        return headers, csv_rows()
+
+    if suffix == ".xlsx":
+        if openpyxl is None:
+            raise CensusImportError("XLSX import needs openpyxl: pip install openpyxl")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        except KeyError:
+            raise CensusImportError(f"{path.name} has no sheet {sheet}")
+        rows = worksheet.iter_rows(values_only=True)
+        headers = list(next(rows, []))
+
+        def xlsx_rows():
+            try:
+                for number, row in enumerate(rows, start=2):
+                    yield number, list(row)
+            finally:
+                workbook.close()
+
+        return headers, xlsx_rows()
+
+    raise CensusImportError(
+        f"Unsupported file type {suffix or path.name}, use one of "
+        + ", ".join(IMPORT_FORMATS)
+    )
+
+
+def get_choice_lookup(field):
+    """Stored value of a choice by its normalized value or label"""
+    lookup = {}
+    for value, label in field.flatchoices:
+        lookup.setdefault(normalize(label), value)
+    for value, label in field.flatchoices:
+        lookup[normalize(value)] = value
+    return lookup
+
+
+def clean_value(field, raw, choices=None):
+    """Python value of a cell for a field; raises ValidationError"""
+    if isinstance(raw, str):
+        raw = raw.strip()
+    if raw is None or raw == "":
+        if field.has_default():
+            return field.get_default()
+        raw = None
+    elif choices is not None:
+        raw = choices.get(normalize(raw), raw)
+    elif isinstance(field, NUMERIC_FIELDS) and isinstance(raw, str):
+        raw = to_english_digits(raw).replace(",", "")
+        if isinstance(field, models.IntegerField) and raw.endswith(".0"):
+            raw = raw[:-2]
+    elif isinstance(field, models.IntegerField) and isinstance(raw, float):
+        # Spreadsheets store whole numbers as floats
+        raw = int(raw) if raw.is_integer() else raw
+    return field.clean(raw, None)
+
+
+def clean_rows(model, columns, rows, defaults=None, key=None):
+    """
+    (objects, errors, duplicates) of the rows of a file
+
+    defaults fill fields that have no column (e.g. the ward of a per-ward
+    spreadsheet). Of rows sharing a key the last one wins; errors are
+    (row number, message) pairs.
+    """
+    defaults = defaults or {}
+    key = key or get_key_fields(model)
+    choices = {
+        field.name: get_choice_lookup(field)
+        for field in columns.values()
+        if field.choices
+    }
+    mapped = {field.name for field in columns.values()}
+    missing = [
+        field.name
+        for field in get_import_fields(model)
+        if field.name not in mapped
+        and field.name not in defaults
+        and not field.has_default()
+        and not field.null
+    ]
+    if missing:
+        raise CensusImportError(f"Missing columns for: {', '.join(missing)}")
+
+    objects = {}
+    errors = []
+    duplicates = 0
+    for number, row in rows:
+        if not any(value not in (None, "") for value in row):
+            continue  # blank line
+        values = dict(defaults)
+        row_errors = []
+        for index, field in columns.items():
+            raw = row[index] if index < len(row) else None
+            try:
+                values[field.name] = clean_value(field, raw, choices.get(field.name))
+            except ValidationError as e:
+                row_errors.append(f"{field.name}: {'; '.join(e.messages)}")
+        if row_errors:
+            errors.append((number, ", ".join(row_errors)))
+            continue
+        identity = tuple(values.get(name) for name in key)
+        if identity in objects:
+            duplicates += 1
+        objects[identity] = model(**values)
+    return list(objects.values()), errors, duplicates
+
+
+def write_objects(model, objects, key=None, use_copy=None):
+    """
+    Upsert or replace objects in one transaction; returns the method used
+
+    use_copy defaults to whether the database is PostgreSQL.
+    """
+    key = key or get_key_fields(model)
+    if use_copy is None:
+        use_copy = connection.vendor == "postgresql"
+    upsert = has_unique_key(model, key)
+    update_fields = [
+        field.name for field in get_import_fields(model) if field.name not in key
+    ] + [
+        field.name
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    ]
+
+    with transaction.atomic():
+        if not upsert:
+            delete_keys(model, key, objects)
+        if use_copy:
+            copy_objects(model, objects, key if upsert else None, update_fields)
+        elif upsert:
+            model.objects.bulk_create(
+                objects,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=key,
+                update_fields=update_fields,
+            )
+        else:
+            model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        # Signals are skipped by bulk writes
+        transaction.on_commit(bump_content_version)
+        transaction.on_commit(invalidate_report_statistics)
+
+    return "{} via {}".format(
+        "upsert" if upsert else "replace",
+        "COPY" if use_copy else "bulk_create",
+    )
+
+
+def delete_keys(model, key, objects):
+    """Delete the rows sharing a key with any of objects"""
+    identities = {tuple(getattr(obj, name) for name in key) for obj in objects}
+    identities = list(identities)
+    for start in range(0, len(identities), BATCH_SIZE):
+        condition = Q()
+        for identity in identities[start : start + BATCH_SIZE]:
+            condition |= Q(**dict(zip(key, identity)))
+        model.objects.filter(condition).delete()
+
+
+def copy_objects(model, objects, conflict_key=None, update_fields=()):
+    """
+    Load objects with PostgreSQL COPY
+
+    With conflict_key the rows go through a temporary table and are
+    upserted on it; otherwise they are copied straight into the table.
+    """
+    fields = list(model._meta.concrete_fields)
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(field.column) for field in fields)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objects:
+        writer.writerow([copy_value(field, obj) for field in fields])
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        target = table
+        if conflict_key:
+            target = f"{table}_import"
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {qn(target)} "
+                f"(LIKE {qn(table)} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        copy_sql = (
+            f"COPY {qn(target)} ({columns}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        )
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(copy_sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+
+        if conflict_key:
+            key_columns = ", ".join(
+                qn(model._meta.get_field(name).column) for name in conflict_key
+            )
+            updates = ", ".join(
+                f"{qn(column)} = EXCLUDED.{qn(column)}"
+                for column in (
+                    model._meta.get_field(name).column for name in update_fields
+                )
+            )
+            cursor.execute(
+                f"INSERT INTO {qn(table)} ({columns}) "
+                f"SELECT {columns} FROM {qn(target)} "
+                f"ON CONFLICT ({key_columns}) DO UPDATE SET {updates}"
+            )
+
+
+def copy_value(field, obj):
+    """Text of a field of a new object in COPY csv format"""
+    value = field.pre_save(obj, True)  # fills defaults of auto_now fields
+    if value is None:
+        return COPY_NULL
+    if isinstance(field, models.JSONField):
+        return json.dumps(value)
+    value = field.get_db_prep_save(value, connection)
+    return str(value)
+
+
+def import_census_file(
+    model,
+    path,
+    mapping=None,
+    defaults=None,
+    key=None,
+    sheet=None,
+    skip_invalid=False,
+    dry_run=False,
+    use_copy=None,
+):
+    """
+    Validate and write one file; returns a summary dict
+
+    Nothing is written when a row is invalid, unless skip_invalid.
+    """
+    key = key or get_key_fields(model)
+    started = time.perf_counter()
+    headers, rows = read_rows(path, sheet)
+    columns, unknown = map_columns(model, headers, mapping)
+    objects, errors, duplicates = clean_rows(model, columns, rows, defaults, key)
+    validated = time.perf_counter()
+
+    result = {
+        "objects": len(objects),
+        "errors": errors,
+        "duplicates": duplicates,
+        "unknown_columns": unknown,
+        "written": 0,
+        "method": None,
+        "validate_seconds": validated - started,
+        "write_seconds": 0.0,
+    }
+    if dry_run or not objects or (errors and not skip_invalid):
+        return result
+
+    result["method"] = write_objects(model, objects, key, use_copy)
+    result["written"] = len(objects)
+    result["write_seconds"] = time.perf_counter() - validated
+    return result
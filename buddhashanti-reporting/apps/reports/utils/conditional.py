@@ -0,0 +1,223 @@
+"""
+Conditional GET for the public report pages and read-only API
+
+Each view gets an ETag and Last-Modified derived without rendering:
+public pages and lists from the global content version (see page_cache),
+single categories and sections from the updated_at of the object and of
+what it embeds, download statistics from the daily download rollup. A
+request whose If-None-Match / If-Modified-Since still matches gets 304 Not
+Modified before the view runs. Responses are marked no-cache so clients revalidate
+instead of guessing a freshness lifetime. aconditional() does the same for
+async views with validators that are coroutines.
+"""
+
+import datetime
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from ..models import ReportCategory, ReportDownloadDaily, ReportSection
+from .download_stats import day_start, get_window_start
+from .page_cache import (
+    aget_content_version,
+    get_content_changed_at,
+    get_content_version,
+)
+
+
+def conditional(get_validators):
+    """
+    Decorator answering conditional requests from get_validators
+
+    get_validators(request, *args, **kwargs) returns (etag, last_modified);
+    (None, None) when there is nothing to validate, e.g. a missing object.
+    """
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, "_report_validators"):
+            request._report_validators = get_validators(request, *args, **kwargs)
+        return request._report_validators
+
+    def etag(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[1]
+
+    check = condition(etag_func=etag, last_modified_func=last_modified)
+
+    def decorator(view_func):
+        checked_view = check(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = checked_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+                patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional(get_validators):
+    """
+    conditional() for async views
+
+    get_validators is a coroutine function, so computing the validators
+    does not block the event loop either.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            etag, last_modified = await get_validators(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if timestamp and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(timestamp)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+                if response.status_code in (200, 304):
+                    patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def version_validators(version, *timestamps):
+    """ETag from a version string, Last-Modified from the newest timestamp"""
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    if not timestamps:
+        return None, None
+    return version, max(timestamps)
+
+
+# Validators ----------------------------------------------------------------
+
+
+def content_validators(request, *args, **kwargs):
+    """Any page or list: changes with the content version"""
+    return content_version_validators(get_content_version())
+
+
+async def acontent_validators(request, *args, **kwargs):
+    return content_version_validators(await aget_content_version())
+
+
+def content_version_validators(version):
+    if version is None:
+        return None, None
+    changed_at = datetime.datetime.fromtimestamp(
+        get_content_changed_at(version), tz=datetime.timezone.utc
+    )
+    return version, changed_at
+
+
+def category_validators(request, slug, *args, **kwargs):
+    """A category with its sections, figures and tables"""
+    row = (
+        ReportCategory.objects.filter(slug=slug, is_active=True)
+        .order_by()
+        .values("pk")
+        .annotate(
+            category_at=Max("updated_at"),
+            section_at=Max("sections__updated_at"),
+            figure_at=Max("sections__figures__updated_at"),
+            table_at=Max("sections__tables__updated_at"),
+            section_count=Count("sections", distinct=True),
+            figure_count=Count("sections__figures", distinct=True),
+            table_count=Count("sections__tables", distinct=True),
+        )
+        .first()
+    )
+    if row is None:
+        return None, None
+    return version_validators(
+        timestamp_version(row, "category_at", "section_at", "figure_at", "table_at")
+        + f"-{row['section_count']}-{row['figure_count']}-{row['table_count']}",
+        row["category_at"],
+        row["section_at"],
+        row["figure_at"],
+        row["table_at"],
+    )
+
+
+def section_validators(request, id, *args, **kwargs):
+    """A published section with its figures and tables"""
+    row = (
+        ReportSection.objects.filter(pk=id, is_published=True)
+        .order_by()
+        .values("pk")
+        .annotate(
+            category_at=Max("category__updated_at"),
+            section_at=Max("updated_at"),
+            figure_at=Max("figures__updated_at"),
+            table_at=Max("tables__updated_at"),
+            figure_count=Count("figures", distinct=True),
+            table_count=Count("tables", distinct=True),
+        )
+        .first()
+    )
+    if row is None:
+        return None, None
+    return version_validators(
+        timestamp_version(row, "category_at", "section_at", "figure_at", "table_at")
+        + f"-{row['figure_count']}-{row['table_count']}",
+        row["category_at"],
+        row["section_at"],
+        row["figure_at"],
+        row["table_at"],
+    )
+
+
+def download_stats_validators(request, *args, **kwargs):
+    """Download statistics: last rollup update and first day of the window"""
+    window_start = get_window_start()
+    row = ReportDownloadDaily.objects.filter(date__gte=window_start).aggregate(
+        latest=Max("updated_at")
+    )
+    return rollup_validators(row, window_start)
+
+
+async def adownload_stats_validators(request, *args, **kwargs):
+    window_start = get_window_start()
+    row = await ReportDownloadDaily.objects.filter(
+        date__gte=window_start
+    ).aaggregate(latest=Max("updated_at"))
+    return rollup_validators(row, window_start)
+
+
+def rollup_validators(row, window_start):
+    if row["latest"] is None:
+        return None, None
+    # The window moves at local midnight even without new downloads
+    return version_validators(
+        f"{timestamp_version(row, 'latest')}-{window_start:%Y%m%d}",
+        row["latest"],
+        day_start(timezone.localdate()),
+    )
+
+
+def timestamp_version(row, *keys):
+    """Compact version string of some timestamps of a row"""
+    return "-".join(
+        f"{int(row[key].timestamp() * 1e6):x}" if row[key] else "0" for key in keys
+    )
+
+
+conditional_content = conditional(content_validators)
+
@@ -0,0 +1,127 @@
+"""
+Daily download rollups and retention
+
+Every flushed batch of download events is added to ReportDownloadDaily
+(one row per local date, download type and section) in the same
+transaction as the raw rows, so statistics read a few rollup rows instead
+of scanning ReportDownload. Raw rows older than
+REPORT_DOWNLOAD_RETENTION_DAYS are pruned by `manage.py rollup_downloads`,
+which can also rebuild rollups from the raw rows that are still kept.
+"""
+
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from ..models import ReportDownload, ReportDownloadDaily
+
+# Days counted by the download statistics
+STATS_WINDOW_DAYS = 30
+
+
+def get_retention_days():
+    """Days raw download rows are kept for; rollups are kept forever"""
+    return getattr(settings, "REPORT_DOWNLOAD_RETENTION_DAYS", 90)
+
+
+def add_to_rollup(downloads):
+    """Count new ReportDownload objects into the daily rollup"""
+    counts = Counter(
+        (
+            timezone.localdate(download.downloaded_at),
+            download.download_type,
+            download.section_id,
+        )
+        for download in downloads
+    )
+    now = timezone.now()
+    for (date, download_type, section_id), count in counts.items():
+        row = ReportDownloadDaily.objects.filter(
+            date=date, download_type=download_type, section_id=section_id
+        )
+        if row.update(count=F("count") + count, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                ReportDownloadDaily.objects.create(
+                    date=date,
+                    download_type=download_type,
+                    section_id=section_id,
+                    count=count,
+                )
+        except IntegrityError:
+            # Created by a concurrent flush since the update
+            row.update(count=F("count") + count, updated_at=now)
+
+
+def rebuild_rollup(start_date, end_date=None):
+    """
+    Recount the rollup of [start_date, end_date] from raw download rows
+
+    Only meaningful for days whose raw rows have not been pruned.
+    """
+    end_date = end_date or timezone.localdate()
+    with transaction.atomic():
+        ReportDownloadDaily.objects.filter(
+            date__gte=start_date, date__lte=end_date
+        ).delete()
+        rows = (
+            ReportDownload.objects.filter(
+                downloaded_at__gte=day_start(start_date),
+                downloaded_at__lt=day_start(end_date + datetime.timedelta(days=1)),
+            )
+            .annotate(date=TruncDate("downloaded_at"))
+            .values("date", "download_type", "section_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        rollups = ReportDownloadDaily.objects.bulk_create(
+            [ReportDownloadDaily(**row) for row in rows], batch_size=500
+        )
+    return len(rollups)
+
+
+def prune_downloads(days=None):
+    """Delete raw download rows older than the retention period"""
+    days = get_retention_days() if days is None else days
+    cutoff = day_start(timezone.localdate() - datetime.timedelta(days=days))
+    deleted, _ = ReportDownload.objects.filter(downloaded_at__lt=cutoff).delete()
+    return deleted
+
+
+def day_start(date):
+    """Aware datetime of local midnight at the start of date"""
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+
+
+def get_window_start():
+    return timezone.localdate() - datetime.timedelta(days=STATS_WINDOW_DAYS - 1)
+
+
+def get_stats_queryset():
+    return ReportDownloadDaily.objects.filter(date__gte=get_window_start())
+
+
+def get_stats_aggregates():
+    return {
+        "total_downloads": Coalesce(Sum("count"), 0),
+        "pdf_downloads": Coalesce(Sum("count", filter=Q(download_type="pdf")), 0),
+        "full_report_downloads": Coalesce(
+            Sum("count", filter=Q(download_type="full_report")), 0
+        ),
+    }
+
+
+def get_download_stats():
+    """Download counts of the last STATS_WINDOW_DAYS days, today included"""
+    return get_stats_queryset().aggregate(**get_stats_aggregates())
+
+
+async def aget_download_stats():
+    """get_download_stats() for async views"""
+    return await get_stats_queryset().aaggregate(**get_stats_aggregates())
@@ -0,0 +1,278 @@
+"""
+Buffered download tracking
+
+Requests append download events to a per-process spool file instead of
+inserting ReportDownload rows. A background thread in each process
+rotates its spool and inserts the events with one bulk_create every
+REPORT_DOWNLOAD_FLUSH_EVENTS events or REPORT_DOWNLOAD_FLUSH_INTERVAL
+seconds. Spool files outlive the process: each process holds a lock on
+its spool, so leftovers of workers that were restarted or crashed are
+recognised and picked up by the next flush in any process (or
+`manage.py flush_downloads`). Events carry their row id, so a batch that
+is flushed twice after a crash is not counted twice; each batch also
+updates the daily rollup (see download_stats). A batch that cannot be
+inserted for any reason but a database outage is set aside as a .failed
+file, so it does not hold up the batches after it
+(`manage.py flush_downloads --retry-failed` tries it again).
+"""
+
+import atexit
+import datetime
+import ipaddress
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import (
+    InterfaceError,
+    OperationalError,
+    close_old_connections,
+    transaction,
+)
+
+from ..models import ReportDownload, ReportSection
+from .download_stats import add_to_rollup
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; orphaned spools wait for a restart
+    fcntl = None
+
+ACTIVE_SUFFIX = ".spool"
+READY_SUFFIX = ".ready"
+FAILED_SUFFIX = ".failed"
+# Stored for clients without a usable address (ip_address is required)
+UNKNOWN_IP = "0.0.0.0"
+
+
+def get_spool_dir():
+    spool_dir = Path(
+        getattr(
+            settings,
+            "REPORT_DOWNLOAD_SPOOL_DIR",
+            Path(settings.BASE_DIR) / "spool" / "downloads",
+        )
+    )
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    return spool_dir
+
+
+def get_flush_events():
+    return getattr(settings, "REPORT_DOWNLOAD_FLUSH_EVENTS", 100)
+
+
+def get_flush_interval():
+    return getattr(settings, "REPORT_DOWNLOAD_FLUSH_INTERVAL", 5)
+
+
+def open_spool():
+    """New spool file, locked by this process for as long as it is open"""
+    path = get_spool_dir() / f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    spool = open(path.with_suffix(".tmp"), "a", encoding="utf-8")
+    if fcntl is not None:
+        fcntl.flock(spool, fcntl.LOCK_EX)
+    # Only visible to flushers once locked
+    os.replace(path.with_suffix(".tmp"), path.with_suffix(ACTIVE_SUFFIX))
+    return spool, path.with_suffix(ACTIVE_SUFFIX)
+
+
+def clean_ip_address(value):
+    """A valid IP address for the event, UNKNOWN_IP if there is none"""
+    try:
+        return str(ipaddress.ip_address((value or "").strip()))
+    except ValueError:
+        return UNKNOWN_IP
+
+
+def lock_spool(path):
+    """
+    Open a spool file if no other process holds it; None if locked or gone
+
+    Without fcntl the file is opened unlocked.
+    """
+    try:
+        spool = open(path, "a", encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        try:
+            fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            spool.close()
+            return None
+    return spool
+
+
+class DownloadTracker:
+    """Spool writer and flusher of one process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pid = None
+        self.spool = None
+        self.spool_path = None
+        self.pending = 0
+        self.thread = None
+
+    def track(self, section_id, download_type, ip_address, user_agent):
+        """Append one download event to the spool"""
+        event = {
+            "id": str(uuid.uuid4()),
+            "section_id": str(section_id) if section_id else None,
+            "download_type": download_type,
+            "ip_address": clean_ip_address(ip_address),
+            "user_agent": user_agent or "",
+            "downloaded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.ensure_started()
+            self.spool.write(line)
+            self.spool.flush()
+            self.pending += 1
+            if self.pending >= get_flush_events():
+                self.wakeup.set()
+
+    def ensure_started(self):
+        """Open the spool and start the flusher (again after a fork)"""
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.spool, self.spool_path = open_spool()
+        self.pending = 0
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="download-tracker", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(get_flush_interval())
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Download tracking flush failed: {e}")
+            finally:
+                close_old_connections()
+
+    def rotate(self):
+        """Close the active spool as a ready batch; returns False if empty"""
+        with self.lock:
+            if self.pid != os.getpid() or not self.pending:
+                return False
+            os.replace(self.spool_path, self.spool_path.with_suffix(READY_SUFFIX))
+            self.spool.close()
+            self.spool, self.spool_path = open_spool()
+            self.pending = 0
+            return True
+
+    def flush(self):
+        """Insert every ready batch, including those of dead processes"""
+        self.rotate()
+        return flush_spool()
+
+
+def flush_spool():
+    """Insert all ready and orphaned spool files; returns the events flushed"""
+    spool_dir = get_spool_dir()
+
+    # Spools of processes that are gone will never be rotated by their owner
+    if fcntl is not None:
+        for path in spool_dir.glob(f"*{ACTIVE_SUFFIX}"):
+            spool = lock_spool(path)
+            if spool is not None:
+                with spool:
+                    if path.exists():
+                        os.replace(path, path.with_suffix(READY_SUFFIX))
+
+    inserted = 0
+    for path in sorted(spool_dir.glob(f"*{READY_SUFFIX}")):
+        # Held until the batch is deleted so concurrent flushers skip it
+        batch = lock_spool(path)
+        if batch is None:
+            continue
+        with batch:
+            if not path.exists():
+                continue  # inserted by another flusher in the meantime
+            try:
+                inserted += insert_batch(path)
+            except (OperationalError, InterfaceError):
+                raise  # database unavailable: every batch waits for the next flush
+            except Exception as e:
+                print(f"Download batch {path.name} set aside as {FAILED_SUFFIX}: {e}")
+                os.replace(path, path.with_suffix(FAILED_SUFFIX))
+                continue
+            path.unlink()
+    return inserted
+
+
+def retry_failed():
+    """Queue the batches set aside as failed again; returns how many"""
+    failed = list(get_spool_dir().glob(f"*{FAILED_SUFFIX}"))
+    for path in failed:
+        os.replace(path, path.with_suffix(READY_SUFFIX))
+    return len(failed)
+
+
+def insert_batch(path):
+    """bulk_create the events of one spool file"""
+    downloads = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a crashed process
+            event["downloaded_at"] = datetime.datetime.fromisoformat(
+                event["downloaded_at"]
+            )
+            downloads.append(ReportDownload(**event))
+
+    # Sections deleted since the download still count, without the link
+    section_ids = {download.section_id for download in downloads} - {None}
+    existing = set(
+        str(pk)
+        for pk in ReportSection.objects.filter(pk__in=section_ids).values_list(
+            "pk", flat=True
+        )
+    )
+    for download in downloads:
+        if download.section_id is not None and download.section_id not in existing:
+            download.section_id = None
+
+    with transaction.atomic():
+        # A batch replayed after a crash adds nothing twice, rollups included
+        ids = [uuid.UUID(download.id) for download in downloads]
+        inserted = set(
+            ReportDownload.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        downloads = [
+            download
+            for download in downloads
+            if uuid.UUID(download.id) not in inserted
+        ]
+        ReportDownload.objects.bulk_create(downloads, batch_size=500)
+        add_to_rollup(downloads)
+    return len(downloads)
+
+
+tracker = DownloadTracker()
+
+
+def track(section_id, download_type, ip_address, user_agent=""):
+    tracker.track(section_id, download_type, ip_address, user_agent)
+
+
+@atexit.register
+def flush_on_exit():
+    if tracker.pid == os.getpid():
+        try:
+            tracker.flush()
+        except Exception as e:
+            print(f"Download tracking flush on exit failed: {e}")
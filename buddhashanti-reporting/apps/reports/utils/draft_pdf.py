@@ -0,0 +1,449 @@
+"""
+Draft PDF renderer built directly on ReportLab platypus flowables
+
+Skips HTML/CSS layout entirely: processor outputs (narrative, municipality
+and ward tables, chart images) and report sections are turned straight into
+flowables set in the bundled Noto Sans Devanagari font. Used for fast editor
+previews (?draft=1) and as the fallback when WeasyPrint fails.
+"""
+
+import html
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.utils.html import strip_tags
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import (
+    Image,
+    KeepTogether,
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from .nepali_numbers import to_nepali_digits
+from .pdf_images import optimize_image
+
+DEVANAGARI_FONT = "NotoSansDevanagari"
+DEVANAGARI_FONT_FILE = "fonts/NotoSansDevanagari-Regular.ttf"
+
+# Draft previews embed images at screen resolution to keep output small
+DRAFT_IMAGE_PROFILE = "screen"
+
+COUNT_FIELDS = ("population", "households", "total", "count")
+WARD_TOTAL_FIELDS = (
+    "total_population",
+    "total_households",
+    "population",
+    "households",
+    "total",
+)
+
+# Processor output groups in report order: (context key, chapter title)
+PROCESSOR_DOMAINS = [
+    ("all_demographics_data", "जनसांख्यिकीय विवरण"),
+    ("all_economics_data", "आर्थिक अवस्था"),
+    ("all_social_data", "सामाजिक अवस्था"),
+    ("all_infrastructure_data", "पूर्वाधार विकास"),
+]
+
+
+def register_devanagari_font():
+    """Register the bundled Devanagari font once and return its name"""
+    if DEVANAGARI_FONT in pdfmetrics.getRegisteredFontNames():
+        return DEVANAGARI_FONT
+
+    font_path = finders.find(DEVANAGARI_FONT_FILE)
+    if not font_path:
+        font_path = Path(settings.STATIC_ROOT) / DEVANAGARI_FONT_FILE
+    pdfmetrics.registerFont(TTFont(DEVANAGARI_FONT, str(font_path)))
+    return DEVANAGARI_FONT
+
+
+def resolve_static_image(path):
+    """Map a chart path like "images/charts/x.png" to a file on disk"""
+    relative = str(path)
+    if relative.startswith(settings.STATIC_URL):
+        relative = relative[len(settings.STATIC_URL) :]
+    relative = relative.lstrip("/")
+
+    found = finders.find(relative)
+    if found:
+        return Path(found)
+    candidate = Path(settings.STATIC_ROOT) / relative
+    return candidate if candidate.is_file() else None
+
+
+def format_number(value):
+    """Format counts and percentages with Nepali digits"""
+    if isinstance(value, float):
+        return to_nepali_digits(f"{value:.2f}")
+    if isinstance(value, int):
+        return to_nepali_digits(f"{value:,}")
+    return to_nepali_digits(value)
+
+
+class DraftReportRenderer:
+    """Builds a complete report PDF from processor outputs with ReportLab"""
+
+    def __init__(self):
+        font = register_devanagari_font()
+        self.styles = {
+            "title": ParagraphStyle(
+                "DraftTitle",
+                fontName=font,
+                fontSize=22,
+                leading=30,
+                alignment=TA_CENTER,
+                spaceAfter=12,
+            ),
+            "subtitle": ParagraphStyle(
+                "DraftSubtitle",
+                fontName=font,
+                fontSize=14,
+                leading=20,
+                alignment=TA_CENTER,
+                spaceAfter=6,
+            ),
+            "chapter": ParagraphStyle(
+                "DraftChapter",
+                fontName=font,
+                fontSize=18,
+                leading=26,
+                spaceAfter=12,
+                textColor=colors.HexColor("#1f3a5f"),
+            ),
+            "heading": ParagraphStyle(
+                "DraftHeading",
+                fontName=font,
+                fontSize=14,
+                leading=20,
+                spaceBefore=10,
+                spaceAfter=6,
+                textColor=colors.HexColor("#1f3a5f"),
+            ),
+            "body": ParagraphStyle(
+                "DraftBody", fontName=font, fontSize=10, leading=16, spaceAfter=6
+            ),
+            "cell": ParagraphStyle("DraftCell", fontName=font, fontSize=8, leading=11),
+            "caption": ParagraphStyle(
+                "DraftCaption",
+                fontName=font,
+                fontSize=8,
+                leading=11,
+                alignment=TA_CENTER,
+                textColor=colors.grey,
+            ),
+        }
+        self.frame_width = A4[0] - 40 * mm
+
+    # Document --------------------------------------------------------------
+
+    def build(self, target, context):
+        """Write the draft PDF for a report context to a file object or path"""
+        doc = SimpleDocTemplate(
+            target,
+            pagesize=A4,
+            leftMargin=20 * mm,
+            rightMargin=20 * mm,
+            topMargin=18 * mm,
+            bottomMargin=18 * mm,
+            title=str(context.get("municipality_name", "")),
+        )
+        doc.build(
+            self.build_story(context),
+            onFirstPage=self.draw_page_number,
+            onLaterPages=self.draw_page_number,
+        )
+
+    def draw_page_number(self, canvas, doc):
+        canvas.saveState()
+        canvas.setFont(DEVANAGARI_FONT, 8)
+        canvas.drawCentredString(A4[0] / 2, 10 * mm, to_nepali_digits(doc.page))
+        canvas.restoreState()
+
+    def build_story(self, context):
+        """Flowables for a full, category or section report context"""
+        story = self.build_title_page(context)
+
+        for context_key, chapter_title in PROCESSOR_DOMAINS:
+            results = context.get(context_key)
+            if results:
+                story.extend(self.build_domain_story(chapter_title, results))
+
+        if context.get("section"):
+            story.extend(self.build_section_story(context["section"]))
+        elif context.get("category"):
+            story.append(
+                Paragraph(self.escape(self.category_title(context["category"])), self.styles["chapter"])
+            )
+            for section in context.get("sections") or []:
+                story.extend(self.build_section_story(section))
+
+        return story
+
+    def build_title_page(self, context):
+        story = [Spacer(1, 60 * mm)]
+        if context.get("municipality_name"):
+            story.append(
+                Paragraph(self.escape(context["municipality_name"]), self.styles["title"])
+            )
+
+        publication_settings = context.get("publication_settings")
+        report_title = (
+            publication_settings.report_title
+            if publication_settings
+            else "डिजिटल प्रोफाइल प्रतिवेदन"
+        )
+        story.append(Paragraph(self.escape(report_title), self.styles["subtitle"]))
+        story.append(Paragraph("मस्यौदा (Draft)", self.styles["subtitle"]))
+
+        generated_date = context.get("generated_date")
+        if generated_date:
+            story.append(
+                Paragraph(
+                    to_nepali_digits(generated_date.strftime("%Y-%m-%d")),
+                    self.styles["caption"],
+                )
+            )
+        story.append(PageBreak())
+        return story
+
+    # Processor outputs -----------------------------------------------------
+
+    def build_domain_story(self, chapter_title, results):
+        """Chapter made of every processor result in one manager"""
+        story = [Paragraph(self.escape(chapter_title), self.styles["chapter"])]
+        for category, result in results.items():
+            if isinstance(result, dict):
+                story.extend(self.build_processor_story(category, result))
+        story.append(PageBreak())
+        return story
+
+    def build_processor_story(self, category, result):
+        story = []
+
+        title = result.get("section_title") or category.replace("_", " ")
+        number = result.get("section_number")
+        heading = f"{to_nepali_digits(number)} {title}" if number else title
+        story.append(Paragraph(self.escape(heading), self.styles["heading"]))
+
+        narrative = result.get("report_content") or result.get("coherent_analysis")
+        story.extend(self.build_paragraphs(narrative))
+
+        table = self.build_municipality_table(result)
+        if table:
+            story.extend([table, Spacer(1, 6)])
+
+        table = self.build_ward_table(result)
+        if table:
+            story.extend([table, Spacer(1, 6)])
+
+        for image_path in self.collect_chart_images(result):
+            image = self.build_image(image_path)
+            if image:
+                story.append(image)
+
+        return story
+
+    def build_municipality_table(self, result):
+        data = result.get("data") if isinstance(result.get("data"), dict) else {}
+        rows_source = result.get("municipality_data") or data.get("municipality_data")
+        if not rows_source and data:
+            rows_source = data
+        if not isinstance(rows_source, dict):
+            return None
+
+        rows = []
+        has_percentage = False
+        for item in rows_source.values():
+            if not isinstance(item, dict) or "name_nepali" not in item:
+                continue
+            count = next(
+                (item[f] for f in COUNT_FIELDS if isinstance(item.get(f), (int, float))),
+                None,
+            )
+            if count is None:
+                continue
+            percentage = item.get("percentage")
+            has_percentage = has_percentage or isinstance(percentage, (int, float))
+            rows.append((item["name_nepali"], count, percentage))
+
+        if not rows:
+            return None
+
+        header = ["विवरण", "संख्या"] + (["प्रतिशत"] if has_percentage else [])
+        body = []
+        for name, count, percentage in rows:
+            row = [name, format_number(count)]
+            if has_percentage:
+                row.append(
+                    format_number(float(percentage))
+                    if isinstance(percentage, (int, float))
+                    else ""
+                )
+            body.append(row)
+
+        total_row = ["जम्मा", format_number(sum(r[1] for r in rows))]
+        if has_percentage:
+            total_row.append("")
+        return self.build_table([header] + body + [total_row], [0.6, 0.2, 0.2])
+
+    def build_ward_table(self, result):
+        data = result.get("data") if isinstance(result.get("data"), dict) else {}
+        ward_data = result.get("ward_data") or data.get("ward_data")
+        if not isinstance(ward_data, dict):
+            return None
+
+        rows = []
+        for ward, info in ward_data.items():
+            if not isinstance(info, dict):
+                continue
+            total = next(
+                (info[f] for f in WARD_TOTAL_FIELDS if isinstance(info.get(f), (int, float))),
+                None,
+            )
+            if total is None and isinstance(info.get("demographics"), dict):
+                total = sum(
+                    d.get("population", 0)
+                    for d in info["demographics"].values()
+                    if isinstance(d, dict)
+                )
+            if total is None:
+                continue
+            rows.append([f"वडा नं. {to_nepali_digits(ward)}", format_number(total)])
+
+        if not rows:
+            return None
+        return self.build_table([["वडा", "जम्मा"]] + rows, [0.6, 0.4])
+
+    def collect_chart_images(self, result):
+        """PNG chart files referenced by a processor result, in order"""
+        found = []
+
+        def walk(value):
+            if isinstance(value, dict):
+                for item in value.values():
+                    walk(item)
+            elif isinstance(value, str) and value.lower().endswith(".png"):
+                path = resolve_static_image(value)
+                if path and path not in found:
+                    found.append(path)
+
+        walk(result.get("charts"))
+        walk(result.get("pdf_charts"))
+        return found
+
+    # Report sections -------------------------------------------------------
+
+    def build_section_story(self, section):
+        """Flowables for an editor-managed ReportSection with figures and tables"""
+        title = section.title_nepali or section.title
+        heading = f"{to_nepali_digits(section.section_number)} {title}"
+        story = [Paragraph(self.escape(heading), self.styles["heading"])]
+        story.extend(self.build_paragraphs(section.content_nepali or section.content))
+
+        for figure in section.figures.all():
+            if figure.image:
+                image = self.build_image(Path(figure.image.path))
+                if image:
+                    caption = f"चित्र {to_nepali_digits(figure.figure_number)}: {figure.title_nepali or figure.title}"
+                    story.append(
+                        KeepTogether(
+                            [image, Paragraph(self.escape(caption), self.styles["caption"])]
+                        )
+                    )
+
+        for report_table in section.tables.all():
+            caption = f"तालिका {to_nepali_digits(report_table.table_number)}: {report_table.title_nepali or report_table.title}"
+            story.append(Paragraph(self.escape(caption), self.styles["caption"]))
+            rows = self.table_rows_from_json(report_table.data)
+            if rows:
+                story.extend([self.build_table(rows), Spacer(1, 6)])
+
+        return story
+
+    def table_rows_from_json(self, data):
+        """Accept {"headers": [...], "rows": [...]}, a list of lists or a list of dicts"""
+        if isinstance(data, dict):
+            headers = data.get("headers") or data.get("columns") or []
+            rows = data.get("rows") or data.get("data") or []
+            return ([list(headers)] if headers else []) + [list(r) for r in rows]
+        if isinstance(data, list) and data:
+            if all(isinstance(r, dict) for r in data):
+                headers = list(data[0].keys())
+                return [headers] + [[r.get(h, "") for h in headers] for r in data]
+            return [list(r) if isinstance(r, (list, tuple)) else [r] for r in data]
+        return []
+
+    def category_title(self, category):
+        number = to_nepali_digits(category.category_number) if category.category_number else ""
+        return f"{number} {category.name_nepali or category.name}".strip()
+
+    # Flowable helpers ------------------------------------------------------
+
+    def escape(self, text):
+        return html.escape(str(text), quote=False)
+
+    def build_paragraphs(self, content):
+        """Split HTML or plain text into body paragraphs"""
+        if not content:
+            return []
+        text = str(content)
+        text = re.sub(r"(?i)<br\s*/?>|</p>|</li>|</h\d>", "\n", text)
+        text = html.unescape(strip_tags(text))
+        return [
+            Paragraph(self.escape(block.strip()), self.styles["body"])
+            for block in re.split(r"\n\s*\n|\n", text)
+            if block.strip()
+        ]
+
+    def build_table(self, rows, column_fractions=None):
+        columns = max(len(r) for r in rows)
+        if not column_fractions or len(column_fractions) != columns:
+            column_fractions = [1 / columns] * columns
+        widths = [self.frame_width * f for f in column_fractions]
+
+        cells = [
+            [
+                Paragraph(self.escape(format_number(value)), self.styles["cell"])
+                for value in list(row) + [""] * (columns - len(row))
+            ]
+            for row in rows
+        ]
+        table = Table(cells, colWidths=widths, repeatRows=1)
+        table.setStyle(
+            TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e8eef5")),
+                    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ]
+            )
+        )
+        return table
+
+    def build_image(self, path):
+        """Image flowable scaled to the frame width at draft resolution"""
+        try:
+            path = optimize_image(path, DRAFT_IMAGE_PROFILE)
+            width, height = ImageReader(str(path)).getSize()
+        except Exception:
+            return None
+
+        max_width = self.frame_width
+        max_height = 120 * mm
+        scale = min(max_width / width, max_height / height)
+        return Image(str(path), width=width * scale, height=height * scale)
@@ -0,0 +1,181 @@
+"""
+Bulk export of the report datasets
+
+A dataset is either a census table (every ward-wise and municipality-wide
+model of the census apps, one row per record, choice fields with their
+labels) or the output of one processor flattened to key/value rows.
+Rows are read through a server-side cursor (QuerySet.iterator) and
+encoded a chunk at a time, so exports stream in constant memory as CSV
+or JSON Lines; `manage.py export_report_data` writes them to disk,
+optionally as Parquet.
+"""
+
+import csv
+import io
+import json
+
+from django.apps import apps as django_apps
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .page_cache import CENSUS_APPS
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+# Rows encoded per streamed chunk and fetched per database round trip
+ROWS_PER_CHUNK = 500
+ROWS_PER_FETCH = 2000
+
+
+class Dataset:
+    """Named table with fixed columns and a lazy row iterator"""
+
+    def __init__(self, name, columns, get_rows, description=""):
+        self.name = name
+        self.columns = columns
+        self.get_rows = get_rows
+        self.description = description
+
+    def rows(self):
+        return self.get_rows()
+
+
+def is_exported_model(model):
+    """Ward-wise and municipality-wide census tables"""
+    field_names = {field.name for field in model._meta.concrete_fields}
+    return "ward_number" in field_names or model.__name__.startswith(
+        "MunicipalityWide"
+    )
+
+
+def model_dataset(model):
+    """Dataset of every record of a census model"""
+    fields = list(model._meta.concrete_fields)
+    columns = [field.attname for field in fields]
+    labels = [
+        (
+            index,
+            field.attname,
+            {value: str(label) for value, label in field.flatchoices},
+        )
+        for index, field in enumerate(fields)
+        if field.choices
+    ]
+    columns += [f"{attname}_label" for index, attname, choices in labels]
+
+    def get_rows():
+        queryset = (
+            model.objects.order_by(*model._meta.unique_together[0])
+            if model._meta.unique_together
+            else model.objects.order_by("pk")
+        )
+        for row in queryset.values_list(*[field.attname for field in fields]).iterator(
+            chunk_size=ROWS_PER_FETCH
+        ):
+            yield row + tuple(
+                choices.get(row[index], "") for index, attname, choices in labels
+            )
+
+    return Dataset(
+        f"{model._meta.app_label}.{model._meta.model_name}",
+        columns,
+        get_rows,
+        str(model._meta.verbose_name),
+    )
+
+
+def processor_dataset(domain, category):
+    """Dataset of one processor's get_data(), flattened to key/value rows"""
+    from .processor_data import get_processor_data
+
+    def get_rows():
+        entry = get_processor_data(domain, category)
+        yield from flatten(json.loads(entry["identity"])["data"])
+
+    return Dataset(
+        f"processors.{domain}.{category}",
+        ["key", "value"],
+        get_rows,
+        f"{domain} {category} processor output",
+    )
+
+
+def flatten(value, prefix=""):
+    """(dotted path, scalar) pairs of nested dicts and lists"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        yield prefix, value
+        return
+    for key, item in items:
+        yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+
+
+def get_datasets():
+    """Every exportable dataset by name, census tables first"""
+    from .processor_data import get_catalog
+
+    datasets = {}
+    for app_label in CENSUS_APPS:
+        try:
+            app_config = django_apps.get_app_config(app_label)
+        except LookupError:
+            continue
+        for model in app_config.get_models():
+            if is_exported_model(model):
+                dataset = model_dataset(model)
+                datasets[dataset.name] = dataset
+
+    for domain, categories in get_catalog().items():
+        for category in categories:
+            dataset = processor_dataset(domain, category)
+            datasets[dataset.name] = dataset
+    return datasets
+
+
+def get_dataset(name):
+    return get_datasets().get(name)
+
+
+def chunked(rows, size=ROWS_PER_CHUNK):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(dataset, bom=True):
+    """CSV text chunks with a header row; the BOM lets Excel read Nepali text"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write("\ufeff")
+    writer.writerow(dataset.columns)
+    for chunk in chunked(dataset.rows()):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(dataset):
+    """JSON Lines text chunks, one object per row"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    columns = dataset.columns
+    for chunk in chunked(dataset.rows()):
+        yield "".join(
+            encoder.encode(dict(zip(columns, row))) + "\n" for row in chunk
+        )
+
+
+EXPORT_WRITERS = {"csv": iter_csv, "jsonl": iter_jsonl}
@@ -0,0 +1,69 @@
+"""
+Rendered HTML fragment cache for report PDFs
+
+Each report section (an editor-managed ReportSection, or one processor's
+chapter section in the full report) is rendered once and cached under a hash
+of its content. Section, category and full reports assemble their HTML from
+these fragments, so editing one section re-renders only that fragment.
+Keys include APP_VERSION so template changes are picked up on deploy.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_fragment_cache():
+    return caches[getattr(settings, "REPORT_FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def get_fragment_ttl():
+    """Seconds a fragment is kept; content changes produce new keys anyway"""
+    return getattr(settings, "REPORT_FRAGMENT_CACHE_TTL", 7 * 24 * 60 * 60)
+
+
+def content_hash(*values):
+    """Stable hash of template values (dicts, lists, model field values)"""
+    payload = json.dumps(values, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def section_content_hash(section):
+    """Hash of everything a ReportSection fragment renders"""
+    return content_hash(
+        [
+            str(section.pk),
+            section.slug,
+            section.section_number,
+            section.title,
+            section.title_nepali,
+            section.summary,
+            section.summary_nepali,
+            section.content,
+            section.content_nepali,
+        ],
+        [
+            [str(figure.pk), figure.updated_at, figure.image.name if figure.image else ""]
+            for figure in section.figures.all()
+        ],
+        [[str(table.pk), table.updated_at] for table in section.tables.all()],
+    )
+
+
+def fragment_key(name, digest):
+    version = getattr(settings, "APP_VERSION", "")
+    return f"report_fragment:{version}:{name}:{digest}"
+
+
+def get_or_render(name, digest, render):
+    """Return the cached fragment for (name, digest), rendering it on a miss"""
+    cache = get_fragment_cache()
+    key = fragment_key(name, digest)
+
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, get_fragment_ttl())
+    return html
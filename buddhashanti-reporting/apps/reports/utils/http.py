@@ -0,0 +1,108 @@
+"""
+HTTP helpers for serving report files
+"""
+
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range_header(header, file_size):
+    """
+    Parse a single-range "Range: bytes=start-end" header
+
+    Returns (start, end) inclusive, None when the header is absent or not a
+    single byte range (serve the whole file), or False when the range is
+    unsatisfiable.
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if start:
+        start = int(start)
+        end = min(int(end), file_size - 1) if end else file_size - 1
+    else:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        start = max(0, file_size - length)
+        end = file_size - 1
+
+    if start >= file_size or start > end:
+        return False
+    return start, end
+
+
+class FileRangeWrapper:
+    """Iterate over a byte range of a file in chunks"""
+
+    def __init__(self, file_obj, start, length, block_size=64 * 1024):
+        self.file_obj = file_obj
+        self.remaining = length
+        self.block_size = block_size
+        self.file_obj.seek(start)
+
+    def __iter__(self):
+        while self.remaining > 0:
+            chunk = self.file_obj.read(min(self.block_size, self.remaining))
+            if not chunk:
+                break
+            self.remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.file_obj.close()
+
+
+def ranged_file_response(
+    request, path, filename, content_type="application/pdf", as_attachment=False
+):
+    """
+    Serve a file from disk with byte-range support so PDF viewers can fetch
+    the first page of a linearized document before the rest arrives
+    """
+    file_size = os.path.getsize(path)
+    byte_range = parse_range_header(request.META.get("HTTP_RANGE"), file_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{file_size}"
+        return response
+
+    file_obj = open(path, "rb")
+    response = FileResponse(
+        file_obj,
+        as_attachment=as_attachment,
+        filename=filename,
+        content_type=content_type,
+    )
+    response["Accept-Ranges"] = "bytes"
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response.status_code = 206
+        response.streaming_content = FileRangeWrapper(file_obj, start, length)
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+
+    return response
+
+
+def service_unavailable_response(retry_after, message="Report is being generated"):
+    """503 telling the client when to try again"""
+    response = HttpResponse(message, status=503, content_type="text/plain")
+    response["Retry-After"] = str(int(retry_after))
+    return response
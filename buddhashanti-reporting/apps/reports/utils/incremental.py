@@ -0,0 +1,365 @@
+"""
+Incremental builds of the full report PDF
+
+The full report is laid out chapter by chapter: the front matter (cover and
+table of contents) and one PDF per chapter of pdf_full_report.html. Each
+chapter is stored in the artifact cache together with a fingerprint of the
+data it renders (row counts and latest updated_at of its processor app's
+models) and the page it starts on. A rebuild re-renders only the chapters
+whose fingerprint or start page changed, always re-renders the front matter
+with page numbers taken from the chapter anchors, and splices everything
+into one PDF with pikepdf, rebuilding the outline and the table of contents
+links.
+
+Static chapters (introduction, appendices) only change with a deploy, so
+their fingerprint is APP_VERSION; pass force=True after editing templates.
+"""
+
+import json
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from weasyprint import CSS, HTML
+
+try:
+    import pikepdf
+except ImportError:  # optional, incremental builds fall back to full builds
+    pikepdf = None
+
+from .artifacts import get_artifact_dir, pdf_artifacts
+from .fragments import content_hash
+from .nepali_numbers import to_nepali_digits
+from .pdf_images import PDFImageFetcher
+from .report_data import collect_report_data
+from .tracing import NULL_TRACER
+
+FULL_REPORT_TEMPLATE = "reports/pdf_full_report.html"
+FRONT_MATTER = "front"
+
+# Chapters of pdf_full_report.html in page order, with the processor
+# domains (app labels) whose data each chapter renders
+REPORT_CHAPTERS = [
+    ("introduction", ()),
+    ("municipality_introduction", ()),
+    ("demographics", ("demographics",)),
+    ("economics", ("economics",)),
+    ("social", ("social",)),
+    ("infrastructure", ("infrastructure",)),
+    ("appendices", ()),
+]
+
+# WeasyPrint positions are CSS px from the top-left; PDF uses pt from the bottom-left
+PX_TO_PT = 0.75
+
+# Continue page numbering where the previous chapter ended; the footer
+# mirrors the @page rule in static/css/pdf.css
+CHAPTER_CSS = """
+@page :first {
+  counter-reset: page %(start)d;
+  @bottom-right {
+    content: counter(page, nepali-numerals) " | पोखरा महानगरपालिका पार्श्वचित्र, २०८१";
+  }
+}
+"""
+
+# Table of contents page numbers come from the chapter anchors, not target-counter()
+FRONT_MATTER_CSS = """
+.page-ref a[data-page]::after { content: attr(data-page); }
+"""
+
+PAGE_REF_RE = re.compile(r'<a href="#([^"]+)"></a')
+
+# Front matter re-renders until its page count and page references settle
+MAX_LAYOUT_PASSES = 3
+
+
+def incremental_builds_available():
+    return pikepdf is not None
+
+
+def get_data_fingerprint(app_label):
+    """Row count and latest updated_at of every model in an app"""
+    fingerprint = []
+    for model in apps.get_app_config(app_label).get_models():
+        aggregates = {"rows": Count("pk")}
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            aggregates["latest"] = Max("updated_at")
+        fingerprint.append([model._meta.label, model.objects.aggregate(**aggregates)])
+    return fingerprint
+
+
+class IncrementalReportBuilder:
+    """Builds the full report PDF, re-rendering only chapters that changed"""
+
+    def __init__(self, base_context, profile, base_url, tracer=NULL_TRACER, force=False):
+        self.base_context = base_context
+        self.profile = profile
+        self.base_url = base_url
+        self.url_fetcher = PDFImageFetcher(profile, base_url)
+        self.tracer = tracer
+        self.force = force
+        self.key = f"full_report_{profile}"
+        self.rebuilt = []
+        self.fingerprints = {}
+
+    # Manifest --------------------------------------------------------------
+
+    @property
+    def manifest_path(self):
+        return get_artifact_dir() / f"{self.key}_chapters.json"
+
+    def load_manifest(self):
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        tmp_path = pdf_artifacts.temp_path(self.key)
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.manifest_path)
+
+    def chapter_key(self, name):
+        return f"{self.key}_chapter_{name}"
+
+    def chapter_fingerprint(self, name, domains):
+        if name not in self.fingerprints:
+            self.fingerprints[name] = content_hash(
+                getattr(settings, "APP_VERSION", ""),
+                self.profile,
+                name,
+                [get_data_fingerprint(domain) for domain in domains],
+            )
+        return self.fingerprints[name]
+
+    # Rendering -------------------------------------------------------------
+
+    def render(self, html_content, stylesheet):
+        return HTML(
+            string=html_content, base_url=self.base_url, url_fetcher=self.url_fetcher
+        ).render(stylesheets=[CSS(string=stylesheet)])
+
+    def render_chapter(self, name, domains, fingerprint, start):
+        """Lay out one chapter starting at page start and store its PDF"""
+        with self.tracer.stage(f"chapter.{name}"):
+            context = {**self.base_context, "chapter": name}
+            if domains:
+                context.update(collect_report_data(self.tracer, domains))
+            html_content = render_to_string(FULL_REPORT_TEMPLATE, context)
+            document = self.render(html_content, CHAPTER_CSS % {"start": start})
+
+            tmp_path = pdf_artifacts.temp_path(self.chapter_key(name))
+            try:
+                document.write_pdf(str(tmp_path))
+                pdf_artifacts.store_path(self.chapter_key(name), tmp_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+        self.rebuilt.append(name)
+        return {
+            "fingerprint": fingerprint,
+            "start": start,
+            "pages": len(document.pages),
+            "anchors": {
+                anchor: [index, x, y]
+                for index, page in enumerate(document.pages)
+                for anchor, (x, y) in page.anchors.items()
+            },
+            "bookmarks": [
+                [level, label, index, x, y]
+                for index, page in enumerate(document.pages)
+                for level, label, (x, y), state in page.bookmarks
+            ],
+        }
+
+    def render_front(self, page_numbers):
+        """Lay out cover and table of contents with known page numbers"""
+
+        def add_page_number(match):
+            page = page_numbers.get(match.group(1))
+            if page is None:
+                return match.group(0)
+            return (
+                f'<a href="#{match.group(1)}" '
+                f'data-page="{to_nepali_digits(page)}"></a'
+            )
+
+        with self.tracer.stage("front_matter"):
+            context = {**self.base_context, "chapter": FRONT_MATTER}
+            html_content = render_to_string(FULL_REPORT_TEMPLATE, context)
+            html_content = PAGE_REF_RE.sub(add_page_number, html_content)
+            return self.render(html_content, FRONT_MATTER_CSS)
+
+    # Build -----------------------------------------------------------------
+
+    def layout_chapters(self, previous, first_page):
+        """Reuse or re-render each chapter so it starts at the right page"""
+        chapters = {}
+        page = first_page
+        for name, domains in REPORT_CHAPTERS:
+            fingerprint = self.chapter_fingerprint(name, domains)
+            state = previous.get(name)
+            reusable = (
+                state is not None
+                and state["fingerprint"] == fingerprint
+                and state["start"] == page
+                and pdf_artifacts.get_stale(self.chapter_key(name)) is not None
+            )
+            if not reusable:
+                state = self.render_chapter(name, domains, fingerprint, page)
+            chapters[name] = state
+            page += state["pages"]
+        return chapters
+
+    def get_page_numbers(self, chapters):
+        """Printed page number of every anchor in the chapters"""
+        return {
+            anchor: state["start"] + index
+            for state in chapters.values()
+            for anchor, (index, x, y) in state["anchors"].items()
+        }
+
+    def build(self, destination):
+        """
+        Write the full report PDF to destination
+
+        Returns the names of the chapters that were re-rendered.
+        """
+        manifest = self.load_manifest()
+        previous = {} if self.force else manifest.get("chapters", {})
+        page_numbers = manifest.get("page_numbers", {})
+
+        for _ in range(MAX_LAYOUT_PASSES):
+            front = self.render_front(page_numbers)
+            chapters = self.layout_chapters(previous, len(front.pages) + 1)
+            previous = chapters
+            resolved = self.get_page_numbers(chapters)
+            if resolved == page_numbers:
+                break
+            page_numbers = resolved
+
+        with self.tracer.stage("splice"):
+            self.splice(destination, front, chapters)
+
+        self.save_manifest({"chapters": chapters, "page_numbers": page_numbers})
+        return list(dict.fromkeys(self.rebuilt))
+
+    # Splicing --------------------------------------------------------------
+
+    def splice(self, destination, front, chapters):
+        """Concatenate front matter and chapters, then restore navigation"""
+        front_path = pdf_artifacts.temp_path(self.key)
+        sources = []
+        try:
+            front.write_pdf(str(front_path))
+            with pikepdf.new() as merged:
+                for path in [front_path] + [
+                    pdf_artifacts.get_stale(self.chapter_key(name))
+                    for name, domains in REPORT_CHAPTERS
+                ]:
+                    source = pikepdf.open(path)
+                    sources.append(source)
+                    merged.pages.extend(source.pages)
+
+                targets = self.get_link_targets(front, chapters)
+                self.write_named_destinations(merged, targets)
+                self.write_outline(merged, front, chapters)
+                self.write_toc_links(merged, front, targets)
+                merged.save(str(destination))
+        finally:
+            for source in sources:
+                source.close()
+            front_path.unlink(missing_ok=True)
+
+    def get_link_targets(self, front, chapters):
+        """Anchor name -> (page index in the merged PDF, x, y) in CSS px"""
+        targets = {
+            anchor: (index, x, y)
+            for index, page in enumerate(front.pages)
+            for anchor, (x, y) in page.anchors.items()
+        }
+        offset = len(front.pages)
+        for name, domains in REPORT_CHAPTERS:
+            state = chapters[name]
+            for anchor, (index, x, y) in state["anchors"].items():
+                targets[anchor] = (offset + index, x, y)
+            offset += state["pages"]
+        return targets
+
+    def destination(self, merged, page_index, x, y):
+        page = merged.pages[page_index]
+        height = float(page.mediabox[3])
+        return pikepdf.Array(
+            [page.obj, pikepdf.Name.XYZ, x * PX_TO_PT, height - y * PX_TO_PT, 0]
+        )
+
+    def write_named_destinations(self, merged, targets):
+        """Named destinations used by the internal links of every part"""
+        destinations = pikepdf.NameTree.new(merged)
+        for anchor, (index, x, y) in targets.items():
+            destinations[anchor] = self.destination(merged, index, x, y)
+        merged.Root.Names = pikepdf.Dictionary(Dests=destinations.obj)
+
+    def write_outline(self, merged, front, chapters):
+        """Rebuild PDF bookmarks, nested by heading level"""
+        bookmarks = [
+            (level, label, index, x, y)
+            for index, page in enumerate(front.pages)
+            for level, label, (x, y), state in page.bookmarks
+        ]
+        offset = len(front.pages)
+        for name, domains in REPORT_CHAPTERS:
+            state = chapters[name]
+            bookmarks.extend(
+                (level, label, offset + index, x, y)
+                for level, label, index, x, y in state["bookmarks"]
+            )
+            offset += state["pages"]
+
+        with merged.open_outline() as outline:
+            parents = []
+            for level, label, index, x, y in bookmarks:
+                item = pikepdf.OutlineItem(
+                    label, self.destination(merged, index, x, y)
+                )
+                while parents and parents[-1][0] >= level:
+                    parents.pop()
+                (parents[-1][1].children if parents else outline.root).append(item)
+                parents.append((level, item))
+
+    def write_toc_links(self, merged, front, targets):
+        """Link table of contents entries to the chapter pages they reference"""
+        front_anchors = {
+            anchor for page in front.pages for anchor in page.anchors
+        }
+        for index, page in enumerate(front.pages):
+            pdf_page = merged.pages[index]
+            height = float(pdf_page.mediabox[3])
+            annotations = []
+            for link_type, target, (x, y, width, link_height), box in page.links:
+                if link_type != "internal" or target in front_anchors:
+                    continue
+                if target not in targets:
+                    continue
+                annotations.append(
+                    merged.make_indirect(
+                        pikepdf.Dictionary(
+                            Type=pikepdf.Name.Annot,
+                            Subtype=pikepdf.Name.Link,
+                            Rect=[
+                                x * PX_TO_PT,
+                                height - (y + link_height) * PX_TO_PT,
+                                (x + width) * PX_TO_PT,
+                                height - y * PX_TO_PT,
+                            ],
+                            Border=[0, 0, 0],
+                            Dest=self.destination(merged, *targets[target]),
+                        )
+                    )
+                )
+            if annotations:
+                existing = pdf_page.obj.get("/Annots", pikepdf.Array())
+                pdf_page.obj.Annots = pikepdf.Array(list(existing) + annotations)
@@ -0,0 +1,78 @@
+"""
+PDF linearization ("fast web view") helpers
+
+A linearized PDF puts the first page's objects and a hint table at the start
+of the file, so a browser can render page 1 from a byte-range request while
+the rest downloads. pikepdf is used when installed, otherwise the qpdf
+command line tool.
+"""
+
+import re
+import subprocess
+
+try:
+    import pikepdf
+except ImportError:  # pragma: no cover - optional dependency
+    pikepdf = None
+
+LINEARIZATION_HEADER_BYTES = 1024
+
+
+def linearize_pdf(source_path, destination_path):
+    """
+    Write a linearized copy of source_path to destination_path
+
+    Returns True on success and False when no linearization tool is
+    available or the tool failed.
+    """
+    if pikepdf is not None:
+        try:
+            with pikepdf.open(source_path) as pdf:
+                pdf.save(destination_path, linearize=True)
+            return True
+        except Exception as e:
+            print(f"pikepdf linearization failed: {e}")
+
+    try:
+        result = subprocess.run(
+            ["qpdf", "--linearize", str(source_path), str(destination_path)],
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        # qpdf exits with 3 when it succeeded with warnings
+        if result.returncode in (0, 3):
+            return True
+        print(f"qpdf error: {result.stderr}")
+    except subprocess.TimeoutExpired:
+        print("qpdf linearization timed out")
+    except FileNotFoundError:
+        print("qpdf not found. Install qpdf or pikepdf to enable fast web view")
+    return False
+
+
+def read_linearization_dict(path):
+    """
+    Return the linearization parameters of a PDF as a dict of ints
+    (L = file length, E = end of first page, N = page count, ...) or None
+    when the file is not linearized
+    """
+    with open(path, "rb") as pdf_file:
+        return parse_linearization_dict(pdf_file.read(LINEARIZATION_HEADER_BYTES))
+
+
+def parse_linearization_dict(header):
+    """Parse the linearization parameters from the first bytes of a PDF"""
+    match = re.search(rb"<<[^>]*/Linearized[^>]*>>", header)
+    if not match:
+        return None
+
+    params = {}
+    for name, value in re.findall(rb"/([A-Z])\s+(\d+)", match.group(0)):
+        params[name.decode()] = int(value)
+    return params
+
+
+def is_linearized(path):
+    """True when the PDF at path carries a linearization dictionary"""
+    return read_linearization_dict(path) is not None
@@ -0,0 +1,101 @@
+"""
+Cached navigation tree for the public report pages
+
+Every public page renders the sidebar and menus from the active categories,
+their published sections and the publication settings. The tree is built
+once, stored in the shared cache under a version token and kept in process
+memory, so a warm request costs one cache lookup and no queries. Saving or
+deleting a category, section or the publication settings bumps the version
+(see apps.reports.signals).
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from ..models import PublicationSettings, ReportCategory, ReportSection
+
+NAVIGATION_VERSION_KEY = "report_navigation:version"
+
+# (version, tree) of the last tree this process loaded
+_process_tree = None
+
+
+def get_navigation_ttl():
+    """Seconds a built tree stays in the shared cache"""
+    return getattr(settings, "REPORT_NAVIGATION_CACHE_TTL", 24 * 60 * 60)
+
+
+class NavigationTree:
+    """Active categories with their published sections, and publication settings"""
+
+    def __init__(self, categories, publication_settings):
+        # Evaluated queryset: iterating, count() and sections.all() hit no queries
+        self.categories = categories
+        self.publication_settings = publication_settings
+        self.categories_by_slug = {category.slug: category for category in categories}
+
+    def get_category(self, slug):
+        return self.categories_by_slug.get(slug)
+
+    def get_section(self, category_slug, section_slug):
+        category = self.get_category(category_slug)
+        if category is None:
+            return None
+        for section in category.sections.all():
+            if section.slug == section_slug:
+                return section
+        return None
+
+
+def build_navigation():
+    """Query the navigation tree from the database"""
+    categories = (
+        ReportCategory.objects.filter(is_active=True)
+        .prefetch_related(
+            Prefetch(
+                "sections",
+                queryset=ReportSection.objects.filter(is_published=True),
+            )
+        )
+        .order_by("order")
+    )
+    len(categories)  # evaluate so the cached copy carries its results
+    return NavigationTree(categories, PublicationSettings.objects.first())
+
+
+def get_navigation_version():
+    version = cache.get(NAVIGATION_VERSION_KEY)
+    if version is None:
+        cache.add(NAVIGATION_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(NAVIGATION_VERSION_KEY)
+    return version
+
+
+def get_navigation():
+    """Return the current navigation tree, building it on a cold cache"""
+    global _process_tree
+
+    version = get_navigation_version()
+    local = _process_tree
+    if local is not None and local[0] == version:
+        return local[1]
+
+    tree_key = f"report_navigation:tree:{version}"
+    tree = cache.get(tree_key)
+    if tree is None:
+        tree = build_navigation()
+        cache.set(tree_key, tree, get_navigation_ttl())
+
+    _process_tree = (version, tree)
+    return tree
+
+
+def invalidate_navigation():
+    """Make every process rebuild the tree on its next request"""
+    global _process_tree
+
+    _process_tree = None
+    cache.set(NAVIGATION_VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,116 @@
+"""
+Versioned page cache for the public report pages
+
+Rendered responses are cached under keys that include a global content
+version, so an entry stays valid until report content or census data
+changes instead of expiring after a fixed time. Saving or deleting any
+report or census model bumps the version (see apps.reports.signals); the
+old entries are simply never read again and age out of the cache.
+
+The version is the hex nanosecond timestamp of the last change, so it also
+dates the newest content of every page. Warm the cache after deploys and
+imports with `manage.py warm_report_cache`.
+"""
+
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_cache_key, learn_cache_key
+
+CONTENT_VERSION_KEY = "report_content:version"
+
+# Apps whose models feed the processors (and the data exports)
+CENSUS_APPS = ("demographics", "economics", "infrastructure", "social")
+
+
+def get_page_cache_ttl():
+    """Seconds a page stays cached; content changes retire it sooner"""
+    return getattr(settings, "REPORT_PAGE_CACHE_TTL", 7 * 24 * 60 * 60)
+
+
+def new_content_version():
+    return f"{time.time_ns():x}"
+
+
+# Version of this process, for caches that cannot keep one (DummyCache)
+_local_version = new_content_version()
+
+
+def get_content_version():
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, new_content_version(), None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version or _local_version
+
+
+async def aget_content_version():
+    """get_content_version() for async views"""
+    version = await cache.aget(CONTENT_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CONTENT_VERSION_KEY, new_content_version(), None)
+        version = await cache.aget(CONTENT_VERSION_KEY)
+    return version or _local_version
+
+
+def get_content_changed_at(version=None):
+    """Unix time of the last content change (or of a content version)"""
+    return int(version or get_content_version(), 16) / 1e9
+
+
+def bump_content_version():
+    """Retire every cached page"""
+    global _local_version
+
+    _local_version = new_content_version()
+    cache.set(CONTENT_VERSION_KEY, _local_version, None)
+
+
+def is_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and "private" not in response.get("Cache-Control", "")
+    )
+
+
+def versioned_cache_page(view_func):
+    """
+    Cache a view's GET responses until the content version changes
+
+    Keys follow Django's page cache (URL, query string and the response's
+    Vary headers), prefixed with the content version.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view_func(request, *args, **kwargs)
+
+        key_prefix = f"report_page:{get_content_version()}"
+        cache_key = get_cache_key(request, key_prefix, "GET", cache=cache)
+        if cache_key is not None:
+            response = cache.get(cache_key)
+            if response is not None:
+                return response
+
+        response = view_func(request, *args, **kwargs)
+        if request.method == "GET" and is_cacheable(response):
+            timeout = get_page_cache_ttl()
+
+            def store(response):
+                cache_key = learn_cache_key(
+                    request, response, timeout, key_prefix, cache=cache
+                )
+                cache.set(cache_key, response, timeout)
+
+            if hasattr(response, "render") and not response.is_rendered:
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
+
+    return wrapper
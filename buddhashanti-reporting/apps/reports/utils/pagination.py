@@ -0,0 +1,227 @@
+"""
+Keyset (cursor) pagination for the figure, table and section listings
+
+Pages are addressed by an opaque cursor holding the sort key of the row
+they start after (or, going back, before) instead of an OFFSET, so a deep
+page filters on the key and reads one page of rows instead of skipping
+all earlier ones. Keys always end with the primary key to make the order
+total. Totals are counted once per content version and cached.
+"""
+
+import base64
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .page_cache import aget_content_version, get_content_version, get_page_cache_ttl
+
+CURSOR_PARAM = "cursor"
+
+# Sort keys of the listings
+FIGURE_KEYS = ["section__category__order", "figure_number", "pk"]
+TABLE_KEYS = ["section__category__order", "table_number", "pk"]
+SECTION_KEYS = ["category__order", "order", "section_number", "pk"]
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps([int(reverse), values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    """(values, reverse) of a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        reverse, values = json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values, bool(reverse)
+
+
+def get_key_value(obj, key):
+    """Value of a sort key (e.g. section__category__order) of an object"""
+    for attr in key.split("__"):
+        obj = getattr(obj, attr)
+    return str(obj) if isinstance(obj, uuid.UUID) else obj
+
+
+def keyset_filter(keys, values, reverse=False):
+    """Rows after (or before) values in the lexicographic order of keys"""
+    lookup = "lt" if reverse else "gt"
+    condition = Q()
+    for index, key in enumerate(keys):
+        step = Q(**{f"{key}__{lookup}": values[index]})
+        for equal_key, equal_value in zip(keys[:index], values[:index]):
+            step &= Q(**{equal_key: equal_value})
+        condition |= step
+    return condition
+
+
+def cached_count(queryset):
+    """Row count of a queryset, cached until the content changes"""
+    key = count_key(queryset, get_content_version())
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, get_page_cache_ttl())
+    return count
+
+
+async def acached_count(queryset):
+    """cached_count() for async views"""
+    key = count_key(queryset, await aget_content_version())
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, get_page_cache_ttl())
+    return count
+
+
+def count_key(queryset, version):
+    digest = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    return f"report_count:{version}:{digest}"
+
+
+class KeysetPage:
+    """One page of rows with the cursors of its neighbours"""
+
+    def __init__(self, object_list, count, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.count = count
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginates a queryset on keys, all ascending, the last one unique"""
+
+    def __init__(self, queryset, keys, per_page=20):
+        self.queryset = queryset
+        self.keys = list(keys)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        position, queryset = self.get_rows_queryset(cursor)
+        return self.build_page(list(queryset), position, cached_count(self.queryset))
+
+    async def aget_page(self, cursor=None):
+        """get_page() for async views"""
+        position, queryset = self.get_rows_queryset(cursor)
+        rows = [row async for row in queryset]
+        return self.build_page(rows, position, await acached_count(self.queryset))
+
+    def get_rows_queryset(self, cursor):
+        """(position, queryset of the page rows plus one) of a cursor"""
+        position = decode_cursor(cursor, len(self.keys))
+        queryset = self.queryset.order_by(*self.keys)
+        if position is not None:
+            values, reverse = position
+            queryset = queryset.filter(keyset_filter(self.keys, values, reverse))
+            if reverse:
+                queryset = queryset.order_by(*[f"-{key}" for key in self.keys])
+        return position, queryset[: self.per_page + 1]
+
+    def build_page(self, rows, position, count):
+        reverse = position is not None and position[1]
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else position is not None
+        return KeysetPage(
+            rows,
+            count,
+            next_cursor=self.cursor_for(rows[-1]) if rows and has_next else None,
+            previous_cursor=(
+                self.cursor_for(rows[0], reverse=True)
+                if rows and has_previous
+                else None
+            ),
+        )
+
+    def cursor_for(self, obj, reverse=False):
+        return encode_cursor([get_key_value(obj, key) for key in self.keys], reverse)
+
+
+def paginate(request, queryset, keys, per_page=20):
+    """Page of a listing for ?cursor=, with next_url and previous_url set"""
+    page = KeysetPaginator(queryset, keys, per_page).get_page(
+        request.GET.get(CURSOR_PARAM)
+    )
+    for attr, cursor in (
+        ("next_url", page.next_cursor),
+        ("previous_url", page.previous_cursor),
+    ):
+        if cursor is not None:
+            query = request.GET.copy()
+            query[CURSOR_PARAM] = cursor
+            query.pop("page", None)
+            setattr(page, attr, f"?{query.urlencode()}")
+    return page
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination on the view's keyset_keys
+
+    Responses keep the count/next/previous/results shape of page number
+    pagination; next and previous carry a cursor instead of a page number.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 20
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, view.keyset_keys, self.page_size)
+        self.page = paginator.get_page(request.query_params.get(CURSOR_PARAM))
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), CURSOR_PARAM, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.count,
+                "next": self.get_link(self.page.next_cursor),
+                "previous": self.get_link(self.page.previous_cursor),
+                "results": data,
+            }
+        )
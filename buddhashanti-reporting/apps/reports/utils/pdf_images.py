@@ -0,0 +1,228 @@
+"""
+Image output profiles for PDF generation
+
+Charts are exported at 600 DPI and maps are stored at full size, which is far
+more resolution than an A4 page needs. PDFImageFetcher is handed to WeasyPrint
+as its url_fetcher: local static and media images are resampled and
+recompressed to the selected profile before WeasyPrint embeds them, and the
+derived files are cached on disk by source hash and profile.
+"""
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from PIL import Image
+from weasyprint import default_url_fetcher
+
+# A4 page size in inches (short side, long side)
+A4_INCHES = (8.27, 11.69)
+
+PDF_IMAGE_PROFILES = {
+    "screen": {
+        "label": "Screen (96 DPI)",
+        "dpi": 96,
+        "jpeg_quality": 60,
+        "png_colors": 256,
+    },
+    "ebook": {
+        "label": "eBook (150 DPI)",
+        "dpi": 150,
+        "jpeg_quality": 75,
+        "png_colors": 256,
+    },
+    "print": {
+        "label": "Print (300 DPI)",
+        "dpi": 300,
+        "jpeg_quality": 90,
+        "png_colors": None,
+    },
+}
+
+OPTIMIZABLE_FORMATS = {"PNG", "JPEG"}
+
+# (path, mtime, size) -> sha256 of the source file
+_source_hashes = {}
+
+
+def get_default_image_profile():
+    """Return the profile used when a request does not ask for one"""
+    return getattr(settings, "REPORT_PDF_DEFAULT_IMAGE_PROFILE", "print")
+
+
+def resolve_image_profile(name):
+    """Return a valid profile name, falling back to the default profile"""
+    if name in PDF_IMAGE_PROFILES:
+        return name
+    return get_default_image_profile()
+
+
+def get_image_cache_dir():
+    """Directory holding derived images, created on first use"""
+    cache_dir = Path(
+        getattr(
+            settings,
+            "REPORT_PDF_IMAGE_CACHE_DIR",
+            Path(settings.MEDIA_ROOT) / "pdf_image_cache",
+        )
+    )
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_source_hash(path):
+    """Hash a source file, memoised on its mtime and size"""
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _source_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                digest.update(chunk)
+        _source_hashes[key] = digest.hexdigest()
+    return _source_hashes[key]
+
+
+def get_target_size(width, height, dpi):
+    """
+    Largest size that fits a full A4 page at the given DPI, in either
+    orientation, without ever upscaling
+    """
+    short_limit = round(A4_INCHES[0] * dpi)
+    long_limit = round(A4_INCHES[1] * dpi)
+
+    if width >= height:
+        limit_w, limit_h = long_limit, short_limit
+    else:
+        limit_w, limit_h = short_limit, long_limit
+
+    scale = min(1.0, limit_w / width, limit_h / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def optimize_image(source_path, profile_name):
+    """
+    Return the path of the profile-specific version of an image
+
+    The original path is returned for formats we do not recompress or when
+    the image cannot be read.
+    """
+    profile = PDF_IMAGE_PROFILES[profile_name]
+    source_path = Path(source_path)
+
+    try:
+        source_hash = get_source_hash(source_path)
+    except OSError:
+        return source_path
+
+    suffix = source_path.suffix.lower()
+    cached_path = get_image_cache_dir() / f"{source_hash}_{profile_name}{suffix}"
+    if cached_path.exists():
+        return cached_path
+
+    try:
+        with Image.open(source_path) as img:
+            image_format = img.format
+            if image_format not in OPTIMIZABLE_FORMATS:
+                return source_path
+
+            target_size = get_target_size(img.width, img.height, profile["dpi"])
+            derived = img
+            if target_size != img.size:
+                if derived.mode not in ("RGB", "RGBA", "L", "LA"):
+                    derived = derived.convert("RGBA")
+                derived = derived.resize(target_size, Image.Resampling.LANCZOS)
+
+            save_kwargs = {"optimize": True}
+            if image_format == "JPEG":
+                if derived.mode not in ("RGB", "L"):
+                    derived = derived.convert("RGB")
+                save_kwargs["quality"] = profile["jpeg_quality"]
+            elif profile["png_colors"] and derived.mode in ("RGB", "RGBA"):
+                derived = derived.quantize(
+                    colors=profile["png_colors"],
+                    method=(
+                        Image.Quantize.FASTOCTREE
+                        if derived.mode == "RGBA"
+                        else Image.Quantize.MEDIANCUT
+                    ),
+                )
+
+            # Write atomically so concurrent builds never read a partial file
+            fd, tmp_path = tempfile.mkstemp(
+                dir=cached_path.parent, suffix=suffix, prefix=".tmp_"
+            )
+            try:
+                with os.fdopen(fd, "wb") as output:
+                    derived.save(output, format=image_format, **save_kwargs)
+                os.replace(tmp_path, cached_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+    except (OSError, ValueError):
+        return source_path
+
+    # Keep the original bytes when recompression did not make it smaller
+    if cached_path.stat().st_size >= source_path.stat().st_size:
+        shutil.copyfile(source_path, cached_path)
+
+    return cached_path
+
+
+class PDFImageFetcher:
+    """
+    WeasyPrint url_fetcher serving local static/media files from disk and
+    images through the selected output profile
+    """
+
+    def __init__(self, profile_name, base_url=None):
+        self.profile_name = resolve_image_profile(profile_name)
+        self.base_netloc = urlsplit(base_url).netloc if base_url else ""
+
+    def __call__(self, url, *args, **kwargs):
+        local_path = self.resolve_local_path(url)
+        if local_path is None:
+            return default_url_fetcher(url, *args, **kwargs)
+
+        if local_path.suffix.lower() in (".png", ".jpg", ".jpeg"):
+            local_path = optimize_image(local_path, self.profile_name)
+
+        mime_type, _ = mimetypes.guess_type(local_path.name)
+        return {
+            "file_obj": open(local_path, "rb"),
+            "mime_type": mime_type,
+            "redirected_url": url,
+            "filename": local_path.name,
+        }
+
+    def resolve_local_path(self, url):
+        """Map a static or media URL on this site to a file on disk"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.netloc != self.base_netloc:
+            return None
+
+        path = unquote(parts.path)
+        try:
+            if path.startswith(settings.STATIC_URL):
+                relative = path[len(settings.STATIC_URL) :]
+                found = finders.find(relative)
+                candidate = Path(
+                    found if found else safe_join(settings.STATIC_ROOT, relative)
+                )
+            elif settings.MEDIA_URL and path.startswith(settings.MEDIA_URL):
+                relative = path[len(settings.MEDIA_URL) :]
+                candidate = Path(safe_join(settings.MEDIA_ROOT, relative))
+            else:
+                return None
+        except SuspiciousFileOperation:
+            return None
+
+        return candidate if candidate.is_file() else None
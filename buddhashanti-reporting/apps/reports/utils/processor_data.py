@@ -0,0 +1,158 @@
+"""
+Processor data for the public data API
+
+Exposes get_data() of every registered processor (by manager domain and
+category, optionally for one ward) as JSON. Bodies are built once per
+content version (see page_cache), stored in the shared cache with their
+gzip and brotli encodings and an ETag, so a request is a single cache hit
+that never runs the processors or touches chart generation. Ward bodies
+are cut from the cached body of the whole municipality.
+
+The ETag is weak: the encodings of a body differ byte for byte but carry
+the same JSON.
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.forms.models import model_to_dict
+
+try:
+    import brotli
+except ImportError:  # optional, responses fall back to gzip
+    brotli = None
+
+from .page_cache import get_content_version, get_page_cache_ttl
+from .report_data import REPORT_DOMAINS
+
+# Content-Encoding preference when the client accepts several
+ENCODINGS = ["br", "gzip"]
+
+_managers = None
+
+
+class ProcessorDataEncoder(DjangoJSONEncoder):
+    """JSON for processor output: model instances become field dicts"""
+
+    def default(self, o):
+        if isinstance(o, models.Model):
+            return model_to_dict(o)
+        if isinstance(o, (set, frozenset)):
+            return sorted(o)
+        return super().default(o)
+
+
+def get_managers():
+    """Processor managers by domain, created once per process"""
+    global _managers
+
+    if _managers is None:
+        _managers = {domain: factory() for domain, key, factory in REPORT_DOMAINS}
+    return _managers
+
+
+def get_ward_count():
+    """Number of wards, numbered from 1"""
+    return getattr(settings, "REPORT_WARD_COUNT", 9)
+
+
+def get_catalog():
+    """Available categories per domain"""
+    return {
+        domain: list(manager.processors) for domain, manager in get_managers().items()
+    }
+
+
+def filter_ward(data, ward):
+    """
+    Reduce a processor result to one ward
+
+    Processors key ward_data by ward number (int or str); anything else is
+    kept as is. Raises KeyError when the category has no ward breakdown.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("ward_data"), dict):
+        raise KeyError("ward_data")
+    ward_data = data["ward_data"]
+    for key in (ward, str(ward)):
+        if key in ward_data:
+            return {**data, "ward_data": {key: ward_data[key]}}
+    return {**data, "ward_data": {}}
+
+
+def encode_entry(payload):
+    """Encoded bodies and ETag of a JSON payload"""
+    body = json.dumps(payload, cls=ProcessorDataEncoder, ensure_ascii=False).encode(
+        "utf-8"
+    )
+    entry = {
+        "etag": f'W/"{hashlib.md5(body).hexdigest()}"',
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9),
+    }
+    if brotli is not None:
+        entry["br"] = brotli.compress(body, quality=11)
+    return entry
+
+
+def build_entry(domain, category):
+    """Run one processor and encode its JSON body"""
+    processor = get_managers()[domain].get_processor(category)
+    return encode_entry(
+        {
+            "domain": domain,
+            "category": category,
+            "ward": None,
+            "data": processor.get_data(),
+        }
+    )
+
+
+def build_ward_entry(entry, ward):
+    """Encode the body of one ward from the entry of the whole municipality"""
+    payload = json.loads(entry["identity"])
+    payload["ward"] = ward
+    payload["data"] = filter_ward(payload["data"], ward)
+    return encode_entry(payload)
+
+
+def get_processor_data(domain, category, ward=None):
+    """
+    Cached encoded body of a processor's data, or None for unknown names
+
+    Raises KeyError when a ward is requested for a category without wards.
+    """
+    manager = get_managers().get(domain)
+    if manager is None or manager.get_processor(category) is None:
+        return None
+
+    prefix = f"processor_data:{get_content_version()}:{domain}:{category}"
+    entry = cache.get(f"{prefix}:None")
+    if entry is None:
+        entry = build_entry(domain, category)
+        cache.set(f"{prefix}:None", entry, get_page_cache_ttl())
+    if ward is None:
+        return entry
+
+    ward_entry = cache.get(f"{prefix}:{ward}")
+    if ward_entry is None:
+        ward_entry = build_ward_entry(entry, ward)
+        cache.set(f"{prefix}:{ward}", ward_entry, get_page_cache_ttl())
+    return ward_entry
+
+
+def choose_encoding(entry, accept_encoding):
+    """Best precomputed encoding the client accepts ('identity' if none)"""
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    for encoding in ENCODINGS:
+        if encoding in accepted and encoding in entry:
+            return encoding
+    return "identity"
@@ -0,0 +1,72 @@
+"""
+Lightweight resource measurement helpers for report generation
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+
+
+def current_rss_bytes():
+    """
+    Return the current resident set size of this process in bytes
+
+    Reads /proc/self/statm on Linux and falls back to the peak RSS reported
+    by getrusage on other platforms.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class PeakRSSSampler:
+    """
+    Context manager that samples RSS in a background thread and records the
+    peak growth over the RSS measured on entry
+
+    Usage:
+        with PeakRSSSampler() as sampler:
+            build_pdf()
+        print(sampler.peak_delta_bytes, sampler.elapsed)
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.baseline_bytes = 0
+        self.peak_bytes = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+    def __enter__(self):
+        self.baseline_bytes = current_rss_bytes()
+        self.peak_bytes = self.baseline_bytes
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self._started_at
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+        return False
+
+    @property
+    def peak_delta_bytes(self):
+        """Peak RSS growth over the baseline, in bytes"""
+        return max(0, self.peak_bytes - self.baseline_bytes)
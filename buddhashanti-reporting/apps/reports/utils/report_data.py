@@ -0,0 +1,84 @@
+"""
+Processor data for the full report
+
+Runs every processor manager (charts first, then PDF data) and collects the
+results the full report templates expect. Shared by the web and PDF views.
+"""
+
+from django.utils import timezone
+
+from apps.chart_management.services import get_chart_service
+from apps.demographics.processors.manager import get_demographics_manager
+from apps.economics.processors.manager import get_economics_manager
+from apps.infrastructure.processors.manager import get_infrastructure_manager
+from apps.social.processors.manager import get_social_manager
+
+from ..models import PublicationSettings
+from .tracing import NULL_TRACER
+
+# (domain, context key, manager factory) in report order
+REPORT_DOMAINS = [
+    ("demographics", "all_demographics_data", get_demographics_manager),
+    ("social", "all_social_data", get_social_manager),
+    ("infrastructure", "all_infrastructure_data", get_infrastructure_manager),
+    ("economics", "all_economics_data", get_economics_manager),
+]
+
+
+def collect_report_data(tracer=NULL_TRACER, domains=None):
+    """
+    Generate charts and process every category for the full report
+
+    Returns a dict with all_<domain>_data for each domain (or only the given
+    domains) plus pdf_charts. Each manager and processor call is recorded as
+    a stage on tracer.
+    """
+    managers = [
+        (domain, context_key, tracer.instrument_manager(domain, factory()))
+        for domain, context_key, factory in REPORT_DOMAINS
+        if domains is None or domain in domains
+    ]
+
+    # Generate all charts before processing data
+    for domain, context_key, manager in managers:
+        with tracer.stage(f"{domain}.generate_all_charts"):
+            manager.generate_all_charts()
+
+    # Re-rendered charts get new content-hashed URLs
+    with tracer.stage("publish_charts"):
+        get_chart_service().publish_all_charts()
+
+    # Get processed data with charts
+    report_data = {}
+    for domain, context_key, manager in managers:
+        with tracer.stage(f"{domain}.process_all_for_pdf"):
+            report_data[context_key] = manager.process_all_for_pdf()
+
+    # Extract chart URLs for template use
+    pdf_charts = {}
+    for category, data in report_data.get("all_demographics_data", {}).items():
+        if "charts" in data:
+            pdf_charts[category] = data["charts"]
+
+    for context_key in (
+        "all_social_data",
+        "all_infrastructure_data",
+        "all_economics_data",
+    ):
+        for category, data in report_data.get(context_key, {}).items():
+            if "pdf_charts" in data and data["pdf_charts"]:
+                pdf_charts.update(data["pdf_charts"])
+
+    report_data["pdf_charts"] = pdf_charts
+    return report_data
+
+
+def get_report_base_context():
+    """Template context shared by every part of the full report"""
+    return {
+        # Municipality name - make dynamic
+        "municipality_name": "पोखरा महानगरपालिका",
+        "municipality_name_english": "pokhara Metropolitan City",
+        "publication_settings": PublicationSettings.objects.first(),
+        "generated_date": timezone.now(),
+    }
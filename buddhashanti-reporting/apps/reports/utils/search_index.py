@@ -0,0 +1,281 @@
+"""
+Full-text search over report sections
+
+Each ReportSection is indexed as a ReportSearchDocument holding normalized
+plain text (HTML stripped, nukta and zero-width joiners removed, Nepali
+digits folded to ASCII, lower-cased, tokenized). Queries go through the
+same normalization, so "२०८१" finds "2081" and spelling variants with or
+without nukta match each other.
+
+Backends, chosen from the database connection:
+    postgresql  tsvector column built from the tokens, GIN indexed,
+                ranked with ts_rank_cd
+    fts5        SQLite FTS5 table mirroring the documents, ranked with bm25
+    basic       token containment on the documents (no FTS5 available)
+
+Documents are updated on section save/delete (apps.reports.signals);
+rebuild everything with `manage.py rebuild_search_index`.
+"""
+
+import html
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+
+from ..models import ReportCategory, ReportSearchDocument, ReportSection
+
+FTS_TABLE = "reports_search_fts"
+# Marks are part of tokens: the default unicode61 categories split
+# Devanagari words at vowel signs and viramas, so prefixes matched mid-word
+FTS_TOKENIZER = "unicode61 categories 'L* N* Co M*'"
+FTS_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "section_id UNINDEXED, title_text, summary_text, body_text, "
+    f'tokenize="{FTS_TOKENIZER}")'
+)
+
+NUKTA = "\u093c"
+# Nukta, ZWNJ, ZWJ and soft hyphen carry no meaning for matching
+IGNORED_CHARACTERS = {
+    ord(char): None for char in (NUKTA, "\u200c", "\u200d", "\xad")
+}
+NEPALI_TO_ASCII_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+# Word characters plus Devanagari letters and vowel signs, without the dandas
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097f]+")
+
+# Relative weight of title, summary and body matches
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+# tsvector straight from the stored tokens, weighted by field
+TSVECTOR_SQL = " || ".join(
+    f"setweight(array_to_tsvector(string_to_array({column}, ' ')), '{weight}')"
+    for column, weight in (
+        ("title_text", "A"),
+        ("summary_text", "B"),
+        ("body_text", "C"),
+    )
+)
+
+_fts_available = None
+
+
+def fold_text(value):
+    """Plain text of an HTML or text value with nukta, digits and case folded"""
+    text = html.unescape(strip_tags(value or ""))
+    # NFD splits precomposed nukta letters (e.g. ज़) so the nukta can be dropped
+    text = unicodedata.normalize("NFD", text).translate(IGNORED_CHARACTERS)
+    text = unicodedata.normalize("NFC", text)
+    return text.translate(NEPALI_TO_ASCII_DIGITS).casefold()
+
+
+def normalize_text(value):
+    """Plain searchable text of an HTML or text value, as space-separated tokens"""
+    return " ".join(TOKEN_RE.findall(fold_text(value)))
+
+
+def get_search_backend():
+    global _fts_available
+
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite":
+        if _fts_available is None:
+            _fts_available = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available:
+            return "fts5"
+    return "basic"
+
+
+def section_db_id(pk):
+    """Section primary key as stored in the database"""
+    return ReportSection._meta.pk.get_db_prep_value(pk, connection)
+
+
+# Indexing ------------------------------------------------------------------
+
+
+def index_section(section):
+    """Create or refresh the search document of one section"""
+    document, created = ReportSearchDocument.objects.update_or_create(
+        section=section,
+        defaults={
+            "title_text": normalize_text(
+                " ".join([section.section_number, section.title, section.title_nepali])
+            ),
+            "summary_text": normalize_text(
+                " ".join([section.summary, section.summary_nepali])
+            ),
+            "body_text": normalize_text(
+                " ".join([section.content, section.content_nepali])
+            ),
+        },
+    )
+
+    backend = get_search_backend()
+    if backend == "postgresql":
+        # Lexemes are our own tokens; bypass the text search parser, which
+        # splits Devanagari words at vowel signs in some locales
+        ReportSearchDocument.objects.filter(pk=document.pk).update(
+            search_vector=RawSQL(TSVECTOR_SQL, [])
+        )
+    elif backend == "fts5":
+        section_id = section_db_id(section.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE section_id = %s", [section_id]
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}"
+                " (section_id, title_text, summary_text, body_text)"
+                " VALUES (%s, %s, %s, %s)",
+                [
+                    section_id,
+                    document.title_text,
+                    document.summary_text,
+                    document.body_text,
+                ],
+            )
+    return document
+
+
+def remove_section(pk):
+    """Drop a deleted section from the index"""
+    ReportSearchDocument.objects.filter(pk=pk).delete()
+    if get_search_backend() == "fts5":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE section_id = %s", [section_db_id(pk)]
+            )
+
+
+def rebuild_index():
+    """Re-index every section; returns the number of documents"""
+    if get_search_backend() == "fts5":
+        # Recreated rather than emptied, so older tables get the tokenizer
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {FTS_TABLE}")
+            cursor.execute(FTS_CREATE_SQL)
+
+    count = 0
+    for section in ReportSection.objects.order_by().iterator():
+        index_section(section)
+        count += 1
+    return count
+
+
+# Searching -----------------------------------------------------------------
+
+
+class SectionSearchResults:
+    """
+    Ranked published sections matching a query
+
+    Supports count() and slicing, so it can be handed to Paginator; only
+    the requested page of sections is loaded.
+    """
+
+    def __init__(self, query, category_slug=None):
+        self.tokens = normalize_text(query).split()
+        self.category_slug = category_slug or None
+        self.backend = get_search_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if not self.tokens:
+                self._count = 0
+            elif self.backend == "fts5":
+                sql, params = self.fts_sql("COUNT(*)")
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    self._count = cursor.fetchone()[0]
+            else:
+                self._count = self.documents().count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        if not self.tokens:
+            return []
+
+        start = key.start or 0
+        if self.backend == "fts5":
+            limit = -1 if key.stop is None else key.stop - start
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+            sql, params = self.fts_sql(
+                "f.section_id", f"ORDER BY bm25({FTS_TABLE}, 0, {weights})"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"{sql} LIMIT %s OFFSET %s", params + [limit, start])
+                ids = [
+                    ReportSection._meta.pk.to_python(row[0])
+                    for row in cursor.fetchall()
+                ]
+        else:
+            ids = list(self.documents().values_list("section_id", flat=True)[key])
+
+        sections = ReportSection.objects.select_related("category").in_bulk(ids)
+        return [sections[pk] for pk in ids if pk in sections]
+
+    # Backends --------------------------------------------------------------
+
+    def tsquery(self):
+        """Prefix query on every token, e.g. 'शिक्षा':* & '2081':*"""
+        return " & ".join(f"'{token}':*" for token in self.tokens)
+
+    def documents(self):
+        """Matching documents in rank order (PostgreSQL and basic backends)"""
+        documents = ReportSearchDocument.objects.filter(section__is_published=True)
+        if self.category_slug:
+            documents = documents.filter(section__category__slug=self.category_slug)
+
+        if self.backend == "postgresql":
+            tsquery = self.tsquery()
+            return (
+                documents.annotate(
+                    matches=RawSQL(
+                        "search_vector @@ %s::tsquery",
+                        [tsquery],
+                        output_field=BooleanField(),
+                    ),
+                    rank=RawSQL(
+                        "ts_rank_cd(search_vector, %s::tsquery)",
+                        [tsquery],
+                        output_field=FloatField(),
+                    ),
+                )
+                .filter(matches=True)
+                .order_by("-rank", "section__order")
+            )
+
+        for token in self.tokens:
+            documents = documents.filter(
+                Q(title_text__contains=token)
+                | Q(summary_text__contains=token)
+                | Q(body_text__contains=token)
+            )
+        return documents.order_by("section__category__order", "section__order")
+
+    def fts_sql(self, columns, order_by=""):
+        """FTS5 query joined to published sections (and the category filter)"""
+        match = " ".join(f'"{token}"*' for token in self.tokens)
+        sql = (
+            f"SELECT {columns} FROM {FTS_TABLE} f"
+            f" JOIN {ReportSection._meta.db_table} s ON s.id = f.section_id"
+            f" JOIN {ReportCategory._meta.db_table} c ON c.id = s.category_id"
+            f" WHERE {FTS_TABLE} MATCH %s AND s.is_published"
+        )
+        params = [match]
+        if self.category_slug:
+            sql += " AND c.slug = %s"
+            params.append(self.category_slug)
+        return f"{sql} {order_by}".strip(), params
+
@@ -0,0 +1,118 @@
+"""
+Single-flight builds for expensive report artifacts
+
+When many clients ask for the same artifact at once (e.g. the full report
+right after publication), only the request holding the build lease runs the
+build. The others wait a bounded time for the artifact to appear and then
+fall back to a stale copy. The lease lives in the shared cache so it is
+honoured across workers; it expires on its own if a worker dies mid-build.
+"""
+
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+LEASE_POLL_INTERVAL = 0.5
+
+
+def get_lease_timeout():
+    """Seconds a build lease is held before it is considered abandoned"""
+    return getattr(settings, "REPORT_BUILD_LEASE_TIMEOUT", 10 * 60)
+
+
+def get_wait_timeout():
+    """Seconds a request waits for another worker's build to finish"""
+    return getattr(settings, "REPORT_BUILD_WAIT_TIMEOUT", 60)
+
+
+class BuildLease:
+    """Cache-backed mutual exclusion for one artifact key"""
+
+    def __init__(self, key):
+        self.cache_key = f"report_build_lease:{key}"
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    def acquire(self):
+        """Try to take the lease without blocking"""
+        self.acquired = cache.add(self.cache_key, self.token, get_lease_timeout())
+        return self.acquired
+
+    def release(self):
+        """Give the lease up if this request still holds it"""
+        if self.acquired and cache.get(self.cache_key) == self.token:
+            cache.delete(self.cache_key)
+        self.acquired = False
+
+    def is_held(self):
+        """True while some request holds the lease"""
+        return cache.get(self.cache_key) is not None
+
+    def wait(self, timeout):
+        """Wait until the lease is released; False if timeout elapsed first"""
+        deadline = time.monotonic() + timeout
+        while self.is_held():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LEASE_POLL_INTERVAL)
+        return True
+
+
+class LeasedStream:
+    """
+    Streaming response body built while holding a lease
+
+    Django closes the body with the response, so the lease is released even
+    when the body is never iterated (HEAD requests, clients gone before the
+    first chunk).
+    """
+
+    def __init__(self, chunks, lease):
+        self.chunks = chunks
+        self.lease = lease
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        try:
+            if hasattr(self.chunks, "close"):
+                self.chunks.close()
+        finally:
+            self.lease.release()
+
+
+def single_flight(artifact_cache, key, build, wait_timeout=None):
+    """
+    Return the path of a fresh artifact, building it at most once at a time
+
+    build() must store the artifact under key and return its path. Requests
+    that lose the race wait up to wait_timeout seconds for the winner; after
+    that (or if the winner's build failed) they get the stale artifact, or
+    None when there has never been one.
+    """
+    path = artifact_cache.get(key)
+    if path:
+        return path
+
+    lease = BuildLease(key)
+    if lease.acquire():
+        try:
+            # Another worker may have finished between our check and the lease
+            path = artifact_cache.get(key)
+            if path:
+                return path
+            return build()
+        finally:
+            lease.release()
+
+    if wait_timeout is None:
+        wait_timeout = get_wait_timeout()
+    if lease.wait(wait_timeout):
+        path = artifact_cache.get(key)
+        if path:
+            return path
+
+    return artifact_cache.get_stale(key)
@@ -0,0 +1,147 @@
+"""
+Sparse fieldsets for the report API
+
+`?fields=` limits a response to some fields, with dotted paths reaching
+into nested objects (fields=title,sections.title,sections.slug), and
+`?expand=` embeds the expandable relations of a serializer
+(expand=sections.figures). The queryset of a view loads only the columns
+and relations the requested fields need, and detail responses are cached
+as rendered bytes per object version and fieldset.
+"""
+
+import hashlib
+
+from django.db.models import ForeignKey, Prefetch
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_fieldset(value):
+    """Tree of dotted field paths: "a,b.c" -> {"a": {}, "b": {"c": {}}}"""
+    tree = {}
+    for path in (value or "").split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if not name:
+                break
+            node = node.setdefault(name, {})
+    return tree
+
+
+def get_fieldset(request):
+    """(fields, expand) trees of a request; fields is None if not limited"""
+    if request is None:
+        return None, {}
+    if not hasattr(request, "_report_fieldset"):
+        params = getattr(request, "query_params", request.GET)
+        request._report_fieldset = (
+            parse_fieldset(params.get(FIELDS_PARAM)) or None,
+            parse_fieldset(params.get(EXPAND_PARAM)),
+        )
+    return request._report_fieldset
+
+
+def subtree(tree, path):
+    """Node of a fieldset tree at a field path; None where it is not limited"""
+    for name in path:
+        if not tree:
+            return None
+        tree = tree.get(name)
+    return tree or None
+
+
+def get_fieldset_key(request):
+    """Normalized digest of the fieldset of a request"""
+    fields, expand = get_fieldset(request)
+    normalized = f"{format_fieldset(fields)}|{format_fieldset(expand)}"
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def format_fieldset(tree):
+    if tree is None:
+        return "*"
+    return ",".join(
+        f"{name}({format_fieldset(node)})" if node else name
+        for name, node in sorted(tree.items())
+    )
+
+
+def get_model_fields(serializer):
+    """
+    (columns, relations) a model serializer reads
+
+    columns are the model fields for only(), plus the dotted paths of
+    fields read through a foreign key ("category.slug"); relations map the
+    source of each nested serializer to its child serializer. Fields that
+    are not plain model fields list theirs in Meta.field_dependencies.
+    """
+    model = serializer.Meta.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    dependencies = getattr(serializer.Meta, "field_dependencies", {})
+    columns = {model._meta.pk.name}
+    relations = {}
+    for name, field in serializer.fields.items():
+        if isinstance(field, ListSerializer):
+            relations[field.source] = field.child
+        elif name in dependencies:
+            columns.update(dependencies[name])
+        elif not isinstance(field, BaseSerializer):
+            source = field.source.split(".")[0]
+            if source in concrete:
+                columns.add(source)
+                if field.source != source:
+                    columns.add(field.source)
+    return columns, relations
+
+
+def sparse_queryset(queryset, serializer, keep=(), link=None):
+    """
+    queryset limited to what serializer outputs
+
+    Loads only the columns of the requested fields (and keep), joins the
+    foreign keys they traverse and prefetches the nested relations the
+    same way. link is the foreign key back to the parent of a prefetch,
+    which the prefetch fills in without a join; the parent loads the
+    columns its children read through it.
+    """
+    model = queryset.model
+    columns, relations = get_model_fields(serializer)
+    columns.update(keep)
+    prefetches = []
+    for source, child in relations.items():
+        remote = model._meta.get_field(source)
+        child_link = remote.field.name
+        child_columns, _ = get_model_fields(child)
+        columns.update(
+            path.split(".", 1)[1]
+            for path in child_columns
+            if path.startswith(f"{child_link}.")
+        )
+        prefetches.append(
+            Prefetch(
+                source,
+                queryset=sparse_queryset(
+                    remote.related_model._default_manager.all(),
+                    child,
+                    link=child_link,
+                ),
+            )
+        )
+
+    # Joined rows are loaded whole; the parent row of a prefetch is given
+    columns = {path.split(".")[0] for path in columns}
+    if link:
+        columns.add(link)
+    related = [
+        name
+        for name in columns
+        if name != link and isinstance(model._meta.get_field(name), ForeignKey)
+    ]
+    queryset = queryset.only(*columns)
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
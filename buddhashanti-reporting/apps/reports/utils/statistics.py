@@ -0,0 +1,117 @@
+"""
+Precomputed report statistics
+
+Counts of published sections, figures and tables (per category and per
+section) and the headline municipality figures shown on the home page
+(population, wards, area, literacy rate) are computed once from the report
+models and the processors, then served from the shared cache. The snapshot
+is dropped whenever report content or the underlying census data changes
+(see apps.reports.signals) and rebuilt on the next request.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.demographics.processors.manager import get_demographics_manager
+from apps.social.processors.manager import get_social_manager
+
+from ..models import ReportCategory, ReportFigure, ReportSection, ReportTable
+
+REPORT_STATISTICS_KEY = "report_statistics"
+
+
+def get_statistics_ttl():
+    """Seconds a snapshot stays cached; changes invalidate it sooner"""
+    return getattr(settings, "REPORT_STATISTICS_CACHE_TTL", 24 * 60 * 60)
+
+
+def get_content_counts():
+    """Published section, figure and table counts per category and section"""
+    sections = {
+        row["id"]: {"figures": row["figure_count"], "tables": row["table_count"]}
+        for row in ReportSection.objects.filter(is_published=True)
+        .order_by()
+        .values("id")
+        .annotate(
+            figure_count=Count("figures", distinct=True),
+            table_count=Count("tables", distinct=True),
+        )
+    }
+    published = Q(sections__is_published=True)
+    categories = {
+        row["slug"]: {
+            "sections": row["section_count"],
+            "figures": row["figure_count"],
+            "tables": row["table_count"],
+        }
+        for row in ReportCategory.objects.filter(is_active=True)
+        .order_by()
+        .values("slug")
+        .annotate(
+            section_count=Count("sections", filter=published, distinct=True),
+            figure_count=Count("sections__figures", filter=published, distinct=True),
+            table_count=Count("sections__tables", filter=published, distinct=True),
+        )
+    }
+    return {
+        "categories": categories,
+        "sections": sections,
+        "total_categories": len(categories),
+        "total_sections": sum(row["sections"] for row in categories.values()),
+        "total_figures": ReportFigure.objects.count(),
+        "total_tables": ReportTable.objects.count(),
+    }
+
+
+def get_municipality_figures():
+    """Population, ward count, area and literacy rate from the processors"""
+    demographics = get_demographics_manager()
+    figures = {"population": None, "wards": None, "area": None, "literacy_rate": None}
+
+    summary = demographics.get_processor("demographic_summary").get_data()
+    if summary:
+        figures["population"] = summary.total_population
+        if summary.literacy_rate_above_15 is not None:
+            figures["literacy_rate"] = float(summary.literacy_rate_above_15)
+        if summary.total_population and summary.population_density:
+            figures["area"] = summary.total_population / float(
+                summary.population_density
+            )
+
+    settlements = demographics.get_processor("ward_settlement").get_data()
+    figures["wards"] = settlements.get("total_wards") or None
+
+    if figures["literacy_rate"] is None:
+        literacy = get_social_manager().get_processor("literacy_status").get_data()
+        literate = literacy["municipality_data"].get("BOTH_READING_AND_WRITING")
+        if literate:
+            figures["literacy_rate"] = literate["percentage"]
+
+    return figures
+
+
+def build_report_statistics():
+    """Compute a fresh statistics snapshot"""
+    statistics = get_content_counts()
+    try:
+        statistics.update(get_municipality_figures())
+    except Exception as e:
+        print(f"Could not compute municipality figures: {e}")
+        statistics.update(
+            {"population": None, "wards": None, "area": None, "literacy_rate": None}
+        )
+    return statistics
+
+
+def get_report_statistics():
+    """Return the cached statistics snapshot, building it on a miss"""
+    statistics = cache.get(REPORT_STATISTICS_KEY)
+    if statistics is None:
+        statistics = build_report_statistics()
+        cache.set(REPORT_STATISTICS_KEY, statistics, get_statistics_ttl())
+    return statistics
+
+
+def invalidate_report_statistics():
+    cache.delete(REPORT_STATISTICS_KEY)
@@ -0,0 +1,49 @@
+"""
+Chapter-by-chapter rendering of the full report for streamed responses
+
+The web full report page is rendered with a marker where the report body
+goes; the part before the marker (document head, navigation) is sent at
+once, then the content block of pdf_full_report.html is rendered one
+chapter at a time, each right after its processors have run, and the rest
+of the page closes the document.
+"""
+
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.template.loader_tags import BlockNode
+
+from .incremental import FRONT_MATTER, FULL_REPORT_TEMPLATE, REPORT_CHAPTERS
+from .report_data import collect_report_data
+from .tracing import NULL_TRACER
+
+# Rendered by web_full_report.html in place of the report body when streaming
+CHAPTERS_MARKER = "<!-- report-chapters -->"
+
+
+def get_template_block(template_name, block_name):
+    """(template, block node) of a named block, looked up through {% extends %}"""
+    template = get_template(template_name).template
+    for node in template.nodelist.get_nodes_by_type(BlockNode):
+        if node.name == block_name:
+            return template, node
+    raise ValueError(f"{template_name} has no block {block_name!r}")
+
+
+def render_block(template_name, block_name, context, request=None):
+    """Render only one block of a template, with context processors applied"""
+    template, block = get_template_block(template_name, block_name)
+    context = make_context(context, request)
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            return block.nodelist.render(context)
+
+
+def iter_report_chapters(base_context, request=None, tracer=NULL_TRACER):
+    """Yield (chapter, html) for the front matter and then every chapter"""
+    for name, domains in [(FRONT_MATTER, ())] + REPORT_CHAPTERS:
+        with tracer.stage(f"chapter.{name}"):
+            context = {**base_context, "chapter": name}
+            if domains:
+                context.update(collect_report_data(tracer, domains))
+            html = render_block(FULL_REPORT_TEMPLATE, "content", context, request)
+        yield name, html
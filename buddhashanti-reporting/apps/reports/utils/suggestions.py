@@ -0,0 +1,263 @@
+"""
+In-process prefix index for search-as-you-type suggestions
+
+Titles of active categories, published sections and their figures and
+tables (English and Nepali) and their numbers are folded the same way as
+the search index (nukta dropped, Nepali digits to ASCII, lower-cased) and
+split into tokens. Every (token, entry) pair goes into one sorted array, so
+a lookup is a bisect to the first key starting with the typed prefix and a
+short scan from there; dotted numbers such as "3.1" stay one token.
+
+Each process builds the index on startup (gadhawa_report.wsgi/asgi) or on
+its first lookup. Saving or deleting report content bumps a version token
+in the shared cache (see apps.reports.signals); processes notice within
+VERSION_CHECK_INTERVAL seconds and rebuild, serving the old index until the
+new one is ready. The number of entries and of keys per entry is capped, so
+memory stays bounded however large the report grows.
+"""
+
+import re
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from ..models import ReportCategory, ReportFigure, ReportSection, ReportTable
+from .search_index import fold_text
+
+SUGGESTION_VERSION_KEY = "report_suggestions:version"
+
+# Dotted numbers ("3.1", "१२.४") are kept whole, other text splits into words
+SUGGEST_TOKEN_RE = re.compile(r"\d+(?:\.\d+)+|[\w\u0900-\u0963\u0966-\u097f]+")
+
+# Keys are truncated to this length; longer prefixes are truncated the same way
+MAX_TOKEN_LENGTH = 32
+MAX_TOKENS_PER_ENTRY = 24
+# Keys examined and matches ranked per lookup, so one-letter prefixes stay cheap
+MAX_SCAN = 1000
+CANDIDATES_PER_RESULT = 4
+# Seconds between checks of the shared version token
+VERSION_CHECK_INTERVAL = 1.0
+
+# Ranking of entry kinds when matches are otherwise equal
+KIND_ORDER = {"category": 0, "section": 1, "figure": 2, "table": 3}
+
+_process_index = None  # (version, SuggestionIndex)
+_checked_at = 0.0
+_local_version = uuid.uuid4().hex  # when the cache cannot keep the version
+_build_lock = threading.Lock()
+
+
+def get_max_entries():
+    return getattr(settings, "REPORT_SUGGESTION_MAX_ENTRIES", 20000)
+
+
+def tokenize(value):
+    """Folded suggestion tokens of a title, number or query"""
+    return [
+        token[:MAX_TOKEN_LENGTH] for token in SUGGEST_TOKEN_RE.findall(fold_text(value))
+    ]
+
+
+class SuggestionIndex:
+    """Sorted (token, entry) array over suggestion entries"""
+
+    def __init__(self, entries):
+        # entries: (kind, title, title_nepali, number, url) tuples
+        self.entries = entries
+        self.entry_tokens = []
+        pairs = []
+        for entry_id, (kind, title, title_nepali, number, url) in enumerate(entries):
+            tokens = tuple(
+                dict.fromkeys(tokenize(f"{number} {title_nepali} {title}"))
+            )[:MAX_TOKENS_PER_ENTRY]
+            self.entry_tokens.append(tokens)
+            pairs.extend((token, entry_id) for token in tokens)
+        pairs.sort()
+        self.keys = [token for token, entry_id in pairs]
+        self.ids = array("I", (entry_id for token, entry_id in pairs))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def suggest(self, query, limit=10):
+        """Entries with a token starting with the last word and matching the rest"""
+        tokens = tokenize(query)
+        if not tokens or limit < 1:
+            return []
+        prefix, others = tokens[-1], tokens[:-1]
+
+        # Keys equal to the prefix sort first, so whole-word matches are seen
+        # before the candidate pool fills up
+        matches = {}
+        pool = limit * CANDIDATES_PER_RESULT
+        start = bisect_left(self.keys, prefix)
+        for position in range(start, min(start + MAX_SCAN, len(self.keys))):
+            key = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            entry_id = self.ids[position]
+            exact = key == prefix
+            if entry_id in matches:
+                if exact:
+                    matches[entry_id] = True
+                continue
+            if others and not self.matches_all(entry_id, others):
+                continue
+            matches[entry_id] = exact
+            if len(matches) >= pool:
+                break
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (
+                not item[1],
+                KIND_ORDER[self.entries[item[0]][0]],
+                len(self.entries[item[0]][2] or self.entries[item[0]][1]),
+                item[0],
+            ),
+        )
+        return [self.entries[entry_id] for entry_id, exact in ranked[:limit]]
+
+    def matches_all(self, entry_id, words):
+        """Every earlier word of the query prefixes one of the entry's tokens"""
+        tokens = self.entry_tokens[entry_id]
+        return all(any(token.startswith(word) for token in tokens) for word in words)
+
+
+def collect_entries(max_entries):
+    """Suggestion entries from the published report content"""
+    entries = []
+
+    for category in ReportCategory.objects.filter(is_active=True).order_by("order"):
+        entries.append(
+            (
+                "category",
+                category.name,
+                category.name_nepali,
+                category.category_number,
+                category.get_absolute_url(),
+            )
+        )
+
+    published = {"is_published": True, "category__is_active": True}
+    section_urls = {}
+    for section in ReportSection.objects.filter(**published).select_related(
+        "category"
+    ):
+        section_urls[section.pk] = section.get_absolute_url()
+        entries.append(
+            (
+                "section",
+                section.title,
+                section.title_nepali,
+                section.section_number,
+                section_urls[section.pk],
+            )
+        )
+
+    for kind, model, number_field in (
+        ("figure", ReportFigure, "figure_number"),
+        ("table", ReportTable, "table_number"),
+    ):
+        rows = (
+            model.objects.filter(section_id__in=section_urls)
+            .order_by(number_field)
+            .values_list("pk", "section_id", "title", "title_nepali", number_field)
+        )
+        for pk, section_id, title, title_nepali, number in rows:
+            url = section_urls[section_id]
+            if kind == "table":
+                url = f"{url}#table{pk}"
+            entries.append((kind, title, title_nepali, number, url))
+
+    if len(entries) > max_entries:
+        print(f"Suggestion index capped at {max_entries} of {len(entries)} entries")
+    return entries[:max_entries]
+
+
+def build_suggestion_index():
+    return SuggestionIndex(collect_entries(get_max_entries()))
+
+
+def get_suggestion_version():
+    version = cache.get(SUGGESTION_VERSION_KEY)
+    if version is None:
+        cache.add(SUGGESTION_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SUGGESTION_VERSION_KEY)
+    # Caches that cannot keep the version (DummyCache) use this process's
+    return version or _local_version
+
+
+def get_suggestion_index():
+    """Current index of this process, rebuilding it when the content changed"""
+    global _process_index, _checked_at
+
+    local = _process_index
+    now = time.monotonic()
+    if local is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return local[1]
+
+    version = get_suggestion_version()
+    _checked_at = now
+    if local is not None and local[0] == version:
+        return local[1]
+
+    # One thread rebuilds; the others keep answering from the old index
+    if not _build_lock.acquire(blocking=local is None):
+        return local[1]
+    try:
+        if _process_index is not None and _process_index[0] == version:
+            return _process_index[1]
+        index = build_suggestion_index()
+        _process_index = (version, index)
+        return index
+    finally:
+        _build_lock.release()
+
+
+def suggest(query, limit=10):
+    """Suggestion dicts for a partial query"""
+    return [
+        {
+            "type": kind,
+            "title": title,
+            "title_nepali": title_nepali,
+            "number": number,
+            "url": url,
+        }
+        for kind, title, title_nepali, number, url in get_suggestion_index().suggest(
+            query, limit
+        )
+    ]
+
+
+def warm_suggestion_index():
+    """
+    Build the index at process startup
+
+    Closes the database connections it opened, so workers forked after
+    warming (gunicorn --preload) do not share the master's connection.
+    """
+    try:
+        get_suggestion_index()
+    except Exception as e:
+        # Database not ready yet (e.g. before migrate): build on first lookup
+        print(f"Suggestion index not built at startup: {e}")
+    finally:
+        connections.close_all()
+
+
+def invalidate_suggestions():
+    """Make every process rebuild its index"""
+    global _process_index, _checked_at, _local_version
+
+    _process_index = None
+    _checked_at = 0.0
+    _local_version = uuid.uuid4().hex
+    cache.set(SUGGESTION_VERSION_KEY, _local_version, None)
@@ -0,0 +1,202 @@
+"""
+Build tracing for report generation
+
+A BuildTracer records wall time, database query count/time and peak memory
+for each named stage of a build (chart generation, processor data, template
+rendering, WeasyPrint layout, ...) and for every processor method run inside
+it. On exit the trace is saved as a ReportBuild row, viewable in the admin,
+and its summary is logged at DEBUG level.
+
+Usage:
+    with BuildTracer("full_report", "full_report_print") as tracer:
+        with tracer.stage("render_to_string"):
+            html = render_to_string(...)
+"""
+
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from ..models import ReportBuild
+from .profiling import current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Processor methods traced individually when a manager is instrumented
+TRACED_PROCESSOR_METHODS = (
+    "get_data",
+    "process_for_pdf",
+    "generate_and_track_charts",
+    "generate_and_save_charts",
+)
+
+
+class NullTracer:
+    """Tracer that records nothing, used outside traced builds"""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def instrument_manager(self, domain, manager):
+        return manager
+
+
+class BuildTracer:
+    """Collects per-stage timing, query and memory figures for one build"""
+
+    def __init__(self, build_type, target="", sample_interval=0.02):
+        self.build_type = build_type
+        self.target = target
+        self.sample_interval = sample_interval
+        self.stages = []
+        self.query_count = 0
+        self.query_time = 0.0
+        self._open_stages = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # Database --------------------------------------------------------------
+
+    def _record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += time.perf_counter() - started
+
+    # Memory ----------------------------------------------------------------
+
+    def _sample_memory(self):
+        rss = current_rss_bytes()
+        with self._lock:
+            self._peak_rss = max(self._peak_rss, rss)
+            for record in self._open_stages:
+                record["_peak"] = max(record["_peak"], rss)
+        return rss
+
+    def _run_sampler(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample_memory()
+
+    # Stages ----------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the enclosed block as a stage (stages may nest)"""
+        rss = current_rss_bytes()
+        record = {
+            "name": name,
+            "depth": len(self._open_stages),
+            "offset": round(time.perf_counter() - self._started, 4),
+            "_peak": rss,
+            "_rss": rss,
+        }
+        with self._lock:
+            self._open_stages.append(record)
+            self.stages.append(record)
+
+        queries, query_time = self.query_count, self.query_time
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._sample_memory()
+            with self._lock:
+                self._open_stages.remove(record)
+            record.update(
+                {
+                    "elapsed": round(time.perf_counter() - started, 4),
+                    "queries": self.query_count - queries,
+                    "query_time": round(self.query_time - query_time, 4),
+                    "peak_memory": max(0, record.pop("_peak") - record.pop("_rss")),
+                }
+            )
+
+    def instrument_manager(self, domain, manager):
+        """Trace each processor method of a manager as its own stage"""
+        for category, processor in manager.processors.items():
+            for method_name in TRACED_PROCESSOR_METHODS:
+                method = getattr(processor, method_name, None)
+                if callable(method):
+                    setattr(
+                        processor,
+                        method_name,
+                        self._traced(f"{domain}.{category}.{method_name}", method),
+                    )
+        return manager
+
+    def _traced(self, name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    # Build -----------------------------------------------------------------
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._started_at = timezone.now()
+        self._baseline_rss = current_rss_bytes()
+        self._peak_rss = self._baseline_rss
+        self._query_wrapper = connection.execute_wrapper(self._record_query)
+        self._query_wrapper.__enter__()
+        self._sampler = threading.Thread(target=self._run_sampler, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stop.set()
+        self._sampler.join()
+        self._query_wrapper.__exit__(exc_type, exc_value, tb)
+
+        self.duration = time.perf_counter() - self._started
+        self._sample_memory()
+        self.peak_memory = max(0, self._peak_rss - self._baseline_rss)
+        error = ""
+        if exc_type is not None:
+            error = "".join(traceback.format_exception(exc_type, exc_value, tb))
+
+        logger.debug(self.summary())
+        self.save(self.duration, self.peak_memory, error)
+        return False
+
+    def summary(self):
+        """One-line summary of a finished build"""
+        return (
+            f"{self.build_type} build: {self.duration:.2f}s, "
+            f"{self.query_count} queries ({self.query_time:.2f}s), "
+            f"peak +{self.peak_memory / (1024 * 1024):.1f} MB"
+        )
+
+    def save(self, duration, peak_memory, error):
+        """Persist the trace; tracing must never break the build itself"""
+        try:
+            ReportBuild.objects.create(
+                build_type=self.build_type,
+                target=self.target,
+                status="failed" if error else "success",
+                app_version=getattr(settings, "APP_VERSION", ""),
+                started_at=self._started_at,
+                finished_at=timezone.now(),
+                duration=round(duration, 4),
+                query_count=self.query_count,
+                query_time=round(self.query_time, 4),
+                peak_memory=peak_memory,
+                stages=self.stages,
+                error=error,
+            )
+        except Exception:
+            logger.exception("Could not save report build trace")
+
+
+NULL_TRACER = NullTracer()
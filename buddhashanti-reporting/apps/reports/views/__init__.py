@@ -20,8 +20,22 @@ from .api import (
     CategoryDetailAPIView,
     SectionListAPIView,
     SectionDetailAPIView,
+    FigureListAPIView,
+    TableListAPIView,
     ReportSearchAPIView,
+    SuggestionAPIView,
+    ProcessorDataIndexAPIView,
+    ProcessorDataAPIView,
+    DatasetIndexAPIView,
+    DatasetExportView,
     DownloadStatsAPIView,
+    PDFAdmissionStatsAPIView,
+)
+from .async_api import (
+    AsyncCategoryListAPIView,
+    AsyncSectionListAPIView,
+    AsyncReportSearchAPIView,
+    AsyncDownloadStatsAPIView,
 )
 from .utils import ReportSitemapView, RobotsView
 
@@ -44,8 +58,20 @@ __all__ = [
     "CategoryDetailAPIView",
     "SectionListAPIView",
     "SectionDetailAPIView",
+    "FigureListAPIView",
+    "TableListAPIView",
     "ReportSearchAPIView",
+    "SuggestionAPIView",
+    "ProcessorDataIndexAPIView",
+    "ProcessorDataAPIView",
+    "DatasetIndexAPIView",
+    "DatasetExportView",
     "DownloadStatsAPIView",
+    "PDFAdmissionStatsAPIView",
+    "AsyncCategoryListAPIView",
+    "AsyncSectionListAPIView",
+    "AsyncReportSearchAPIView",
+    "AsyncDownloadStatsAPIView",
     "ReportSitemapView",
     "RobotsView",
 ]
@@ -1,72 +1,159 @@
-from django.db.models import Q, Count
-from django.utils import timezone
-from datetime import timedelta
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
 
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 
-from ..models import ReportCategory, ReportSection, ReportDownload
+from ..models import ReportCategory, ReportFigure, ReportSection, ReportTable
+from ..utils.admission import AdmissionController
+from ..utils.conditional import (
+    category_validators, conditional, conditional_content,
+    download_stats_validators, section_validators
+)
+from ..utils.download_stats import get_download_stats
+from ..utils.page_cache import get_page_cache_ttl, versioned_cache_page
+from ..utils.export import EXPORT_FORMATS, EXPORT_WRITERS, get_dataset, get_datasets
+from ..utils.pagination import (
+    FIGURE_KEYS, SECTION_KEYS, TABLE_KEYS, KeysetPagination
+)
+from ..utils.processor_data import (
+    choose_encoding, get_catalog, get_processor_data, get_ward_count
+)
+from ..utils.search_index import SectionSearchResults
+from ..utils.sparse import get_fieldset_key, sparse_queryset
+from ..utils.suggestions import suggest
 from ..serializers import (
     ReportCategoryListSerializer, ReportCategoryDetailSerializer,
     ReportSectionListSerializer, ReportSectionDetailSerializer,
-    SearchResultSerializer
+    ReportFigureSerializer, ReportTableSerializer, SearchResultSerializer
 )
 
 
+@method_decorator([conditional_content, versioned_cache_page], name='dispatch')
 class CategoryListAPIView(generics.ListAPIView):
     serializer_class = ReportCategoryListSerializer
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        return ReportCategory.objects.filter(is_active=True).order_by('order')
+        return get_category_list_queryset()
+
 
+class SparseRetrieveMixin:
+    """
+    Detail view with ?fields=/?expand= and cached JSON bodies
 
-class CategoryDetailAPIView(generics.RetrieveAPIView):
+    The queryset loads only what the requested fields need. Rendered JSON
+    is cached under the ETag of the object, set by the conditional()
+    validators of the view, and the fieldset, so an entry is reused until
+    the object changes.
+    """
+    
+    def get_queryset(self):
+        return sparse_queryset(self.get_base_queryset(), self.get_serializer())
+    
+    def retrieve(self, request, *args, **kwargs):
+        etag = getattr(request, '_report_validators', (None, None))[0]
+        renderer = request.accepted_renderer
+        if etag is None or renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+        
+        # Image URLs are absolute, so the host is part of the representation
+        key = 'report_api:%s:%s:%s:%s' % (
+            type(self).__name__,
+            self.kwargs[self.lookup_field],
+            etag,
+            hashlib.md5(
+                f'{request.get_host()}|{request.accepted_media_type}|'
+                f'{get_fieldset_key(request)}'.encode()
+            ).hexdigest(),
+        )
+        body = cache.get(key)
+        if body is None:
+            response = super().retrieve(request, *args, **kwargs)
+            body = renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            cache.set(key, body, get_page_cache_ttl())
+        return HttpResponse(body, content_type=renderer.media_type)
+
+
+@method_decorator(conditional(category_validators), name='get')
+class CategoryDetailAPIView(SparseRetrieveMixin, generics.RetrieveAPIView):
     serializer_class = ReportCategoryDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
     
-    def get_queryset(self):
-        return ReportCategory.objects.filter(is_active=True).prefetch_related(
-            'sections__figures',
-            'sections__tables'
-        )
+    def get_base_queryset(self):
+        return ReportCategory.objects.filter(is_active=True)
 
 
+@method_decorator([conditional_content, versioned_cache_page], name='dispatch')
 class SectionListAPIView(generics.ListAPIView):
     serializer_class = ReportSectionListSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_keys = SECTION_KEYS
+    
+    def get_queryset(self):
+        return get_section_list_queryset(self.request.query_params, self.get_serializer())
+
+
+@method_decorator(conditional_content, name='get')
+class FigureListAPIView(generics.ListAPIView):
+    serializer_class = ReportFigureSerializer
+    permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_keys = FIGURE_KEYS
     
     def get_queryset(self):
-        queryset = ReportSection.objects.filter(is_published=True).select_related('category')
+        queryset = ReportFigure.objects.select_related('section__category')
         
         # Filter by category
         category_slug = self.request.query_params.get('category', None)
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            queryset = queryset.filter(section__category__slug=category_slug)
         
-        # Filter by featured
-        featured = self.request.query_params.get('featured', None)
-        if featured and featured.lower() == 'true':
-            queryset = queryset.filter(is_featured=True)
+        return queryset
+
+
+@method_decorator(conditional_content, name='get')
+class TableListAPIView(generics.ListAPIView):
+    serializer_class = ReportTableSerializer
+    permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_keys = TABLE_KEYS
+    
+    def get_queryset(self):
+        queryset = ReportTable.objects.select_related('section__category')
         
-        return queryset.order_by('category__order', 'order', 'section_number')
+        # Filter by category
+        category_slug = self.request.query_params.get('category', None)
+        if category_slug:
+            queryset = queryset.filter(section__category__slug=category_slug)
+        
+        return queryset
 
 
-class SectionDetailAPIView(generics.RetrieveAPIView):
+@method_decorator(conditional(section_validators), name='get')
+class SectionDetailAPIView(SparseRetrieveMixin, generics.RetrieveAPIView):
     serializer_class = ReportSectionDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'id'
     
-    def get_queryset(self):
-        return ReportSection.objects.filter(is_published=True).select_related('category').prefetch_related(
-            'figures',
-            'tables'
-        )
+    def get_base_queryset(self):
+        return ReportSection.objects.filter(is_published=True)
 
 
+@method_decorator([conditional_content, versioned_cache_page], name='dispatch')
 class ReportSearchAPIView(APIView):
     permission_classes = [AllowAny]
     
@@ -76,48 +163,202 @@ class ReportSearchAPIView(APIView):
         if not query or len(query) < 2:
             return Response({'results': [], 'count': 0})
         
-        results = []
+        return Response(get_search_results(query))
+
+
+def get_category_list_queryset():
+    return ReportCategory.objects.filter(is_active=True).annotate(
+        published_sections_count=Count('sections', filter=Q(sections__is_published=True))
+    ).order_by('order')
+
+
+def get_section_list_queryset(params, serializer):
+    """Published sections filtered by ?category= and ?featured="""
+    queryset = ReportSection.objects.filter(is_published=True).select_related('category')
+    
+    # Filter by category
+    category_slug = params.get('category', None)
+    if category_slug:
+        queryset = queryset.filter(category__slug=category_slug)
+    
+    # Filter by featured
+    featured = params.get('featured', None)
+    if featured and featured.lower() == 'true':
+        queryset = queryset.filter(is_featured=True)
+    
+    # Sort keys stay loaded for the cursors
+    queryset = sparse_queryset(
+        queryset, serializer, keep=['category', 'order', 'section_number']
+    )
+    return queryset.order_by('category__order', 'order', 'section_number')
+
+
+def get_search_results(query):
+    """Search API payload of the ten best published sections for a query"""
+    results = []
+    
+    # Ranked full-text search over published sections
+    sections = SectionSearchResults(query)[:10]
+    
+    for section in sections:
+        results.append({
+            'type': 'section',
+            'title': section.title,
+            'title_nepali': section.title_nepali,
+            'content': section.summary or section.content[:200] + '...',
+            'url': section.get_absolute_url(),
+            'section_number': section.section_number,
+            'category': section.category.name,
+        })
+    
+    serializer = SearchResultSerializer(results, many=True)
+    return {
+        'results': serializer.data,
+        'count': len(results)
+    }
+
+
+class SuggestionAPIView(APIView):
+    """Search-as-you-type suggestions from the in-process prefix index"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 20)
+        except ValueError:
+            limit = 10
         
-        # Search sections
-        sections = ReportSection.objects.filter(
-            Q(title__icontains=query) |
-            Q(title_nepali__icontains=query) |
-            Q(content__icontains=query) |
-            Q(content_nepali__icontains=query),
-            is_published=True
-        ).select_related('category')[:10]
+        if not query:
+            return Response({'query': query, 'suggestions': []})
         
-        for section in sections:
-            results.append({
-                'type': 'section',
-                'title': section.title,
-                'title_nepali': section.title_nepali,
-                'content': section.summary or section.content[:200] + '...',
-                'url': section.get_absolute_url(),
-                'section_number': section.section_number,
-                'category': section.category.name,
-            })
+        return Response({'query': query, 'suggestions': suggest(query, limit)})
+
+
+class ProcessorDataIndexAPIView(APIView):
+    """Domains and categories served by the processor data API"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request, domain=None):
+        catalog = get_catalog()
+        if domain is not None:
+            if domain not in catalog:
+                raise Http404("Unknown data domain")
+            catalog = {domain: catalog[domain]}
         
-        serializer = SearchResultSerializer(results, many=True)
         return Response({
-            'results': serializer.data,
-            'count': len(results)
+            name: [
+                {
+                    'category': category,
+                    'url': request.build_absolute_uri(
+                        reverse('reports:api_data', args=[name, category])
+                    ),
+                }
+                for category in categories
+            ]
+            for name, categories in catalog.items()
         })
 
 
-class DownloadStatsAPIView(APIView):
+class ProcessorDataAPIView(APIView):
+    """
+    get_data() of one processor as JSON, optionally for a single ward (?ward=3)
+    
+    Served from precomputed, pre-compressed cache entries with an ETag.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, domain, category):
+        ward = request.query_params.get('ward')
+        if ward is not None:
+            try:
+                ward = int(ward)
+            except ValueError:
+                return Response({'error': 'ward must be a number'}, status=400)
+            if not 1 <= ward <= get_ward_count():
+                return Response(
+                    {'error': f'ward must be between 1 and {get_ward_count()}'},
+                    status=400,
+                )
+        
+        try:
+            entry = get_processor_data(domain, category, ward)
+        except KeyError:
+            return Response(
+                {'error': f'{category} has no ward-wise data'}, status=400
+            )
+        if entry is None:
+            raise Http404("Unknown data category")
+        
+        response = get_conditional_response(request, etag=entry['etag'])
+        if response is None:
+            encoding = choose_encoding(
+                entry, request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            response = HttpResponse(
+                entry[encoding], content_type='application/json; charset=utf-8'
+            )
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = entry['etag']
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Cache-Control'] = 'public, no-cache'
+        return response
+
+
+class DatasetIndexAPIView(APIView):
+    """Datasets available for bulk export, with their download links"""
     permission_classes = [AllowAny]
     
     def get(self, request):
-        # Get download stats for last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        return Response([
+            {
+                'name': dataset.name,
+                'description': dataset.description,
+                'columns': dataset.columns,
+                'downloads': {
+                    file_format: request.build_absolute_uri(
+                        reverse('reports:api_export', args=[dataset.name, file_format])
+                    )
+                    for file_format in EXPORT_FORMATS
+                },
+            }
+            for dataset in get_datasets().values()
+        ])
+
+
+class DatasetExportView(View):
+    """One dataset streamed as CSV or JSON Lines"""
+    
+    def get(self, request, dataset, file_format):
+        if file_format not in EXPORT_FORMATS:
+            raise Http404("Unknown export format")
+        dataset = get_dataset(dataset)
+        if dataset is None:
+            raise Http404("Unknown dataset")
         
-        stats = ReportDownload.objects.filter(
-            downloaded_at__gte=thirty_days_ago
-        ).aggregate(
-            total_downloads=Count('id'),
-            pdf_downloads=Count('id', filter=Q(download_type='pdf')),
-            full_report_downloads=Count('id', filter=Q(download_type='full_report')),
+        response = StreamingHttpResponse(
+            EXPORT_WRITERS[file_format](dataset),
+            content_type=EXPORT_FORMATS[file_format],
         )
-        
-        return Response(stats)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{dataset.name}.{file_format}"'
+        )
+        return response
+
+
+@method_decorator(conditional(download_stats_validators), name='get')
+class DownloadStatsAPIView(APIView):
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        # Downloads of the last 30 days, read from the daily rollup
+        return Response(get_download_stats())
+
+
+class PDFAdmissionStatsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # In-flight, queued and rejected PDF builds across all workers
+        return Response(AdmissionController().get_metrics())
@@ -0,0 +1,127 @@
+"""
+Async read endpoints of the public API
+
+Async counterparts of the category list, section list, search and
+download statistics endpoints, with the same JSON bodies. Validators,
+cached bodies and queries go through Django's async cache and ORM APIs, so
+under ASGI (gadhawa_report/asgi.py) a waiting request holds no worker
+thread; search, whose full-text queries are sync-only, runs through
+sync_to_async. Like their sync counterparts, they answer conditional
+requests and cache bodies per content version and URL, except for the
+download statistics, which change with downloads.
+"""
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+from ..serializers import ReportCategoryListSerializer, ReportSectionListSerializer
+from ..utils.conditional import (
+    aconditional, acontent_validators, adownload_stats_validators
+)
+from ..utils.download_stats import aget_download_stats
+from ..utils.page_cache import aget_content_version, get_page_cache_ttl
+from ..utils.pagination import (
+    CURSOR_PARAM, SECTION_KEYS, KeysetPagination, KeysetPaginator
+)
+from .api import (
+    CategoryListAPIView, get_category_list_queryset, get_search_results,
+    get_section_list_queryset
+)
+
+
+class AsyncAPIView(View):
+    """Read-only async JSON endpoint; subclasses implement get_data()"""
+
+    http_method_names = ['get', 'head', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        key = 'report_api_async:%s:%s' % (
+            await aget_content_version(),
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest(),
+        )
+        body = await cache.aget(key)
+        if body is None:
+            try:
+                data = await self.get_data(request, *args, **kwargs)
+            except APIException as e:
+                return HttpResponse(
+                    JSONRenderer().render({'detail': e.detail}),
+                    status=e.status_code,
+                    content_type='application/json',
+                )
+            body = JSONRenderer().render(data)
+            await cache.aset(key, body, get_page_cache_ttl())
+        return HttpResponse(body, content_type='application/json')
+
+    async def get_data(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+@method_decorator(aconditional(acontent_validators), name='get')
+class AsyncCategoryListAPIView(AsyncAPIView):
+    async def get_data(self, request):
+        # Categories are few: page them in memory, as the sync view pages them
+        categories = [category async for category in get_category_list_queryset()]
+        pagination = CategoryListAPIView().paginator
+        if pagination is not None:
+            categories = pagination.paginate_queryset(categories, Request(request))
+        data = ReportCategoryListSerializer(
+            categories, many=True, context={'request': request}
+        ).data
+        if pagination is None:
+            return data
+        return pagination.get_paginated_response(data).data
+
+
+@method_decorator(aconditional(acontent_validators), name='get')
+class AsyncSectionListAPIView(AsyncAPIView):
+    async def get_data(self, request):
+        context = {'request': request}
+        queryset = get_section_list_queryset(
+            request.GET, ReportSectionListSerializer(context=context)
+        )
+        page = await KeysetPaginator(
+            queryset, SECTION_KEYS, KeysetPagination.page_size
+        ).aget_page(request.GET.get(CURSOR_PARAM))
+        url = request.build_absolute_uri()
+        return {
+            'count': page.count,
+            'next': page.next_cursor and replace_query_param(
+                url, CURSOR_PARAM, page.next_cursor
+            ),
+            'previous': page.previous_cursor and replace_query_param(
+                url, CURSOR_PARAM, page.previous_cursor
+            ),
+            'results': ReportSectionListSerializer(
+                page.object_list, many=True, context=context
+            ).data,
+        }
+
+
+@method_decorator(aconditional(acontent_validators), name='get')
+class AsyncReportSearchAPIView(AsyncAPIView):
+    async def get_data(self, request):
+        query = request.GET.get('q', '')
+
+        if not query or len(query) < 2:
+            return {'results': [], 'count': 0}
+
+        return await sync_to_async(get_search_results)(query)
+
+
+@method_decorator(aconditional(adownload_stats_validators), name='get')
+class AsyncDownloadStatsAPIView(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        # Downloads of the last 30 days, read from the daily rollup; the
+        # statistics change with downloads, not with the content version
+        stats = await aget_download_stats()
+        return HttpResponse(JSONRenderer().render(stats), content_type='application/json')
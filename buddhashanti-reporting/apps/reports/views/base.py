@@ -1,19 +1,21 @@
 from django.utils import timezone
-from ..models import ReportCategory, ReportSection, ReportDownload, PublicationSettings
+from ..models import ReportCategory, ReportSection
+from ..utils import download_tracker
+from ..utils.navigation import get_navigation
 from ..utils.nepali_numbers import to_nepali_digits
 
 
 def track_download(request, download_type, section=None):
-    """Track download for analytics"""
+    """Queue a download for analytics (written in batches, see download_tracker)"""
     try:
-        ReportDownload.objects.create(
-            section=section,
-            download_type=download_type,
-            ip_address=request.META.get("REMOTE_ADDR", ""),
-            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        download_tracker.track(
+            section.pk if section else None,
+            download_type,
+            request.META.get("REMOTE_ADDR", ""),
+            request.META.get("HTTP_USER_AGENT", ""),
         )
-    except Exception:
-        pass  # Don't fail if tracking fails
+    except Exception as e:
+        print(f"Could not track download: {e}")  # Don't fail the download
 
 
 class ReportContextMixin:
@@ -22,12 +24,8 @@ class ReportContextMixin:
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get all categories with their sections for sidebar navigation
-        categories = (
-            ReportCategory.objects.filter(is_active=True)
-            .prefetch_related("sections")
-            .order_by("order")
-        )
+        # Sidebar navigation and publication settings come from the cached tree
+        navigation = get_navigation()
 
         # Add current page context
         current_category = None
@@ -43,38 +41,25 @@ class ReportContextMixin:
 
         # Alternative: get from URL kwargs
         if not current_category and "category_slug" in self.kwargs:
-            try:
-                current_category = ReportCategory.objects.get(
-                    slug=self.kwargs["category_slug"], is_active=True
-                )
-            except ReportCategory.DoesNotExist:
-                pass
+            current_category = navigation.get_category(self.kwargs["category_slug"])
 
         if not current_section and "section_slug" in self.kwargs and current_category:
-            try:
-                current_section = ReportSection.objects.get(
-                    slug=self.kwargs["section_slug"],
-                    category=current_category,
-                    is_published=True,
-                )
-            except ReportSection.DoesNotExist:
-                pass
+            current_section = navigation.get_section(
+                current_category.slug, self.kwargs["section_slug"]
+            )
 
         # Municipality name - make dynamic
         municipality_name = "पोखरा महानगरपालिका"
         municipality_name_english = "pokhara Metropolitan City"
 
-        # Get publication settings
-        publication_settings = PublicationSettings.objects.first()
-
         context.update(
             {
-                "categories": categories,
+                "categories": navigation.categories,
                 "current_category": current_category,
                 "current_section": current_section,
                 "municipality_name": municipality_name,
                 "municipality_name_english": municipality_name_english,
-                "publication_settings": publication_settings,
+                "publication_settings": navigation.publication_settings,
             }
         )
 
@@ -1,16 +1,28 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
-import io
+import logging
+import tempfile
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from weasyprint import HTML
 
 from .base import track_download
+from ..utils.admission import AdmissionRejected, build_slot, rejected_response
+from ..utils.artifacts import pdf_artifacts
+from ..utils.draft_pdf import DraftReportRenderer
+from ..utils.http import ranged_file_response, service_unavailable_response
+from ..utils.incremental import (
+    IncrementalReportBuilder,
+    incremental_builds_available,
+)
+from ..utils.linearize import linearize_pdf
+from ..utils.pdf_images import PDFImageFetcher, resolve_image_profile
+from ..utils.report_data import collect_report_data, get_report_base_context
+from ..utils.single_flight import get_wait_timeout, single_flight
+from ..utils.tracing import NULL_TRACER, BuildTracer
 from ..models import (
     ReportCategory,
     ReportSection,
@@ -18,163 +30,252 @@ from ..models import (
     ReportTable,
     PublicationSettings,
 )
-from apps.demographics.processors.manager import get_demographics_manager
-from apps.social.processors.manager import get_social_manager
-from apps.infrastructure.processors.manager import get_infrastructure_manager
-from apps.economics.processors.manager import get_economics_manager
+
+logger = logging.getLogger(__name__)
 
 
 class PDFGeneratorMixin:
     """Mixin for PDF generation functionality"""
 
+    # Replaced by a BuildTracer while a traced build is running
+    tracer = NULL_TRACER
+
+    def dispatch(self, request, *args, **kwargs):
+        # Renders run in a build slot (see build_slot); 503 when none is free
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
     def get_publication_settings(self):
         try:
             return PublicationSettings.objects.first()
         except PublicationSettings.DoesNotExist:
             return None
 
-    def generate_pdf_with_weasyprint(self, template_name, context, filename):
-        """Generate PDF using WeasyPrint for better styling"""
-        try:
+    def get_image_profile(self):
+        """Image output profile requested via ?profile=screen|ebook|print"""
+        return resolve_image_profile(self.request.GET.get("profile"))
+
+    def wants_linearized(self):
+        """Fast web view requested via ?linearize=1, or on by default"""
+        value = self.request.GET.get("linearize")
+        if value is None:
+            return getattr(self, "linearize_by_default", False)
+        return value.lower() in ("1", "true", "yes")
+
+    def wants_draft(self):
+        """Fast ReportLab draft requested via ?draft=1"""
+        return self.request.GET.get("draft", "").lower() in ("1", "true", "yes")
+
+    def get_draft_filename(self, filename):
+        return filename.replace(".pdf", "_draft.pdf")
+
+    def generate_pdf(self, template_name, context, filename):
+        """Generate the PDF as a draft when requested, otherwise with WeasyPrint"""
+        with build_slot():
+            if self.wants_draft():
+                return self.generate_pdf_with_reportlab(
+                    template_name, context, self.get_draft_filename(filename)
+                )
+            return self.generate_pdf_with_weasyprint(template_name, context, filename)
+
+    def get_artifact_key(self, name, linearized=True):
+        """Artifact cache key for a PDF in the current profile"""
+        suffix = "_web" if linearized else ""
+        return f"{name}_{self.get_image_profile()}{suffix}"
+
+    def create_pdf_file(self):
+        """
+        Create the temporary file a PDF is written into
+
+        Small documents stay in memory; anything larger than
+        REPORT_PDF_SPOOL_MAX_SIZE rolls over to disk so the full report is
+        never held in worker RAM while it is being streamed out.
+        """
+        return tempfile.SpooledTemporaryFile(
+            max_size=getattr(settings, "REPORT_PDF_SPOOL_MAX_SIZE", 1024 * 1024),
+            mode="w+b",
+        )
+
+    def build_pdf_response(self, pdf_file, filename):
+        """Stream a finished PDF file to the client in chunks"""
+        pdf_file.seek(0)
+        return FileResponse(
+            pdf_file,
+            as_attachment=True,
+            filename=filename,
+            content_type="application/pdf",
+        )
+
+    def write_weasyprint_pdf(self, template_name, context, target):
+        """Render a template and write it as PDF to a file object or path"""
+        with self.tracer.stage("render_to_string"):
             html_content = render_to_string(template_name, context)
 
-            # Create PDF
-            response = HttpResponse(content_type="application/pdf")
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        # Load images through the requested output profile
+        base_url = self.request.build_absolute_uri("/")
+        url_fetcher = PDFImageFetcher(self.get_image_profile(), base_url)
+        with self.tracer.stage("write_pdf"):
+            HTML(
+                string=html_content, base_url=base_url, url_fetcher=url_fetcher
+            ).write_pdf(target)
 
-            # Generate PDF with WeasyPrint
-            base_url = self.request.build_absolute_uri("/")
-            HTML(string=html_content, base_url=base_url).write_pdf(response)
+    def generate_pdf_with_weasyprint(self, template_name, context, filename):
+        """Generate PDF using WeasyPrint for better styling"""
+        pdf_file = self.create_pdf_file()
+        try:
+            # Generate PDF with WeasyPrint straight into the spooled file
+            self.write_weasyprint_pdf(template_name, context, pdf_file)
 
-            return response
+            return self.build_pdf_response(pdf_file, filename)
 
         except Exception as e:
+            pdf_file.close()
             # Fallback to ReportLab if WeasyPrint fails
             return self.generate_pdf_with_reportlab(template_name, context, filename)
 
+    def build_pdf_artifact(self, template_name, context, artifact_key, linearize=False):
+        """
+        Render a PDF into the artifact cache, linearized (fast web view)
+        when requested, and return its path
+        """
+        return self.store_pdf_artifact(
+            artifact_key,
+            lambda path: self.write_weasyprint_pdf(template_name, context, path),
+            linearize,
+        )
+
+    def build_reportlab_artifact(self, context, artifact_key, linearize=False):
+        """Lay a PDF out with ReportLab into the artifact cache and return its path"""
+
+        def write(path):
+            with open(path, "wb") as output:
+                DraftReportRenderer().build(output, context)
+
+        return self.store_pdf_artifact(artifact_key, write, linearize)
+
+    def store_pdf_artifact(self, artifact_key, write, linearize=False):
+        """Write a PDF with write(path), linearize it if requested and cache it"""
+        source_path = pdf_artifacts.temp_path(artifact_key)
+        linearized_path = pdf_artifacts.temp_path(artifact_key)
+        try:
+            write(str(source_path))
+
+            if linearize:
+                with self.tracer.stage("linearize"):
+                    linearized = linearize_pdf(source_path, linearized_path)
+                if linearized:
+                    return pdf_artifacts.store_path(artifact_key, linearized_path)
+            # Regular PDF, or no linearizer available
+            return pdf_artifacts.store_path(artifact_key, source_path)
+
+        finally:
+            for tmp_path in (source_path, linearized_path):
+                tmp_path.unlink(missing_ok=True)
+
+    def serve_pdf_artifact(self, path, filename, as_attachment=False):
+        """Serve a cached PDF (inline by default) so browsers can range-request page 1"""
+        return ranged_file_response(
+            self.request, path, filename, as_attachment=as_attachment
+        )
+
     def generate_pdf_with_reportlab(self, template_name, context, filename):
-        """Fallback PDF generation using ReportLab"""
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        # Create PDF document
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Add title
-        if "municipality_name" in context:
-            title = Paragraph(context["municipality_name"], styles["Title"])
-            story.append(title)
-            story.append(Spacer(1, 12))
-
-        # Add content based on context
-        if "category" in context and context["category"]:
-            category_title = Paragraph(
-                f"Category: {context['category'].name}", styles["Heading1"]
-            )
-            story.append(category_title)
-            story.append(Spacer(1, 12))
-
-            if (
-                hasattr(context["category"], "description")
-                and context["category"].description
-            ):
-                desc = Paragraph(context["category"].description, styles["Normal"])
-                story.append(desc)
-                story.append(Spacer(1, 12))
-
-        if "section" in context and context["section"]:
-            section_title = Paragraph(
-                f"Section: {context['section'].title}", styles["Heading1"]
-            )
-            story.append(section_title)
-            story.append(Spacer(1, 12))
-
-            if context["section"].content:
-                content = Paragraph(
-                    context["section"].content[:1000] + "...", styles["Normal"]
-                )
-                story.append(content)
+        """
+        Build the PDF straight from ReportLab flowables
 
-        # Build PDF
-        doc.build(story)
-        pdf = buffer.getvalue()
-        buffer.close()
-        response.write(pdf)
+        Used for draft previews and as the fallback when WeasyPrint fails;
+        processor tables, narrative and charts are laid out without HTML.
+        """
+        pdf_file = self.create_pdf_file()
+        try:
+            DraftReportRenderer().build(pdf_file, context)
+        except Exception:
+            pdf_file.close()
+            raise
 
-        return response
+        return self.build_pdf_response(pdf_file, filename)
 
 
 class GenerateFullReportPDFView(PDFGeneratorMixin, TemplateView):
-    def get(self, request, *args, **kwargs):
-        # Track download
-        track_download(request, "full_report")
+    linearize_by_default = getattr(settings, "REPORT_PDF_LINEARIZE_FULL_REPORT", False)
 
-        # Municipality name - make dynamic
-        municipality_name = "पोखरा महानगरपालिका"
-        municipality_name_english = "pokhara Metropolitan City"
-
-        # Get publication settings (optional)
-        publication_settings = (
-            self.get_publication_settings()
-        )  # Get all data using new processor system
-        demographics_manager = get_demographics_manager()
-        social_manager = get_social_manager()
-        infrastructure_manager = get_infrastructure_manager()
-        economics_manager = get_economics_manager()
-
-        # Generate all charts before processing data
-        demographics_manager.generate_all_charts()
-        social_manager.generate_all_charts()
-        infrastructure_manager.generate_all_charts()
-        economics_manager.generate_all_charts()
-
-        # Get processed data with charts
-        all_demographics_data = demographics_manager.process_all_for_pdf()
-        all_social_data = social_manager.process_all_for_pdf()
-        all_infrastructure_data = infrastructure_manager.process_all_for_pdf()
-        all_economics_data = economics_manager.process_all_for_pdf()
-
-        # Extract chart URLs for template use
-        pdf_charts = {}
-        for category, data in all_demographics_data.items():
-            if "charts" in data:
-                pdf_charts[category] = data["charts"]
-
-        for category, data in all_social_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(data["pdf_charts"])
-
-        for category, data in all_infrastructure_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(data["pdf_charts"])
-
-        for category, data in all_economics_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(
-                    data["pdf_charts"]
-                )  # Use hardcoded content plus dynamic data
-        context = {
-            "municipality_name": municipality_name,
-            "municipality_name_english": municipality_name_english,
-            "publication_settings": publication_settings,
-            "generated_date": timezone.now(),
-            "all_demographics_data": all_demographics_data,
-            "all_social_data": all_social_data,
-            "all_infrastructure_data": all_infrastructure_data,
-            "all_economics_data": all_economics_data,
-            "pdf_charts": pdf_charts,
-        }
+    def get(self, request, *args, **kwargs):
+        # Track download (byte-range follow-ups are part of the same download)
+        if "HTTP_RANGE" not in request.META:
+            track_download(request, "full_report")
 
         filename = (
             f"pokhara_digital_profile_report_{timezone.now().strftime('%Y%m%d')}.pdf"
         )
-        return self.generate_pdf_with_weasyprint(
-            "reports/pdf_full_report.html", context, filename
+
+        template_name = "reports/pdf_full_report.html"
+        if self.wants_draft():
+            return self.generate_pdf(template_name, self.get_report_context(), filename)
+
+        # Concurrent identical requests share one build (and its cached PDF)
+        linearize = self.wants_linearized()
+        artifact_key = self.get_artifact_key("full_report", linearize)
+
+        def build():
+            with build_slot(), BuildTracer("full_report", artifact_key) as self.tracer:
+                if self.use_incremental_build():
+                    try:
+                        return self.build_incremental_artifact(artifact_key, linearize)
+                    except Exception:
+                        logger.exception(
+                            "Incremental report build failed, rebuilding fully"
+                        )
+                context = self.get_report_context()
+                try:
+                    return self.build_pdf_artifact(
+                        template_name, context, artifact_key, linearize
+                    )
+                except Exception:
+                    # Fallback to ReportLab if WeasyPrint fails, shared like any build
+                    logger.exception("WeasyPrint report build failed, using ReportLab")
+                    return self.build_reportlab_artifact(context, artifact_key, linearize)
+
+        try:
+            artifact_path = single_flight(pdf_artifacts, artifact_key, build)
+        except AdmissionRejected:
+            raise
+        except Exception:
+            # Both renderers failed: the last good PDF, if any, beats rebuilding per request
+            logger.exception("Full report build failed")
+            artifact_path = pdf_artifacts.get_stale(artifact_key)
+
+        if artifact_path is None:
+            return service_unavailable_response(get_wait_timeout())
+        return self.serve_pdf_artifact(
+            artifact_path, filename, as_attachment=not linearize
         )
 
+    def use_incremental_build(self):
+        """Rebuild only changed chapters when enabled and pikepdf is installed"""
+        return (
+            getattr(settings, "REPORT_PDF_INCREMENTAL_BUILDS", False)
+            and incremental_builds_available()
+        )
+
+    def build_incremental_artifact(self, artifact_key, linearize):
+        """Splice the full report from cached chapters into the artifact cache"""
+        builder = IncrementalReportBuilder(
+            get_report_base_context(),
+            self.get_image_profile(),
+            self.request.build_absolute_uri("/"),
+            tracer=self.tracer,
+        )
+        return self.store_pdf_artifact(artifact_key, builder.build, linearize)
+
+    def get_report_context(self):
+        """Run all processors and build the full report template context"""
+        return {
+            **get_report_base_context(),
+            # Get all data using the processor system
+            **collect_report_data(self.tracer),
+        }
+
 
 class GenerateCategoryPDFView(PDFGeneratorMixin, TemplateView):
     def get(self, request, slug, *args, **kwargs):
@@ -210,9 +311,8 @@ class GenerateCategoryPDFView(PDFGeneratorMixin, TemplateView):
         filename = (
             f"pokhara_{category.slug}_report_{timezone.now().strftime('%Y%m%d')}.pdf"
         )
-        return self.generate_pdf_with_weasyprint(
-            "reports/pdf_category.html", context, filename
-        )
+        with BuildTracer("category", category.slug) as self.tracer:
+            return self.generate_pdf("reports/pdf_category.html", context, filename)
 
 
 class GenerateSectionPDFView(PDFGeneratorMixin, TemplateView):
@@ -243,6 +343,6 @@ class GenerateSectionPDFView(PDFGeneratorMixin, TemplateView):
         }
 
         filename = f"pokhara_{section.category.slug}_{section.slug}_{timezone.now().strftime('%Y%m%d')}.pdf"
-        return self.generate_pdf_with_weasyprint(
-            "reports/pdf_section.html", context, filename
-        )
+        target = f"{section.category.slug}/{section.slug}"
+        with BuildTracer("section", target) as self.tracer:
+            return self.generate_pdf("reports/pdf_section.html", context, filename)
@@ -1,12 +1,11 @@
 from django.shortcuts import get_object_or_404
 from django.views.generic import DetailView, TemplateView
-from django.http import Http404
+from django.conf import settings
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.decorators.gzip import gzip_page
-from django.db.models import Q
 from django.core.paginator import Paginator
-import datetime
+import io
 
 from .base import ReportContextMixin
 from ..models import (
@@ -14,57 +13,45 @@ from ..models import (
     ReportSection,
     ReportFigure,
     ReportTable,
-    PublicationSettings,
 )
-from ..utils.nepali_numbers import to_nepali_digits
-from apps.demographics.processors.manager import get_demographics_manager
-from apps.social.processors.manager import get_social_manager
-from apps.infrastructure.processors.manager import get_infrastructure_manager
-from apps.economics.processors.manager import get_economics_manager
+from ..utils.artifacts import html_artifacts
+from ..utils.conditional import conditional_content
+from ..utils.http import service_unavailable_response
+from ..utils.nepali_numbers import (
+    format_nepali_number,
+    format_nepali_percentage,
+    to_nepali_digits,
+)
+from ..utils.page_cache import versioned_cache_page
+from ..utils.pagination import FIGURE_KEYS, TABLE_KEYS, paginate
+from ..utils.report_data import collect_report_data, get_report_base_context
+from ..utils.search_index import SectionSearchResults
+from ..utils.single_flight import (
+    BuildLease,
+    LeasedStream,
+    get_wait_timeout,
+    single_flight,
+)
+from ..utils.statistics import get_report_statistics
+from ..utils.streaming import CHAPTERS_MARKER, iter_report_chapters
+from ..utils.tracing import NULL_TRACER, BuildTracer
 
 
-@method_decorator([cache_page(60 * 15), gzip_page], name="dispatch")
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class ReportHomeView(ReportContextMixin, TemplateView):
     template_name = "reports/home.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get all active categories with sections for homepage
-        categories = context["categories"]
+        # Counts and headline figures from the cached statistics snapshot
+        statistics = get_report_statistics()
+        stats = self.get_stats(statistics)
 
-        # Quick stats (can be made dynamic later)
-        stats = [
-            {
-                "title": "कुल जनसंख्या",
-                "value": "१२,३४५",
-                "icon": "fas fa-users",
-                "description": "गत जनगणना अनुसार",
-            },
-            {
-                "title": "कुल वडा संख्या",
-                "value": "९",
-                "icon": "fas fa-map-marker-alt",
-                "description": "प्रशासनिक वडाहरू",
-            },
-            {
-                "title": "कुल क्षेत्रफल",
-                "value": "१२३.४५ वर्ग कि.मी.",
-                "icon": "fas fa-globe",
-                "description": "भौगोलिक क्षेत्रफल",
-            },
-            {
-                "title": "साक्षरता दर",
-                "value": "७८.५%",
-                "icon": "fas fa-graduation-cap",
-                "description": "कुल साक्षरता दर",
-            },
-        ]
-
-        total_categories = categories.count()
-        total_sections = sum(
-            cat.sections.filter(is_published=True).count() for cat in categories
-        )
+        total_categories = statistics["total_categories"]
+        total_sections = statistics["total_sections"]
 
         context.update(
             {
@@ -78,8 +65,53 @@ class ReportHomeView(ReportContextMixin, TemplateView):
 
         return context
 
+    def get_stats(self, statistics):
+        """Quick stats cards; figures missing from the data are left out"""
+        stats = []
+        if statistics["population"]:
+            stats.append(
+                {
+                    "label": "कुल जनसंख्या",
+                    "value": to_nepali_digits(f"{statistics['population']:,}"),
+                    "icon": "fas fa-users",
+                    "description": "गत जनगणना अनुसार",
+                }
+            )
+        if statistics["wards"]:
+            stats.append(
+                {
+                    "label": "कुल वडा संख्या",
+                    "value": format_nepali_number(statistics["wards"]),
+                    "icon": "fas fa-map-marker-alt",
+                    "description": "प्रशासनिक वडाहरू",
+                }
+            )
+        if statistics["area"]:
+            stats.append(
+                {
+                    "label": "कुल क्षेत्रफल",
+                    "value": (
+                        f"{format_nepali_number(statistics['area'], 2)} वर्ग कि.मी."
+                    ),
+                    "icon": "fas fa-globe",
+                    "description": "भौगोलिक क्षेत्रफल",
+                }
+            )
+        if statistics["literacy_rate"] is not None:
+            stats.append(
+                {
+                    "label": "साक्षरता दर",
+                    "value": format_nepali_percentage(statistics["literacy_rate"]),
+                    "icon": "fas fa-graduation-cap",
+                    "description": "कुल साक्षरता दर",
+                }
+            )
+        return stats
+
 
-@method_decorator([cache_page(60 * 10), gzip_page], name="dispatch")
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class ReportCategoryView(ReportContextMixin, DetailView):
     model = ReportCategory
     template_name = "reports/category_detail.html"
@@ -132,7 +164,9 @@ class ReportCategoryView(ReportContextMixin, DetailView):
         return context
 
 
-@method_decorator([cache_page(60 * 5), gzip_page], name="dispatch")
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class ReportSectionView(ReportContextMixin, DetailView):
     model = ReportSection
     template_name = "reports/section_detail.html"
@@ -200,29 +234,28 @@ class ReportSectionView(ReportContextMixin, DetailView):
         return context
 
 
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class TableOfContentsView(ReportContextMixin, TemplateView):
     template_name = "reports/table_of_contents.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        categories = (
-            context["categories"]
-            .filter(sections__is_published=True)
-            .distinct()
-            .prefetch_related("sections__figures", "sections__tables")
-        )
-
-        # Statistics
-        total_sections = sum(
-            cat.sections.filter(is_published=True).count() for cat in categories
-        )
-        total_figures = ReportFigure.objects.count()
-        total_tables = ReportTable.objects.count()
+        # Categories with published sections, counts from the statistics snapshot
+        categories = [
+            category for category in context["categories"] if category.sections.all()
+        ]
+        statistics = get_report_statistics()
+        total_sections = statistics["total_sections"]
+        total_figures = statistics["total_figures"]
+        total_tables = statistics["total_tables"]
 
         context.update(
             {
                 "categories": categories,
+                "section_counts": statistics["sections"],
                 "total_sections": total_sections,
                 "total_sections_nepali": to_nepali_digits(str(total_sections)),
                 "total_figures": total_figures,
@@ -235,6 +268,9 @@ class TableOfContentsView(ReportContextMixin, TemplateView):
         return context
 
 
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class FigureListView(ReportContextMixin, TemplateView):
     template_name = "reports/figures_list.html"
 
@@ -242,19 +278,15 @@ class FigureListView(ReportContextMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Get all figures
-        figures = ReportFigure.objects.select_related("section__category").order_by(
-            "section__category__order", "figure_number"
-        )
+        figures = ReportFigure.objects.select_related("section__category")
 
         # Filter by category if specified
         category_filter = self.request.GET.get("category")
         if category_filter:
             figures = figures.filter(section__category__slug=category_filter)
 
-        # Pagination
-        paginator = Paginator(figures, 20)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        # Cursor pagination on (category order, figure number)
+        page_obj = paginate(self.request, figures, FIGURE_KEYS)
 
         # Categories for filter
         filter_categories = (
@@ -269,7 +301,7 @@ class FigureListView(ReportContextMixin, TemplateView):
             {
                 "figures": page_obj,
                 "filter_categories": filter_categories,
-                "total_figures": figures.count(),
+                "total_figures": page_obj.count,
                 "current_category": category_filter,
             }
         )
@@ -277,6 +309,9 @@ class FigureListView(ReportContextMixin, TemplateView):
         return context
 
 
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class TableListView(ReportContextMixin, TemplateView):
     template_name = "reports/tables_list.html"
 
@@ -284,19 +319,15 @@ class TableListView(ReportContextMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Get all tables
-        tables = ReportTable.objects.select_related("section__category").order_by(
-            "section__category__order", "table_number"
-        )
+        tables = ReportTable.objects.select_related("section__category")
 
         # Filter by category if specified
         category_filter = self.request.GET.get("category")
         if category_filter:
             tables = tables.filter(section__category__slug=category_filter)
 
-        # Pagination
-        paginator = Paginator(tables, 20)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        # Cursor pagination on (category order, table number)
+        page_obj = paginate(self.request, tables, TABLE_KEYS)
 
         # Categories for filter
         filter_categories = (
@@ -311,7 +342,7 @@ class TableListView(ReportContextMixin, TemplateView):
             {
                 "tables": page_obj,
                 "filter_categories": filter_categories,
-                "total_tables": tables.count(),
+                "total_tables": page_obj.count,
                 "current_category": category_filter,
             }
         )
@@ -319,6 +350,9 @@ class TableListView(ReportContextMixin, TemplateView):
         return context
 
 
+@method_decorator(
+    [conditional_content, versioned_cache_page, gzip_page], name="dispatch"
+)
 class ReportSearchView(ReportContextMixin, TemplateView):
     template_name = "reports/search.html"
 
@@ -331,24 +365,17 @@ class ReportSearchView(ReportContextMixin, TemplateView):
 
         results = []
         page_obj = None
+        total_results = 0
 
         if query:
-            # Search in sections
-            section_results = ReportSection.objects.filter(
-                Q(title__icontains=query)
-                | Q(title_nepali__icontains=query)
-                | Q(content__icontains=query)
-                | Q(content_nepali__icontains=query)
-                | Q(summary__icontains=query)
-                | Q(summary_nepali__icontains=query),
-                is_published=True,
-            ).select_related("category")
-
-            if category_filter:
-                section_results = section_results.filter(category__slug=category_filter)
+            # Ranked full-text search; only the requested page is loaded
+            paginator = Paginator(SectionSearchResults(query, category_filter), 10)
+            page_number = self.request.GET.get("page", 1)
+            page_obj = paginator.get_page(page_number)
+            total_results = paginator.count
 
             # Convert to search results format
-            for section in section_results:
+            for section in page_obj.object_list:
                 results.append(
                     {
                         "type": "section",
@@ -362,92 +389,105 @@ class ReportSearchView(ReportContextMixin, TemplateView):
                     }
                 )
 
-            # Pagination
-            paginator = Paginator(results, 10)
-            page_number = self.request.GET.get("page", 1)
-            page_obj = paginator.get_page(page_number)
-
         context.update(
             {
                 "query": query,
-                "results": page_obj.object_list if page_obj else [],
+                "results": results,
                 "page_obj": page_obj,
                 "current_category": category_filter,
-                "total_results": len(results) if results else 0,
+                "total_results": total_results,
             }
         )
 
         return context
 
 
+@method_decorator(conditional_content, name="dispatch")
 class FullReportView(ReportContextMixin, TemplateView):
     template_name = "reports/web_full_report.html"
+    tracer = NULL_TRACER
+
+    def get(self, request, *args, **kwargs):
+        # Concurrent visitors share one render of the full report
+        artifact_key = f"full_report_{request.get_host()}"
+
+        if getattr(settings, "REPORT_STREAM_FULL_REPORT", True):
+            artifact_path = html_artifacts.get(artifact_key)
+            if artifact_path is None:
+                lease = BuildLease(artifact_key)
+                if lease.acquire():
+                    return self.stream_report(artifact_key, lease)
+
+        render_page = super().get
+
+        def build():
+            with BuildTracer("full_report_html", artifact_key) as self.tracer:
+                response = render_page(request, *args, **kwargs)
+                with self.tracer.stage("render"):
+                    response.render()
+                return html_artifacts.store_file(
+                    artifact_key, io.BytesIO(response.content)
+                )
 
-    def get_publication_settings(self):
-        """Get publication settings from the database"""
+        artifact_path = single_flight(html_artifacts, artifact_key, build)
+        if artifact_path is None:
+            return service_unavailable_response(get_wait_timeout())
+        return FileResponse(
+            open(artifact_path, "rb"), content_type="text/html; charset=utf-8"
+        )
+
+    def stream_report(self, artifact_key, lease):
+        """
+        Send the page head and navigation at once, then each chapter as soon
+        as its processors finish; the streamed page is kept as the artifact
+        """
         try:
-            return PublicationSettings.objects.first()
-        except PublicationSettings.DoesNotExist:
-            return None
+            page = self.render_to_response(
+                self.get_context_data(streaming=True, chapters_marker=CHAPTERS_MARKER)
+            ).render()
+            head, tail = page.content.decode("utf-8").split(CHAPTERS_MARKER, 1)
+            base_context = get_report_base_context()
+        except Exception:
+            lease.release()
+            raise
+
+        def content():
+            tmp_path = html_artifacts.temp_path(artifact_key)
+            try:
+                with open(tmp_path, "wb") as output, BuildTracer(
+                    "full_report_html", artifact_key
+                ) as tracer:
+
+                    def send(html):
+                        data = html.encode("utf-8")
+                        output.write(data)
+                        return data
+
+                    yield send(head)
+                    for chapter, html in iter_report_chapters(
+                        base_context, self.request, tracer
+                    ):
+                        yield send(html)
+                    yield send(tail)
+                html_artifacts.store_path(artifact_key, tmp_path)
+            finally:
+                # Unfinished (client went away, build failed): nothing is cached
+                tmp_path.unlink(missing_ok=True)
+                lease.release()
+
+        response = StreamingHttpResponse(
+            LeasedStream(content(), lease), content_type="text/html; charset=utf-8"
+        )
+        # Let nginx pass chapters through instead of buffering the whole page
+        response["X-Accel-Buffering"] = "no"
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(get_report_base_context())
 
-        # Municipality name - make dynamic
-        municipality_name = "पोखरा महानगरपालिका"
-        municipality_name_english = "pokhara Metropolitan City"
-
-        # Get publication settings (optional)
-        publication_settings = self.get_publication_settings()
-
-        # Get all data using processor system
-        demographics_manager = get_demographics_manager()
-        social_manager = get_social_manager()
-        infrastructure_manager = get_infrastructure_manager()
-        economics_manager = get_economics_manager()
-
-        # Generate all charts before processing data
-        demographics_manager.generate_all_charts()
-        social_manager.generate_all_charts()
-        infrastructure_manager.generate_all_charts()
-        economics_manager.generate_all_charts()
-
-        # Get processed data with charts
-        all_demographics_data = demographics_manager.process_all_for_pdf()
-        all_social_data = social_manager.process_all_for_pdf()
-        all_infrastructure_data = infrastructure_manager.process_all_for_pdf()
-        all_economics_data = economics_manager.process_all_for_pdf()
-
-        # Extract chart URLs for template use
-        pdf_charts = {}
-        for category, data in all_demographics_data.items():
-            if "charts" in data:
-                pdf_charts[category] = data["charts"]
-
-        for category, data in all_social_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(data["pdf_charts"])
-
-        for category, data in all_infrastructure_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(data["pdf_charts"])
-
-        for category, data in all_economics_data.items():
-            if "pdf_charts" in data and data["pdf_charts"]:
-                pdf_charts.update(data["pdf_charts"])
-
-        context.update(
-            {
-                "municipality_name": municipality_name,
-                "municipality_name_english": municipality_name_english,
-                "publication_settings": publication_settings,
-                "generated_date": datetime.datetime.now(),
-                "all_demographics_data": all_demographics_data,
-                "all_social_data": all_social_data,
-                "all_infrastructure_data": all_infrastructure_data,
-                "all_economics_data": all_economics_data,
-                "pdf_charts": pdf_charts,
-            }
-        )
+        if not kwargs.get("streaming"):
+            # Get all data using processor system
+            context.update(collect_report_data(self.tracer))
 
         return context
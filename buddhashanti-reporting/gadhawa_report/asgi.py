@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pokhara_report.settings.development')
 
 application = get_asgi_application()
+
+# Build the per-process search suggestion index before the first request
+from apps.reports.utils.suggestions import warm_suggestion_index  # noqa: E402
+
+warm_suggestion_index()
@@ -58,6 +58,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "apps.core.middleware.ImmutableStaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -188,6 +189,80 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Report PDF generation
+# PDFs are written to a spooled temp file that rolls over to disk above this size
+REPORT_PDF_SPOOL_MAX_SIZE = config(
+    "REPORT_PDF_SPOOL_MAX_SIZE", default=1024 * 1024, cast=int
+)
+# Image profile (screen, ebook, print) used when ?profile= is not given
+REPORT_PDF_DEFAULT_IMAGE_PROFILE = config(
+    "REPORT_PDF_DEFAULT_IMAGE_PROFILE", default="print"
+)
+REPORT_PDF_IMAGE_CACHE_DIR = MEDIA_ROOT / "pdf_image_cache"
+# Generated PDFs (e.g. linearized full reports) and how long they stay fresh
+REPORT_PDF_ARTIFACT_DIR = MEDIA_ROOT / "report_artifacts"
+REPORT_PDF_ARTIFACT_TTL = config("REPORT_PDF_ARTIFACT_TTL", default=60 * 60, cast=int)
+# Serve the full report linearized (fast web view) unless ?linearize=0
+REPORT_PDF_LINEARIZE_FULL_REPORT = config(
+    "REPORT_PDF_LINEARIZE_FULL_REPORT", default=False, cast=bool
+)
+# Full report builds re-render only chapters whose data changed (needs pikepdf)
+REPORT_PDF_INCREMENTAL_BUILDS = config(
+    "REPORT_PDF_INCREMENTAL_BUILDS", default=False, cast=bool
+)
+# Concurrent full-report builds: one request builds, the rest wait this long
+# and then fall back to the previous (stale) artifact
+REPORT_BUILD_WAIT_TIMEOUT = config("REPORT_BUILD_WAIT_TIMEOUT", default=60, cast=int)
+REPORT_BUILD_LEASE_TIMEOUT = config(
+    "REPORT_BUILD_LEASE_TIMEOUT", default=10 * 60, cast=int
+)
+# Rendered section HTML is cached by content hash for this long
+REPORT_FRAGMENT_CACHE_TTL = config(
+    "REPORT_FRAGMENT_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int
+)
+# Public pages are cached until the content version changes; the TTL bounds memory
+REPORT_PAGE_CACHE_TTL = config(
+    "REPORT_PAGE_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int
+)
+# Stream /reports/full-report/ chapter by chapter instead of rendering it whole
+REPORT_STREAM_FULL_REPORT = config("REPORT_STREAM_FULL_REPORT", default=True, cast=bool)
+# Sidebar/navigation tree cache; invalidated by signals, the TTL only bounds memory
+REPORT_NAVIGATION_CACHE_TTL = config(
+    "REPORT_NAVIGATION_CACHE_TTL", default=24 * 60 * 60, cast=int
+)
+# Home/TOC statistics snapshot; dropped on change, the TTL is a safety net
+REPORT_STATISTICS_CACHE_TTL = config(
+    "REPORT_STATISTICS_CACHE_TTL", default=24 * 60 * 60, cast=int
+)
+# Entries kept in each process's search suggestion index (bounds its memory)
+REPORT_SUGGESTION_MAX_ENTRIES = config(
+    "REPORT_SUGGESTION_MAX_ENTRIES", default=20000, cast=int
+)
+# Downloads are spooled to disk and inserted in batches of this many events
+# or after this many seconds, whichever comes first
+REPORT_DOWNLOAD_SPOOL_DIR = BASE_DIR / "spool" / "downloads"
+REPORT_DOWNLOAD_FLUSH_EVENTS = config(
+    "REPORT_DOWNLOAD_FLUSH_EVENTS", default=100, cast=int
+)
+REPORT_DOWNLOAD_FLUSH_INTERVAL = config(
+    "REPORT_DOWNLOAD_FLUSH_INTERVAL", default=5, cast=int
+)
+# Raw download rows older than this are pruned by `manage.py rollup_downloads`;
+# daily rollups are kept
+REPORT_DOWNLOAD_RETENTION_DAYS = config(
+    "REPORT_DOWNLOAD_RETENTION_DAYS", default=90, cast=int
+)
+# Recorded on each ReportBuild trace so builds can be compared across deploys
+APP_VERSION = config("APP_VERSION", default="")
+# Admission control for /reports/pdf/*: concurrent builds across workers,
+# how many requests may queue for a slot and for how long
+REPORT_PDF_MAX_CONCURRENT_BUILDS = config(
+    "REPORT_PDF_MAX_CONCURRENT_BUILDS", default=2, cast=int
+)
+REPORT_PDF_MAX_QUEUED = config("REPORT_PDF_MAX_QUEUED", default=4, cast=int)
+REPORT_PDF_QUEUE_TIMEOUT = config("REPORT_PDF_QUEUE_TIMEOUT", default=15, cast=int)
+REPORT_PDF_RETRY_AFTER = config("REPORT_PDF_RETRY_AFTER", default=30, cast=int)
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
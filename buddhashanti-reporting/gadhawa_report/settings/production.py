@@ -48,7 +48,15 @@ CORS_ALLOWED_ORIGINS = os.environ.get("CORS_ALLOWED_ORIGINS", "").split(",")
 
 # Static files for production
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
+# Content-hashed names plus staticfiles.json; charts rendered later are added by
+# the chart service. Serve hashed files as immutable, e.g. in nginx:
+#   location ~ "^/static/.+\.[0-9a-f]{12}\.\w+$" {
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "apps.core.storage.HashedStaticFilesStorage"},
+}
 
 # Media files for production
 MEDIA_ROOT = BASE_DIR / "media"
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pokhara_report.settings.development')
 
 application = get_wsgi_application()
+
+# Build the per-process search suggestion index before the first request
+from apps.reports.utils.suggestions import warm_suggestion_index  # noqa: E402
+
+warm_suggestion_index()